@@ -1,4 +1,4 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request
 from flask_cors import CORS
 import logging
 from datetime import datetime, timedelta
@@ -10,6 +10,10 @@ import json
 base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, base_path)
 
+from refresher import BackgroundRefresher
+from ttl_cache import shared_cache
+import metrics
+
 template_folder = os.path.join(base_path, 'templates')
 static_folder = os.path.join(base_path, 'static')
 
@@ -27,7 +31,7 @@ logger = logging.getLogger(__name__)
 
 # Import modules (lazy initialization to avoid cold-start timeout)
 try:
-    from ranker import SwingTradingRanker
+    from ranker import SwingTradingRanker, SORT_KEYS, select_top
     ranker = None  # Will be initialized on first request
     logger.info("✓ Ranker module imported successfully (lazy init)")
 except Exception as import_error:
@@ -49,6 +53,9 @@ def get_ranker():
             ranker = None
     return ranker
 
+# Hit/miss counters of the cache shared by fetcher, metadata and scraper, for /api/metrics
+metrics.register_cache('memory', shared_cache())
+
 # Cache system with persistence
 cache_file = '/tmp/stocks_cache.json'
 
@@ -207,9 +214,8 @@ DEMO_DATA = [
 ]
 
 cache = {
-    'data': None,
-    'timestamp': None,
-    'count': 10
+    'universe': None,
+    'timestamp': None
 }
 
 # Load cached data from disk if available
@@ -219,9 +225,8 @@ def load_cache():
         if os.path.exists(cache_file):
             with open(cache_file, 'r') as f:
                 cached = json.load(f)
-                cache['data'] = cached.get('data')
+                cache['universe'] = cached.get('universe')
                 cache['timestamp'] = cached.get('timestamp')
-                cache['count'] = cached.get('count', 10)
                 logger.info("✓ Loaded cached stocks from disk")
     except Exception as e:
         logger.error(f"Error loading cache: {str(e)}")
@@ -238,6 +243,15 @@ def save_cache():
 # Load cache on startup
 load_cache()
 
+# Rankings are recomputed in the background (tighter cadence while BSE is open)
+refresher = BackgroundRefresher(
+    market_interval=timedelta(minutes=int(os.environ.get('REFRESH_MARKET_MINUTES', 15))),
+    idle_interval=timedelta(minutes=int(os.environ.get('REFRESH_IDLE_MINUTES', 720)))
+)
+
+# Longest a refresh=true request waits when there is no live result yet
+scan_wait = 25
+
 
 # ==================== ROUTES ====================
 
@@ -248,11 +262,18 @@ def health():
         'status': 'ok',
         'timestamp': datetime.now().isoformat(),
         'ranker_available': ranker is not None or get_ranker() is not None,
-        'cached_data_available': cache['data'] is not None,
-        'last_fetch': cache['timestamp']
+        'cached_data_available': cache['universe'] is not None,
+        'last_fetch': cache['timestamp'],
+        'cache': shared_cache().stats()
     })
 
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Stage latencies, data source outcomes and cache counters in Prometheus text format"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
 @app.route('/', methods=['GET'])
 def index():
     """Serve the main dashboard page"""
@@ -292,155 +313,137 @@ def index():
         """
 
 
+def compute_universe():
+    """Score the whole default universe (raw numeric fields, best first)"""
+    current_ranker = get_ranker()
+    if current_ranker is None:
+        raise RuntimeError('Ranker not initialized')
+    universe = current_ranker.score_universe()
+    if not universe:
+        # Keep serving the previous result rather than an empty list
+        raise RuntimeError('No stocks returned from ranker')
+    return universe
+
+
+def on_universe_update(universe, computed_at):
+    cache['universe'] = universe
+    cache['timestamp'] = computed_at.isoformat()
+    save_cache()
+
+
+# Serve the universe persisted by a previous instance until the first refresh;
+# it is registered on the first request to keep cold starts light
+UNIVERSE_KEY = 'top_stocks_universe'
+
+
+def register_universe():
+    refresher.register(
+        UNIVERSE_KEY, compute_universe,
+        value=cache['universe'],
+        computed_at=datetime.fromisoformat(cache['timestamp']) if cache['universe'] else None,
+        on_update=on_universe_update
+    )
+
+
+def format_stocks(stocks):
+    """Display formatting for raw analysis dicts"""
+    return [SwingTradingRanker.format_for_display(stock) for stock in stocks]
+
+
+def demo_response(min_probability, num_stocks, message):
+    """Instant demo payload used until live rankings are available"""
+    filtered_demo = [stock for stock in DEMO_DATA if stock['probability_score'] >= min_probability]
+    stocks_to_return = filtered_demo[:num_stocks]
+    return jsonify({
+        'success': True,
+        'data': stocks_to_return,
+        'timestamp': datetime.now().isoformat(),
+        'from_cache': False,
+        'is_demo': True,
+        'total_available': len(filtered_demo),
+        'count': len(stocks_to_return),
+        'message': message
+    })
+
+
 @app.route('/api/top-stocks', methods=['GET'])
 def get_top_stocks():
-    """Get top stocks for swing trading with caching and demo data fallback"""
-    global cache
-    
+    """
+    Get top stocks for swing trading
+
+    Rankings are computed by the background refresher; this returns the last
+    good result immediately (flagged stale when a refresh is due) and demo data
+    until the first live result exists. Any limit/min_probability/sort is a filter
+    over the cached scored universe. refresh=true schedules a refresh now
+    and, if there is no live result yet, waits up to scan_wait seconds for it.
+    """
+    num_stocks = 10
+
     try:
         min_probability = request.args.get('min_probability', 80, type=float)
         refresh = request.args.get('refresh', 'false').lower() == 'true'
-        num_stocks = request.args.get('count', 10, type=int)
+        sort_by = request.args.get('sort', 'probability')
+        # The dashboard sends limit (as app.py reads it); count is the older name
+        num_stocks = request.args.get('limit', request.args.get('count', 10, type=int), type=int)
         
         # Validate count
         if num_stocks < 1 or num_stocks > 100:
             num_stocks = 10
         
         logger.info(f"Request: refresh={refresh}, count={num_stocks}, min_prob={min_probability}")
-        
-        # If not refresh and we have cached data, return it
-        if not refresh and cache['data'] is not None:
-            logger.info(f"✓ Returning cached data ({len(cache['data'])} stocks)")
-            # Return requested number of stocks from cache
-            stocks_to_return = cache['data'][:num_stocks]
-            return jsonify({
-                'success': True,
-                'data': stocks_to_return,
-                'timestamp': cache['timestamp'],
-                'from_cache': True,
-                'total_cached': len(cache['data']),
-                'count': len(stocks_to_return)
-            })
-        
-        # If no cache and not refreshing, return demo data instantly
-        if not refresh and cache['data'] is None:
-            logger.info("✓ Returning instant demo data")
-            # Filter demo data by min probability
-            filtered_demo = [stock for stock in DEMO_DATA if stock['probability_score'] >= min_probability]
-            stocks_to_return = filtered_demo[:num_stocks]
-            return jsonify({
-                'success': True,
-                'data': stocks_to_return,
-                'timestamp': datetime.now().isoformat(),
-                'from_cache': False,
-                'is_demo': True,
-                'total_available': len(filtered_demo),
-                'count': len(stocks_to_return),
-                'message': 'Showing demo data. Click Refresh Data to fetch live market data.'
-            })
-        
-        # Try to fetch fresh data
-        current_ranker = get_ranker()
-        if current_ranker is None:
-            logger.error("Ranker initialization failed - falling back to demo data")
-            # Fall back to demo data instead of showing error
-            filtered_demo = [stock for stock in DEMO_DATA if stock['probability_score'] >= min_probability]
-            stocks_to_return = filtered_demo[:num_stocks]
+
+        if sort_by not in SORT_KEYS:
             return jsonify({
-                'success': True,
-                'data': stocks_to_return,
-                'timestamp': datetime.now().isoformat(),
-                'from_cache': False,
-                'is_demo': True,
-                'total_available': len(filtered_demo),
-                'count': len(stocks_to_return),
-                'message': 'Demo data (live market data temporarily unavailable). Try refreshing again.'
-            })
-        
-        logger.info("Fetching fresh data from market...")
-        
-        try:
-            # Get more stocks than requested to have flexibility
-            top_stocks = current_ranker.get_top_10_stocks(
-                min_probability=min_probability,
-                stock_list=None  # Use default list
+                'success': False,
+                'error': f"sort must be one of {', '.join(SORT_KEYS)}"
+            }), 400
+
+        register_universe()
+        if refresh:
+            refresher.trigger(UNIVERSE_KEY)
+
+        snapshot = refresher.get(UNIVERSE_KEY, wait=scan_wait if refresh else None)
+
+        if snapshot['value'] is None:
+            if snapshot['error']:
+                logger.error(f"Live rankings unavailable: {snapshot['error']}")
+                return demo_response(
+                    min_probability, num_stocks,
+                    'Demo data (live market data temporarily unavailable). Try refreshing again.'
+                )
+            logger.info("✓ Returning instant demo data while live data is computed")
+            return demo_response(
+                min_probability, num_stocks,
+                'Showing demo data. Live market data is being fetched in the background.'
             )
-            
-            if not top_stocks:
-                logger.error("No stocks returned from ranker")
-                if cache['data']:
-                    logger.info("Returning cached data - ranker returned empty")
-                    stocks_to_return = cache['data'][:num_stocks]
-                    return jsonify({
-                        'success': True,
-                        'data': stocks_to_return,
-                        'timestamp': cache['timestamp'],
-                        'from_cache': True,
-                        'total_cached': len(cache['data']),
-                        'count': len(stocks_to_return)
-                    })
-                else:
-                    return jsonify({
-                        'success': False,
-                        'error': 'Failed to fetch market data. No cached data available.',
-                        'timestamp': datetime.now().isoformat()
-                    }), 500
-            
-            # Format results
-            formatted_results = [current_ranker.format_for_display(stock) for stock in top_stocks]
-            
-            # Update cache
-            cache['data'] = formatted_results
-            cache['timestamp'] = datetime.now().isoformat()
-            cache['count'] = len(formatted_results)
-            save_cache()
-            
-            logger.info(f"✓ Fetched {len(formatted_results)} stocks successfully")
-            
-            # Return requested number
-            stocks_to_return = formatted_results[:num_stocks]
-            return jsonify({
-                'success': True,
-                'data': stocks_to_return,
-                'timestamp': cache['timestamp'],
-                'from_cache': False,
-                'total_fetched': len(formatted_results),
-                'count': len(stocks_to_return)
-            })
-            
-        except Exception as ranker_error:
-            logger.error(f"Ranker fetch error: {str(ranker_error)}")
-            if cache['data']:
-                logger.info("Returning cached data due to fetch error")
-                stocks_to_return = cache['data'][:num_stocks]
-                return jsonify({
-                    'success': True,
-                    'data': stocks_to_return,
-                    'timestamp': cache['timestamp'],
-                    'from_cache': True,
-                    'total_cached': len(cache['data']),
-                    'count': len(stocks_to_return),
-                    'note': f'Using cached data from {cache["timestamp"]}'
-                })
-            else:
-                error_msg = f"Failed to fetch market data: {str(ranker_error)}"
-                logger.error(error_msg)
-                return jsonify({
-                    'success': False,
-                    'error': error_msg,
-                    'timestamp': datetime.now().isoformat()
-                }), 500
-                
+
+        logger.info(f"✓ Returning rankings from {snapshot['computed_at']} (stale={snapshot['stale']})")
+        stocks_to_return = format_stocks(select_top(snapshot['value'], num_stocks, min_probability, sort_by))
+        response = {
+            'success': True,
+            'data': stocks_to_return,
+            'timestamp': snapshot['computed_at'].isoformat(),
+            'from_cache': True,
+            'stale': snapshot['stale'],
+            'refreshing': snapshot['refreshing'],
+            'total_scored': len(snapshot['value']),
+            'count': len(stocks_to_return)
+        }
+        if snapshot['error']:
+            response['note'] = f'Last refresh failed; using data from {response["timestamp"]}'
+        return jsonify(response)
+
     except Exception as e:
         logger.error(f"Top stocks error: {str(e)}")
-        if cache['data']:
+        if cache['universe']:
             logger.info("Returning cached data due to general error")
-            stocks_to_return = cache['data'][:num_stocks]
+            stocks_to_return = format_stocks(cache['universe'][:num_stocks])
             return jsonify({
                 'success': True,
                 'data': stocks_to_return,
                 'timestamp': cache['timestamp'],
                 'from_cache': True,
+                'stale': True,
                 'count': len(stocks_to_return)
             })
         else:
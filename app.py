@@ -2,13 +2,23 @@
 Flask Backend for Swing Trading Analysis
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request, stream_with_context
 from flask_cors import CORS
 import logging
 from datetime import datetime, timedelta
-from ranker import SwingTradingRanker
+from ranker import SwingTradingRanker, TopKSelector, SORT_KEYS, select_top
+from refresher import BackgroundRefresher
+from quote_stream import QuoteStreamer
+from broadcast import RankingBroadcaster, ScanProgress, format_sse
+from market_calendar import exchange_now, cache_ttl
+from ttl_cache import shared_cache
+import metrics
+from timeframes import TIMEFRAMES
+from shared_store import host_cache_from_env
 import json
 import os
+import queue
+import threading
 
 app = Flask(__name__)
 CORS(app)
@@ -19,9 +29,126 @@ logger = logging.getLogger(__name__)
 # Initialize ranker
 ranker = SwingTradingRanker(num_workers=5)
 
-# Cache for results
-cache = {}
-cache_duration = timedelta(minutes=15)
+# Rankings are recomputed in the background; requests read the last good result
+refresher = BackgroundRefresher(
+    market_interval=timedelta(minutes=int(os.environ.get('REFRESH_MARKET_MINUTES', 15))),
+    idle_interval=timedelta(minutes=int(os.environ.get('REFRESH_IDLE_MINUTES', 720)))
+)
+
+# Longest a request waits for the very first scan
+first_scan_wait = 60
+
+# With SHARED_CACHE_URL set, gunicorn workers on a host share one scan per cadence
+host_cache = host_cache_from_env()
+
+# Scored universes pushed to /api/stream clients, per timeframe
+broadcasters = {}
+
+# Background scans in progress, followed by /api/top-stocks/stream clients, per timeframe
+scan_progress = {}
+
+# Hit/miss counters of the cache shared by fetcher, metadata and scraper, for /api/metrics
+metrics.register_cache('memory', shared_cache())
+
+# Seconds between SSE comments that keep idle connections open through proxies
+stream_keepalive = 15
+
+
+def register_universe(interval):
+    """
+    Schedule background scoring of the whole universe on a timeframe
+
+    The universe is scored once per refresh; every limit/min_probability/sort
+    combination is answered by filtering that table.
+
+    Returns:
+        str: The refresher job key
+    """
+    universe_key = f'top_stocks_universe_{interval}'
+    broadcaster = broadcasters.setdefault(interval, RankingBroadcaster(ranker.format_for_display))
+    progress = scan_progress.setdefault(interval, ScanProgress())
+
+    def score():
+        return ranker.score_universe(interval=interval, on_result=progress.add)
+
+    def compute():
+        progress.begin()
+        value = None
+        try:
+            if host_cache is None:
+                value = score()
+            else:
+                value = host_cache.get_or_compute(
+                    universe_key, score,
+                    ttl=cache_ttl(interval, live_ttl=refresher.market_interval.total_seconds())
+                )
+            return value
+        finally:
+            progress.finish(value, exchange_now())
+
+    refresher.register(
+        universe_key, compute,
+        on_update=lambda value, computed_at: broadcaster.publish_universe(value, computed_at)
+    )
+    return universe_key
+
+
+# Live prices for the watch universe, polled in batches and folded into
+# incremental indicator state (QUOTE_POLL_SECONDS=0 turns streaming off)
+quote_poll_seconds = int(os.environ.get('QUOTE_POLL_SECONDS', 15))
+
+
+def fetch_quotes_shared(tickers):
+    """Batched quotes, fetched by one worker per poll interval and shared via the host cache"""
+    if host_cache is None:
+        return ranker.fetcher.fetch_quotes(tickers)
+    return host_cache.get_or_compute(
+        ('quotes', tuple(tickers)), lambda: ranker.fetcher.fetch_quotes(tickers),
+        ttl=max(quote_poll_seconds - 1, 1)
+    )
+
+
+quote_streamer = QuoteStreamer(
+    ranker, poll_interval=timedelta(seconds=quote_poll_seconds or 15), fetch_quotes=fetch_quotes_shared
+)
+
+# Warming and polling start with the first request rather than at import, so
+# importing the app (tests, tooling, the debug reloader's watcher process)
+# spawns nothing; BACKGROUND_JOBS=0 leaves them off in this process
+background_jobs = os.environ.get('BACKGROUND_JOBS', '1') != '0'
+background_started = False
+background_lock = threading.Lock()
+
+
+def start_background_jobs():
+    """Warm the daily universe and start the quote poller, once per process"""
+    global background_started
+    if background_started or not background_jobs:
+        return
+    with background_lock:
+        if background_started:
+            return
+        background_started = True
+        register_universe('1d')
+        if quote_poll_seconds > 0:
+            quote_streamer.start()
+
+
+@app.before_request
+def ensure_background_jobs():
+    start_background_jobs()
+
+
+def push_live_scores(event):
+    """Forward live re-scores to the daily stream, with names from the metadata cache"""
+    # Names only from the cache: a metadata download must not hold up the poller
+    results = ranker.attach_stock_info([dict(result) for result in event['results']], wait=False)
+    broadcasters.setdefault('1d', RankingBroadcaster(ranker.format_for_display)).publish_updates(
+        results, event['updated_at']
+    )
+
+
+quote_streamer.subscribe(push_live_scores)
 
 
 @app.route('/')
@@ -38,47 +165,61 @@ def get_top_stocks():
     Query params:
     - limit: Number of stocks to return (default: 10)
     - min_probability: Minimum probability threshold (default: 40)
-    - refresh: Force refresh data (default: False)
+    - sort: probability, swing_score or rr_ratio (default: probability)
+    - interval: Timeframe to rank on: 1m, 5m, 15m, 1h or 1d (default: 1d)
+    - refresh: Recompute in the background now (default: False); the last
+      result is still returned immediately, flagged as stale
     """
     try:
         limit = request.args.get('limit', 10, type=int)
         min_probability = request.args.get('min_probability', 40, type=float)
         refresh = request.args.get('refresh', 'false').lower() == 'true'
+        sort_by = request.args.get('sort', 'probability')
+        interval = request.args.get('interval', '1d')
 
         # Ensure limit is reasonable
         limit = min(max(limit, 1), 50)  # Between 1 and 50
 
-        cache_key = f'top_stocks_{limit}_{min_probability}'
-
-        # Check cache
-        if not refresh and cache_key in cache:
-            cached_data, cached_time = cache[cache_key]
-            if datetime.now() - cached_time < cache_duration:
-                logger.info("Returning cached results")
-                return jsonify({
-                    'success': True,
-                    'data': cached_data,
-                    'timestamp': cached_time.isoformat(),
-                    'from_cache': True
-                })
+        if sort_by not in SORT_KEYS:
+            return jsonify({
+                'success': False,
+                'error': f"sort must be one of {', '.join(SORT_KEYS)}"
+            }), 400
+        if interval not in TIMEFRAMES:
+            return jsonify({
+                'success': False,
+                'error': f"interval must be one of {', '.join(TIMEFRAMES)}"
+            }), 400
 
-        logger.info(f"Fetching top {limit} stocks (min_probability={min_probability})...")
+        universe_key = register_universe(interval)
+        if refresh:
+            if host_cache is not None:
+                host_cache.delete(universe_key)
+            refresher.trigger(universe_key)
 
-        # Get fresh data
-        top_stocks = ranker.get_top_stocks(limit=limit, min_probability=min_probability)
+        requested_at = exchange_now()
+        snapshot = refresher.get(universe_key, wait=first_scan_wait)
 
-        # Format for display
-        formatted_results = [ranker.format_for_display(stock) for stock in top_stocks]
+        if snapshot['value'] is None:
+            return jsonify({
+                'success': False,
+                'error': snapshot['error'] or 'Rankings are still being computed, try again shortly',
+                'refreshing': snapshot['refreshing']
+            }), 503
 
-        # Cache results
-        cache[cache_key] = (formatted_results, datetime.now())
+        top_stocks = select_top(snapshot['value'], limit, min_probability, sort_by)
+        formatted_results = [ranker.format_for_display(stock) for stock in top_stocks]
 
+        logger.info(f"Returning rankings from {snapshot['computed_at']} (stale={snapshot['stale']})")
         return jsonify({
             'success': True,
             'data': formatted_results,
-            'timestamp': datetime.now().isoformat(),
-            'from_cache': False,
-            'count': len(formatted_results)
+            'timestamp': snapshot['computed_at'].isoformat(),
+            'from_cache': snapshot['computed_at'] < requested_at,
+            'stale': snapshot['stale'],
+            'refreshing': snapshot['refreshing'],
+            'count': len(formatted_results),
+            'total_scored': len(snapshot['value'])
         })
     except Exception as e:
         logger.error(f"Error fetching top stocks: {str(e)}")
@@ -88,16 +229,229 @@ def get_top_stocks():
         }), 500
 
 
+@app.route('/api/top-stocks/stream', methods=['GET'])
+def stream_top_stocks():
+    """
+    Top stocks as newline-delimited JSON, one line per finished analysis
+
+    Query params: limit, min_probability, interval and refresh as for
+    /api/top-stocks. A fresh background result is answered with a single done
+    line; otherwise the client follows the background universe scan (joining
+    the one in progress, or triggering the next) and streams:
+    - {"type": "result", "data": row, "top": rows or null, "completed", "total"}
+      per analyzed ticker, with top set when that result changed the top N
+    - {"type": "done", "data": top rows, "completed", "total", "timed_out", "timestamp"}
+    """
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    min_probability = request.args.get('min_probability', 40, type=float)
+    refresh = request.args.get('refresh', 'false').lower() == 'true'
+    interval = request.args.get('interval', '1d')
+    if interval not in TIMEFRAMES:
+        return jsonify({
+            'success': False,
+            'error': f"interval must be one of {', '.join(TIMEFRAMES)}"
+        }), 400
+
+    universe_key = register_universe(interval)
+    snapshot = refresher.get(universe_key)
+    progress = scan_progress[interval]
+
+    def line(payload):
+        return json.dumps(payload, default=str) + '\n'
+
+    def rows(results):
+        return [ranker.format_for_display(stock) for stock in results]
+
+    def lines():
+        if not refresh and snapshot['value'] is not None and not snapshot['stale']:
+            top_stocks = select_top(snapshot['value'], limit, min_probability)
+            yield line({
+                'type': 'done', 'data': rows(top_stocks), 'completed': len(snapshot['value']),
+                'total': len(snapshot['value']), 'timed_out': False,
+                'timestamp': snapshot['computed_at'].isoformat()
+            })
+            return
+
+        # Every client shares the background scan; none starts one of its own
+        generation, running = progress.state()
+        if not running:
+            generation += 1
+            if refresh and host_cache is not None:
+                host_cache.delete(universe_key)
+            refresher.trigger(universe_key)
+
+        leaderboard = TopKSelector(limit)
+        for event in progress.follow(generation):
+            if event['type'] == 'result':
+                # Names only from the cache; a lookup must not delay the result
+                result = ranker.attach_stock_info([dict(event['result'])], wait=False)[0]
+                changed = result['probability_score'] >= min_probability and leaderboard.push(result)
+                yield line({
+                    'type': 'result',
+                    'data': ranker.format_for_display(result),
+                    'top': rows(leaderboard.leaderboard()) if changed else None,
+                    'completed': event['completed'],
+                    'total': event['total'],
+                })
+                continue
+
+            value, finished_at = event['value'], event['finished_at']
+            if value is None:
+                # Failed, timed out or superseded: fall back to the last good result
+                latest = refresher.get(universe_key)
+                value, finished_at = latest['value'] or [], latest['computed_at']
+            yield line({
+                'type': 'done', 'data': rows(select_top(value, limit, min_probability)),
+                'completed': event['completed'] or len(value), 'total': event['total'] or len(value),
+                'timed_out': event['timed_out'],
+                'timestamp': (finished_at or exchange_now()).isoformat()
+            })
+
+    return Response(
+        stream_with_context(lines()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route('/api/live-stocks', methods=['GET'])
+def get_live_stocks():
+    """
+    Get top stocks re-scored on live prices
+
+    Query params:
+    - limit: Number of stocks to return (default: 10)
+    - min_probability: Minimum probability threshold (default: 40)
+    - sort: probability, swing_score or rr_ratio (default: probability)
+    """
+    try:
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+        min_probability = request.args.get('min_probability', 40, type=float)
+        sort_by = request.args.get('sort', 'probability')
+
+        if sort_by not in SORT_KEYS:
+            return jsonify({
+                'success': False,
+                'error': f"sort must be one of {', '.join(SORT_KEYS)}"
+            }), 400
+
+        snapshot = quote_streamer.snapshot()
+        if snapshot['updated_at'] is None:
+            return jsonify({
+                'success': False,
+                'error': 'Live prices are not available yet' if quote_poll_seconds > 0
+                    else 'Live price streaming is disabled'
+            }), 503
+
+        # Copies: names are attached to the response, not to the live state
+        top_stocks = [dict(stock) for stock in select_top(snapshot['results'], limit, min_probability, sort_by)]
+        formatted_results = [ranker.format_for_display(stock) for stock in ranker.attach_stock_info(top_stocks)]
+        return jsonify({
+            'success': True,
+            'data': formatted_results,
+            'timestamp': snapshot['updated_at'].isoformat(),
+            'count': len(formatted_results),
+            'total_scored': len(snapshot['results'])
+        })
+    except Exception as e:
+        logger.error(f"Error fetching live stocks: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/stream', methods=['GET'])
+def stream_rankings():
+    """
+    Push ranking updates as Server-Sent Events
+
+    Every client shares the background scan (and live re-scores on 1d); limit,
+    min_probability and sort are applied by the client.
+
+    Query params:
+    - interval: Timeframe to follow (default: 1d)
+
+    Events:
+    - snapshot: {data, timestamp, version} with the whole scored universe,
+      sent on connect and whenever the client fell too far behind
+    - diff: {entered, updated, exited, order, version, timestamp, source};
+      entered/updated are display rows to upsert, exited tickers to remove
+    """
+    interval = request.args.get('interval', '1d')
+    if interval not in TIMEFRAMES:
+        return jsonify({
+            'success': False,
+            'error': f"interval must be one of {', '.join(TIMEFRAMES)}"
+        }), 400
+
+    register_universe(interval)
+    broadcaster = broadcasters[interval]
+
+    def events():
+        # Subscribe before the snapshot so no diff falls between the two
+        subscription = broadcaster.subscribe()
+        try:
+            snapshot = broadcaster.snapshot()
+            yield format_sse('snapshot', snapshot, snapshot['version'])
+            while True:
+                try:
+                    event = subscription.get(timeout=stream_keepalive)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                if event is None:
+                    snapshot = broadcaster.snapshot()
+                    yield format_sse('snapshot', snapshot, snapshot['version'])
+                else:
+                    yield format_sse('diff', event, event['version'])
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/api/stock/<ticker>', methods=['GET'])
 def get_stock_analysis(ticker):
-    """Get detailed analysis for a specific stock"""
+    """
+    Get detailed analysis for a specific stock
+
+    Query params:
+    - interval: Timeframe to analyze (default: 1d)
+    - timeframes: Comma-separated timeframes to analyze together from one
+      intraday download, e.g. 15m,1h,1d (overrides interval)
+    """
     try:
         # Add .BO suffix if not present
         if not ticker.endswith('.BO'):
             ticker = f"{ticker}.BO"
+
+        interval = request.args.get('interval', '1d')
+        timeframes = [tf for tf in request.args.get('timeframes', '').split(',') if tf]
+        invalid = [tf for tf in timeframes + [interval] if tf not in TIMEFRAMES]
+        if invalid:
+            return jsonify({
+                'success': False,
+                'error': f"Unsupported timeframe {invalid[0]}; use one of {', '.join(TIMEFRAMES)}"
+            }), 400
+
+        if timeframes:
+            logger.info(f"Analyzing {ticker} on {', '.join(timeframes)}...")
+            results = ranker.analyze_timeframes(ticker, timeframes)
+            return jsonify({
+                'success': True,
+                'data': {
+                    tf: ranker.format_for_display(result) if result else None
+                    for tf, result in results.items()
+                }
+            })
         
         logger.info(f"Analyzing {ticker}...")
-        result = ranker.analyze_single_stock(ticker)
+        result = ranker.analyze_single_stock(ticker, interval=interval)
         
         if result:
             formatted = ranker.format_for_display(result)
@@ -171,10 +525,21 @@ def manage_watchlist():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Stage latencies, data source outcomes and cache counters in Prometheus text format"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({'status': 'ok', 'timestamp': datetime.now().isoformat()})
+    return jsonify({
+        'status': 'ok',
+        'timestamp': datetime.now().isoformat(),
+        'cache': shared_cache().stats(),
+        'stream_clients': sum(len(broadcaster) for broadcaster in broadcasters.values())
+    })
 
 
 @app.errorhandler(404)
@@ -0,0 +1,229 @@
+"""
+Async Fetch Layer
+Non-blocking backend for Yahoo chart data, NSE quotes and the price scrapers,
+with bounded per-host concurrency over one pooled keep-alive connector
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from data_fetcher import parse_yahoo_chart
+from ohlcv_store import PERIOD_DAYS, exchange_epoch, exchange_now
+
+# aiohttp is only needed for the async backend; the sync fetchers work without it
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Base URL of each upstream API (overridable, e.g. to point at a local stub server)
+API_URLS = {
+    'yahoo': 'https://query1.finance.yahoo.com',
+    'nse': 'https://www.nseindia.com',
+}
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://www.nseindia.com/',
+}
+
+
+class AsyncFetcher:
+    """
+    Async HTTP client shared by all upstream calls of a scan
+
+    Use as an async context manager:
+
+        async with AsyncFetcher(per_host_limit=10) as client:
+            frames = await client.fetch_charts(tickers)
+    """
+
+    def __init__(self, per_host_limit=8, host_limits=None, max_connections=64,
+                 timeout=10, base_urls=None, scraper=None):
+        """
+        Args:
+            per_host_limit (int): Default number of in-flight requests per host
+            host_limits (dict): Per-host overrides, e.g. {'www.nseindia.com': 2}
+            max_connections (int): Size of the shared connection pool
+            timeout (float): Total timeout per request in seconds
+            base_urls (dict): Overrides for API_URLS
+            scraper (WebScraper): Scraper whose sources/parsers scrape_price uses (optional)
+        """
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for the async fetch backend (pip install aiohttp)")
+        self.per_host_limit = per_host_limit
+        self.host_limits = host_limits or {}
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.base_urls = dict(API_URLS, **(base_urls or {}))
+        self.scraper = scraper
+        self.session = None
+        self.semaphores = {}
+        self._nse_lock = None
+        self._nse_warmed = False
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            keepalive_timeout=30,
+            ssl=False
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers=DEFAULT_HEADERS,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        self._nse_lock = asyncio.Lock()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+        self.session = None
+
+    def _semaphore(self, url):
+        host = urlsplit(url).netloc
+        if host not in self.semaphores:
+            self.semaphores[host] = asyncio.Semaphore(self.host_limits.get(host, self.per_host_limit))
+        return self.semaphores[host]
+
+    async def get(self, url, params=None, as_json=False):
+        """
+        GET a URL under its host's concurrency limit
+
+        Returns:
+            tuple: (status, body) where body is decoded JSON or raw bytes
+        """
+        async with self._semaphore(url):
+            async with self.session.get(url, params=params) as response:
+                if as_json and response.status == 200:
+                    return response.status, await response.json(content_type=None)
+                return response.status, await response.read()
+
+    async def fetch_chart(self, ticker, period="3mo", start=None, interval="1d"):
+        """
+        Fetch OHLCV bars from the Yahoo chart endpoint
+
+        Args:
+            start (datetime): Fetch bars from this naive exchange-local (IST) time
+                on (optional; default: period back from now)
+
+        Returns:
+            pd.DataFrame: OHLCV data, or None on failure
+        """
+        try:
+            if start is None:
+                start = exchange_now() - timedelta(days=PERIOD_DAYS.get(period, 90))
+            params = {
+                "period1": exchange_epoch(start),
+                "period2": int(datetime.now().timestamp()),
+                "interval": interval,
+                "events": "history"
+            }
+            url = f"{self.base_urls['yahoo']}/v8/finance/chart/{ticker}"
+            status, data = await self.get(url, params=params, as_json=True)
+            if status == 200:
+                return parse_yahoo_chart(data)
+            logger.warning(f"Yahoo chart returned status {status} for {ticker}")
+        except Exception as e:
+            logger.error(f"Async Yahoo chart fetch failed for {ticker}: {str(e)}")
+        return None
+
+    async def fetch_charts(self, tickers, period="3mo", starts=None, interval="1d"):
+        """
+        Fetch many tickers concurrently
+
+        Args:
+            tickers (list): Stock tickers
+            period (str): Period for tickers without a start
+            starts (dict): ticker -> start datetime for tail fetches (optional)
+            interval (str): Bar interval
+
+        Returns:
+            dict: ticker -> DataFrame for the tickers that returned rows
+        """
+        starts = starts or {}
+        frames = await asyncio.gather(*[
+            self.fetch_chart(ticker, period=period, start=starts.get(ticker), interval=interval)
+            for ticker in tickers
+        ])
+        return {
+            ticker: frame for ticker, frame in zip(tickers, frames)
+            if frame is not None and len(frame) > 0
+        }
+
+    async def fetch_nse_quote(self, symbol):
+        """
+        Fetch an NSE equity quote
+
+        Returns:
+            dict: The quote's priceInfo block, or None on failure
+        """
+        try:
+            base = self.base_urls['nse']
+            async with self._nse_lock:
+                if not self._nse_warmed:
+                    # NSE only serves the API to sessions holding its homepage cookies
+                    self._nse_warmed = True
+                    try:
+                        await self.get(base)
+                    except Exception as e:
+                        logger.warning(f"Could not establish NSE session: {str(e)}")
+
+            status, data = await self.get(f"{base}/api/quote-equity", params={'symbol': symbol}, as_json=True)
+            if status == 200:
+                return data.get('priceInfo')
+            logger.warning(f"NSE API returned status {status}")
+        except Exception as e:
+            logger.error(f"Async NSE quote failed for {symbol}: {str(e)}")
+        return None
+
+    async def scrape_price(self, symbol):
+        """
+        Query every scraper source concurrently
+
+        Returns:
+            dict: Result of the highest-priority source that produced a price, or None
+        """
+        if self.scraper is None:
+            from web_scraper import WebScraper
+            self.scraper = WebScraper()
+
+        async def attempt(url, params, parser):
+            try:
+                status, content = await self.get(url, params=params)
+                if status == 200:
+                    return parser(content, symbol)
+            except Exception as e:
+                logger.debug(f"Scraper error: {str(e)[:50]}")
+            return None
+
+        results = await asyncio.gather(*[
+            attempt(url, params, parser) for url, params, parser in self.scraper.price_sources(symbol)
+        ])
+        for result in results:
+            if result:
+                return result
+
+        logger.warning(f"All scrapers failed for {symbol}")
+        return None
+
+
+def fetch_charts(tickers, period="3mo", starts=None, interval="1d", **client_options):
+    """
+    Blocking helper: fetch many charts on a private event loop
+
+    Returns:
+        dict: ticker -> DataFrame
+    """
+    async def run():
+        async with AsyncFetcher(**client_options) as client:
+            return await client.fetch_charts(tickers, period=period, starts=starts, interval=interval)
+
+    return asyncio.run(run())
@@ -0,0 +1,262 @@
+"""
+Walk-forward Backtester
+Replays stored daily history through the swing score signal and the ATR trade
+levels of SwingTradingAnalyzer, resolving every trade's stop-vs-target outcome
+with vectorized first-touch detection
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ohlcv_store import OHLCVStore
+from swing_analyzer import SwingTradingAnalyzer, build_panel
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Outcome labels of a trade
+TARGET, STOP, TIMEOUT, OPEN = 'target', 'stop', 'timeout', 'open'
+
+
+def load_history(tickers, store=None, start=None, fetcher=None, period="5y"):
+    """
+    Daily history for a universe, read from the OHLCV store
+
+    Args:
+        tickers (list): Tickers to load
+        store (OHLCVStore): History store (default: OHLCVStore())
+        start (datetime): Only load bars from this date on (optional)
+        fetcher (BSEDataFetcher): Used for tickers missing from the store, which
+            it then persists; without one they are skipped
+        period (str): History to fetch for missing tickers
+
+    Returns:
+        dict: ticker -> OHLCV DataFrame
+    """
+    store = store if store is not None else OHLCVStore()
+    history = {}
+    missing = []
+    for ticker in tickers:
+        df = store.load(ticker, "1d", start=start)
+        if df is None:
+            missing.append(ticker)
+        else:
+            history[ticker] = df
+
+    if missing and fetcher is not None:
+        for ticker in missing:
+            df = fetcher.fetch_historical_data(ticker, period=period)
+            if df is not None and len(df) > 0:
+                history[ticker] = df[df.index >= pd.Timestamp(start)] if start is not None else df
+    elif missing:
+        logger.warning(f"No stored history for {len(missing)} tickers, skipping them")
+    return history
+
+
+def first_touch(codes, open_, high, low, close, stop, target, horizon):
+    """
+    Resolve stop-vs-target outcomes for a trade entered at the close of each bar
+
+    The bars of many tickers can be concatenated; codes keeps windows from
+    crossing into the next ticker. A bar that touches both levels counts as a
+    stop, and a gap through a level exits at that bar's open.
+
+    Args:
+        codes (np.ndarray): Ticker code per bar (bars of a ticker contiguous, in time order)
+        open_, high, low, close (np.ndarray): Bar prices
+        stop, target (np.ndarray): Levels per entry bar (NaN: no trade)
+        horizon (int): Bars a trade is held at most
+
+    Returns:
+        dict: 'outcome' (TARGET/STOP/TIMEOUT/OPEN per entry bar), 'exit_index'
+            (bar of the exit, -1 if open) and 'exit_price' (NaN if open)
+    """
+    n = len(close)
+    index = np.arange(n)
+
+    def forward(values, fill):
+        # Row i holds values[i + 1 : i + 1 + horizon]
+        padded = np.concatenate([values[1:], np.full(horizon, fill, dtype=values.dtype)])
+        return sliding_window_view(padded, horizon)
+
+    same_ticker = forward(codes, -1) == codes[:, None]
+    hit_target = (forward(high, np.nan) >= target[:, None]) & same_ticker
+    hit_stop = (forward(low, np.nan) <= stop[:, None]) & same_ticker
+
+    any_target = hit_target.any(axis=1)
+    any_stop = hit_stop.any(axis=1)
+    first_target = np.where(any_target, hit_target.argmax(axis=1), horizon)
+    first_stop = np.where(any_stop, hit_stop.argmax(axis=1), horizon)
+
+    stopped = any_stop & (first_stop <= first_target)
+    targeted = any_target & ~stopped
+    last = np.minimum(index + horizon, n - 1)
+    complete = (index + horizon < n) & (codes[last] == codes)
+    timed_out = ~stopped & ~targeted & complete
+
+    exit_index = np.full(n, -1)
+    exit_index[stopped] = index[stopped] + 1 + first_stop[stopped]
+    exit_index[targeted] = index[targeted] + 1 + first_target[targeted]
+    exit_index[timed_out] = index[timed_out] + horizon
+
+    exit_price = np.full(n, np.nan)
+    exit_price[stopped] = np.minimum(open_[exit_index[stopped]], stop[stopped])
+    exit_price[targeted] = np.maximum(open_[exit_index[targeted]], target[targeted])
+    exit_price[timed_out] = close[exit_index[timed_out]]
+
+    outcome = np.select([stopped, targeted, timed_out], [STOP, TARGET, TIMEOUT], default=OPEN)
+    return {'outcome': outcome, 'exit_index': exit_index, 'exit_price': exit_price}
+
+
+def _one_position_per_ticker(codes, entries, exits):
+    """Mask of entries taken when a ticker may only hold one trade at a time"""
+    keep = np.zeros(len(entries), dtype=bool)
+    current_code, busy_until = None, -1
+    for i, (code, entry, exit_) in enumerate(zip(codes, entries, exits)):
+        if code != current_code:
+            current_code, busy_until = code, -1
+        if entry >= busy_until:
+            keep[i] = True
+            busy_until = exit_ if exit_ >= 0 else np.iinfo(np.int64).max
+    return keep
+
+
+class Backtester:
+    """
+    Walk-forward replay of the swing setup over stored history
+
+    A trade is entered at the close of every bar whose swing score reaches
+    min_score (indicators only use bars up to that close), with the stop and
+    target calculate_trade_levels would set, and held until the first touch of
+    either level or horizon bars.
+    """
+
+    def __init__(self, analyzer=None, min_score=60, horizon=20, atr_multiplier=1.5,
+                 one_position_per_ticker=True):
+        """
+        Args:
+            analyzer (SwingTradingAnalyzer): Signal and level logic (default: a new one)
+            min_score (float): Swing score that triggers an entry
+            horizon (int): Bars a trade is held at most before exiting at the close
+            atr_multiplier (float): ATR multiple of the stop, as in calculate_trade_levels
+            one_position_per_ticker (bool): Skip signals while the ticker's previous
+                trade is still open
+        """
+        self.analyzer = analyzer or SwingTradingAnalyzer()
+        self.min_score = min_score
+        self.horizon = horizon
+        self.atr_multiplier = atr_multiplier
+        self.one_position_per_ticker = one_position_per_ticker
+
+    def run(self, history):
+        """
+        Backtest a universe
+
+        Args:
+            history (dict): ticker -> daily OHLCV DataFrame, e.g. from load_history
+
+        Returns:
+            pd.DataFrame: One row per trade with ticker, entry_date, exit_date,
+                entry_price, stop_loss, target_price, exit_price, outcome,
+                bars_held, return_pct, r_multiple and swing_score
+        """
+        history = {ticker: df for ticker, df in history.items() if df is not None and len(df) > 0}
+        if not history:
+            return pd.DataFrame()
+
+        # One panel pass for the indicators, then one long frame for everything else
+        indicators = self.analyzer.calculate_panel_indicators(build_panel(history))
+        bars = pd.concat(indicators, names=['ticker', 'date'])
+        previous = bars.groupby(level='ticker').shift()
+        scores = self.analyzer.calculate_swing_scores(bars, previous).to_numpy()
+        levels = self.analyzer.calculate_atr_levels(bars, self.atr_multiplier)
+
+        codes = bars.index.codes[0].astype(np.int64)
+        stop = levels['stop_loss'].to_numpy(dtype=float)
+        target = levels['target_price'].to_numpy(dtype=float)
+        signal = (scores >= self.min_score) & np.isfinite(stop) & (levels['rr_ratio'].to_numpy() > 0)
+        stop = np.where(signal, stop, np.nan)
+        target = np.where(signal, target, np.nan)
+
+        touches = first_touch(
+            codes,
+            bars['Open'].to_numpy(dtype=float), bars['High'].to_numpy(dtype=float),
+            bars['Low'].to_numpy(dtype=float), bars['Close'].to_numpy(dtype=float),
+            stop, target, self.horizon
+        )
+
+        entries = np.flatnonzero(signal)
+        if self.one_position_per_ticker:
+            entries = entries[_one_position_per_ticker(codes[entries], entries, touches['exit_index'][entries])]
+
+        exits = touches['exit_index'][entries]
+        resolved = exits >= 0
+        tickers = bars.index.get_level_values('ticker')
+        dates = bars.index.get_level_values('date')
+        entry_price = bars['Close'].to_numpy(dtype=float)[entries]
+        exit_price = touches['exit_price'][entries]
+
+        trades = pd.DataFrame({
+            'ticker': tickers[entries],
+            'entry_date': dates[entries],
+            'exit_date': dates[np.where(resolved, exits, 0)].where(resolved),
+            'entry_price': entry_price,
+            'stop_loss': stop[entries],
+            'target_price': target[entries],
+            'exit_price': exit_price,
+            'outcome': touches['outcome'][entries],
+            'bars_held': np.where(resolved, exits - entries, -1),
+            'return_pct': (exit_price - entry_price) / entry_price * 100,
+            'r_multiple': (exit_price - entry_price) / (entry_price - stop[entries]),
+            'swing_score': scores[entries],
+        })
+        logger.info(f"✓ Backtested {len(history)} stocks, {len(bars)} bars: {len(trades)} trades")
+        return trades
+
+    @staticmethod
+    def summarize(trades):
+        """
+        Aggregate statistics of closed trades
+
+        Args:
+            trades (pd.DataFrame): Output of run()
+
+        Returns:
+            dict: trades, open_trades, per-outcome counts, win_rate (% of closed
+                trades that hit the target), avg_return_pct, expectancy_r (mean
+                R multiple), profit_factor and avg_bars_held
+        """
+        if len(trades) == 0:
+            return {'trades': 0, 'open_trades': 0}
+        closed = trades[trades['outcome'] != OPEN]
+        gains = closed.loc[closed['return_pct'] > 0, 'return_pct'].sum()
+        losses = -closed.loc[closed['return_pct'] < 0, 'return_pct'].sum()
+        return {
+            'trades': len(closed),
+            'open_trades': int((trades['outcome'] == OPEN).sum()),
+            'targets': int((closed['outcome'] == TARGET).sum()),
+            'stops': int((closed['outcome'] == STOP).sum()),
+            'timeouts': int((closed['outcome'] == TIMEOUT).sum()),
+            'win_rate': float((closed['outcome'] == TARGET).mean() * 100) if len(closed) else 0.0,
+            'avg_return_pct': float(closed['return_pct'].mean()) if len(closed) else 0.0,
+            'expectancy_r': float(closed['r_multiple'].mean()) if len(closed) else 0.0,
+            'profit_factor': float(gains / losses) if losses > 0 else float('inf'),
+            'avg_bars_held': float(closed['bars_held'].mean()) if len(closed) else 0.0,
+        }
+
+
+if __name__ == "__main__":
+    from data_fetcher import BSE_TOP_STOCKS
+
+    history = load_history(list(dict.fromkeys(BSE_TOP_STOCKS)))
+    backtester = Backtester()
+    trades = backtester.run(history)
+
+    print("\n" + "="*60)
+    print(f"BACKTEST: swing score >= {backtester.min_score}, {backtester.horizon}-bar horizon")
+    print("="*60)
+    for key, value in Backtester.summarize(trades).items():
+        print(f"{key:>16}: {value:.2f}" if isinstance(value, float) else f"{key:>16}: {value}")
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite
+Times the analysis hot paths on deterministic synthetic universes, offline,
+and compares the results with a stored baseline
+
+Usage:
+    python benchmark.py                                  # 10 and 100 stocks, 3mo and 1y
+    python benchmark.py --tickers 1000 5000 --periods 5y 10y --stages indicators,panel
+    python benchmark.py --save-baseline                  # record benchmark_baseline.json
+    python benchmark.py --fail-on-regression             # exit 1 if a stage got slower
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from ohlcv_store import PERIOD_DAYS
+from swing_analyzer import SwingTradingAnalyzer, build_panel
+from probability_scorer import ProbabilityScorer
+from metadata_cache import StockMetadataCache
+from ranker import SwingTradingRanker
+from backtest import Backtester
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+
+# Slowdown over the baseline reported as a regression
+DEFAULT_TOLERANCE = 0.10
+
+
+def synthetic_universe(tickers, period="3mo", seed=0, end="2024-06-28"):
+    """
+    Deterministic random-walk OHLCV history for a universe
+
+    Args:
+        tickers (int): Number of stocks
+        period (str): History length, a key of PERIOD_DAYS (trading days are
+            about 5/7 of the calendar days)
+        seed (int): Seed of the generator
+        end (str): Date of the last bar
+
+    Returns:
+        dict: ticker -> OHLCV DataFrame
+    """
+    days = max(int(PERIOD_DAYS[period] * 5 / 7), 2)
+    dates = pd.bdate_range(end=end, periods=days)
+    rng = np.random.default_rng(seed)
+
+    # Whole panel at once: days x tickers
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (days, tickers)), axis=0))
+    high = close * (1 + np.abs(rng.normal(0, 0.01, (days, tickers))))
+    low = close * (1 - np.abs(rng.normal(0, 0.01, (days, tickers))))
+    open_ = np.vstack([close[:1], close[:-1]])
+    volume = rng.integers(100000, 5000000, (days, tickers)).astype(float)
+
+    return {
+        f"SYN{i:04d}.BO": pd.DataFrame({
+            'Open': open_[:, i], 'High': high[:, i], 'Low': low[:, i], 'Close': close[:, i],
+            'Volume': volume[:, i], 'Adj Close': close[:, i]
+        }, index=dates)
+        for i in range(tickers)
+    }
+
+
+class SyntheticFetcher:
+    """Serves a synthetic universe through the BSEDataFetcher methods a scan uses"""
+
+    def __init__(self, universe):
+        self.universe = universe
+
+    def fetch_multiple_stocks(self, tickers, period="3mo", interval="1d", chunk_size=50, use_async=False):
+        return {ticker: self.universe[ticker] for ticker in tickers if ticker in self.universe}
+
+    def fetch_historical_data(self, ticker, period="3mo", interval="1d"):
+        return self.universe.get(ticker)
+
+    def get_stock_info(self, ticker):
+        return {'name': ticker, 'sector': 'Synthetic', 'pe_ratio': 'N/A'}
+
+
+def offline_ranker(universe, workers=5):
+    """SwingTradingRanker wired to a synthetic universe, with throwaway metadata"""
+    ranker = SwingTradingRanker(num_workers=workers)
+    ranker.fetcher = SyntheticFetcher(universe)
+    ranker.metadata = StockMetadataCache(
+        ranker.fetcher, path=os.path.join(tempfile.mkdtemp(), 'metadata.json')
+    )
+    return ranker
+
+
+def build_stages(universe):
+    """
+    Benchmark stages for a universe
+
+    Each stage is (prepare, run): prepare() builds inputs outside the timed
+    region and returns them; run(inputs) is the timed call.
+
+    Returns:
+        dict: stage name -> (prepare, run)
+    """
+    analyzer = SwingTradingAnalyzer()
+    scorer = ProbabilityScorer(model='z_score')
+    frames = list(universe.values())
+
+    def with_indicators():
+        return [analyzer.calculate_technical_indicators(df) for df in frames]
+
+    def long_frame():
+        bars = pd.concat(analyzer.calculate_panel_indicators(build_panel(universe)), names=['ticker', 'date'])
+        return bars, bars.groupby(level='ticker').shift()
+
+    def with_levels():
+        rows = []
+        for df in with_indicators():
+            levels = analyzer.calculate_trade_levels(df)
+            score = analyzer.calculate_swing_score(df, 'X')['score']
+            rows.append((df, levels, score))
+        return rows
+
+    def overall_probability(rows):
+        for df, levels, score in rows:
+            scorer.calculate_overall_probability(
+                df, levels['entry_price'], levels['target_price'], levels['stop_loss'],
+                score, levels['rr_ratio']
+            )
+
+    def first_passage(rows):
+        simulated = ProbabilityScorer(model='bootstrap')
+        simulated.first_passage_batch(
+            [df['Close'].to_numpy() for df, _, _ in rows],
+            [levels['entry_price'] for _, levels, _ in rows],
+            [levels['target_price'] for _, levels, _ in rows],
+            [levels['stop_loss'] for _, levels, _ in rows],
+        )
+
+    return {
+        'indicators': (lambda: frames, lambda dfs: [analyzer.calculate_technical_indicators(df) for df in dfs]),
+        'panel_indicators': (lambda: universe, lambda data: analyzer.calculate_panel_indicators(build_panel(data))),
+        'swing_score': (with_indicators, lambda dfs: [analyzer.calculate_swing_score(df, 'X') for df in dfs]),
+        'swing_scores_vectorized': (long_frame, lambda frames: analyzer.calculate_swing_scores(*frames)),
+        'similar_patterns': (
+            with_indicators, lambda dfs: [scorer._find_similar_patterns(df, df['Close'].iloc[-1]) for df in dfs]
+        ),
+        'overall_probability': (with_levels, overall_probability),
+        'first_passage': (with_levels, first_passage),
+        'scan': (
+            lambda: offline_ranker(universe),
+            lambda ranker: ranker.get_top_stocks(limit=10, stock_list=list(universe), min_probability=0)
+        ),
+        'backtest': (lambda: universe, lambda data: Backtester().run(data)),
+    }
+
+
+def measure(prepare, run, repeat=3):
+    """
+    Time a stage and measure its peak traced memory
+
+    Returns:
+        dict: seconds (best of repeat runs) and peak_mb (from one extra run under
+            tracemalloc, which is slower and therefore not timed)
+    """
+    inputs = prepare()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run(inputs)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        run(inputs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': min(timings), 'peak_mb': peak / 2 ** 20}
+
+
+def run_benchmarks(tickers=(10, 100), periods=("3mo", "1y"), stages=None, repeat=3, seed=0):
+    """
+    Run every stage on every universe size
+
+    Args:
+        tickers (iterable): Universe sizes
+        periods (iterable): History lengths
+        stages (iterable): Stage names to run (default: all)
+        repeat (int): Timed runs per stage (best is kept)
+        seed (int): Seed of the synthetic universes
+
+    Returns:
+        dict: 'environment' and 'results', where results maps
+            "<tickers>x<period>" -> stage -> {seconds, rows_per_sec, stocks_per_sec, peak_mb}
+    """
+    results = {}
+    for count in tickers:
+        for period in periods:
+            universe = synthetic_universe(count, period, seed=seed)
+            rows = sum(len(df) for df in universe.values())
+            available = build_stages(universe)
+            selected = list(stages) if stages else list(available)
+            unknown = [stage for stage in selected if stage not in available]
+            if unknown:
+                raise ValueError(f"Unknown stages: {', '.join(unknown)}; choose from {', '.join(available)}")
+
+            key = f"{count}x{period}"
+            results[key] = {}
+            for stage in selected:
+                prepare, run = available[stage]
+                measured = measure(prepare, run, repeat=repeat)
+                measured['rows_per_sec'] = rows / measured['seconds'] if measured['seconds'] else float('inf')
+                measured['stocks_per_sec'] = count / measured['seconds'] if measured['seconds'] else float('inf')
+                results[key][stage] = measured
+                print(f"  {key:>12} {stage:<24} {measured['seconds'] * 1000:10.1f} ms "
+                      f"{measured['rows_per_sec']:14,.0f} rows/s {measured['peak_mb']:9.1f} MB peak")
+
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'cpus': os.cpu_count(),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare a run with a baseline
+
+    Args:
+        current (dict): run_benchmarks output
+        baseline (dict): Earlier run_benchmarks output
+        tolerance (float): Relative slowdown tolerated before a stage counts as a regression
+
+    Returns:
+        list: One dict per stage present in both runs with size, stage,
+            baseline_seconds, seconds, speedup (baseline / current) and regression
+    """
+    rows = []
+    for size, stages in current['results'].items():
+        for stage, measured in stages.items():
+            before = baseline.get('results', {}).get(size, {}).get(stage)
+            if not before:
+                continue
+            speedup = before['seconds'] / measured['seconds'] if measured['seconds'] else float('inf')
+            rows.append({
+                'size': size,
+                'stage': stage,
+                'baseline_seconds': before['seconds'],
+                'seconds': measured['seconds'],
+                'speedup': speedup,
+                'regression': measured['seconds'] > before['seconds'] * (1 + tolerance),
+            })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, nargs='+', default=[10, 100], help='Universe sizes')
+    parser.add_argument('--periods', nargs='+', default=['3mo', '1y'], choices=list(PERIOD_DAYS),
+                        help='History lengths')
+    parser.add_argument('--stages', help='Comma-separated stages (default: all)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per stage')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='Write this run as the baseline')
+    parser.add_argument('--output', help='Also write this run as JSON to this path')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Relative slowdown counted as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 on a regression')
+    args = parser.parse_args(argv)
+
+    print("\n" + "="*90)
+    print("SWING ANALYSIS BENCHMARKS")
+    print("="*90)
+    # Per-stock INFO logs would dominate the timings
+    logging.disable(logging.INFO)
+    try:
+        run = run_benchmarks(
+            args.tickers, args.periods, args.stages.split(',') if args.stages else None, args.repeat, args.seed
+        )
+    finally:
+        logging.disable(logging.NOTSET)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(run, f, indent=2)
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print("\n" + "-"*90)
+        print(f"Compared with {args.baseline}")
+        print("-"*90)
+        for row in compare(run, baseline, args.tolerance):
+            flag = 'REGRESSION' if row['regression'] else ''
+            print(f"  {row['size']:>12} {row['stage']:<24} {row['baseline_seconds'] * 1000:10.1f} ms -> "
+                  f"{row['seconds'] * 1000:10.1f} ms  {row['speedup']:6.2f}x {flag}")
+            if row['regression']:
+                regressions.append(row)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"\n✓ Baseline saved to {args.baseline}")
+
+    if regressions:
+        print(f"\n✗ {len(regressions)} stage(s) slower than the baseline by more than {args.tolerance:.0%}")
+        return 1 if args.fail_on_regression else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""
+Ranking Broadcast
+Fans scored-universe updates out to connected dashboards as diffs, so any
+number of clients share one background computation
+"""
+
+import json
+import queue
+import logging
+import threading
+
+from ranker import SORT_KEYS, diff_rankings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value):
+    """Datetimes as ISO 8601 (like the JSON endpoints), anything else as str"""
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def format_sse(event, payload, event_id=None):
+    """
+    Encode one Server-Sent Event
+
+    Args:
+        event (str): Event name
+        payload: JSON-serializable data
+        event_id: Value for the id field (optional)
+
+    Returns:
+        str: The event, terminated by a blank line
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(payload, default=_json_default)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+class RankingBroadcaster:
+    """
+    Latest scored universe plus a bounded queue of diffs per subscriber
+
+    Publishers hand in raw analysis dicts; subscribers receive the formatted rows
+    that changed at display precision. A subscriber that falls max_pending
+    events behind gets a resync marker (None) instead, and should re-read
+    snapshot().
+    """
+
+    def __init__(self, format_result, max_pending=100):
+        """
+        Args:
+            format_result (callable): Turns an analysis dict into its display row,
+                e.g. SwingTradingRanker.format_for_display
+            max_pending (int): Events queued per subscriber before it is resynced
+        """
+        self.format_result = format_result
+        self.max_pending = max_pending
+        self.raw = {}
+        self.rows = []
+        self.updated_at = None
+        self.version = 0
+        self.subscribers = set()
+        self.lock = threading.Lock()
+
+    def publish_universe(self, results, updated_at, source='scan'):
+        """
+        Replace the whole universe, e.g. after a background scan
+
+        Args:
+            results (list): Analysis dicts
+            updated_at (datetime): When they were computed
+            source (str): Label passed on to subscribers
+
+        Returns:
+            dict: The broadcast diff, or None if nothing visible changed
+        """
+        with self.lock:
+            return self._publish({result['ticker']: result for result in results}, updated_at, source)
+
+    def publish_updates(self, results, updated_at, source='live'):
+        """
+        Merge re-scored tickers into the universe, e.g. after live quotes
+
+        Args:
+            results (list): Analysis dicts for the tickers that changed
+            updated_at (datetime): When they were computed
+            source (str): Label passed on to subscribers
+
+        Returns:
+            dict: The broadcast diff, or None if nothing visible changed
+        """
+        with self.lock:
+            raw = dict(self.raw)
+            raw.update((result['ticker'], result) for result in results)
+            return self._publish(raw, updated_at, source)
+
+    def _publish(self, raw, updated_at, source):
+        """Diff against the current universe and queue the changes (lock held)"""
+        ordered = sorted(raw.values(), key=SORT_KEYS['probability'], reverse=True)
+        rows = [self.format_result(result) for result in ordered]
+        changes = diff_rankings(self.rows, rows)
+        self.raw = raw
+        self.rows = rows
+        self.updated_at = updated_at
+        if not (changes['entered'] or changes['updated'] or changes['exited']):
+            return None
+
+        self.version += 1
+        event = dict(changes, version=self.version, timestamp=updated_at, source=source)
+        for subscription in self.subscribers:
+            try:
+                subscription.put_nowait(event)
+            except queue.Full:
+                # Too far behind for diffs to be useful: drop them and resync
+                while not subscription.empty():
+                    try:
+                        subscription.get_nowait()
+                    except queue.Empty:
+                        break
+                subscription.put_nowait(None)
+        return event
+
+    def snapshot(self):
+        """
+        The whole universe as display rows
+
+        Returns:
+            dict: 'data' (rows, best probability first), 'timestamp' and 'version'
+        """
+        with self.lock:
+            return {'data': list(self.rows), 'timestamp': self.updated_at, 'version': self.version}
+
+    def subscribe(self):
+        """
+        Start receiving diffs
+
+        Returns:
+            queue.Queue: Yields diff dicts, or None when a resync is needed
+        """
+        subscription = queue.Queue(maxsize=self.max_pending)
+        with self.lock:
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Stop receiving diffs"""
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+    def __len__(self):
+        return len(self.subscribers)
+
+
+class ScanProgress:
+    """
+    Results of the background universe scan as they finish
+
+    The scan reports each analysis with add() between begin() and finish();
+    any number of streaming clients follow() it, so a client that connects
+    mid-scan replays what is done so far and then waits for the rest instead of
+    starting a scan of its own.
+    """
+
+    def __init__(self):
+        self.generation = 0
+        self.running = False
+        self.results = []
+        self.completed = 0
+        self.total = 0
+        self.value = None
+        self.finished_at = None
+        self.condition = threading.Condition()
+
+    def begin(self):
+        """Start a new scan, dropping the previous one's results"""
+        with self.condition:
+            self.generation += 1
+            self.running = True
+            self.results = []
+            self.completed = 0
+            self.total = 0
+            self.value = None
+            self.condition.notify_all()
+
+    def add(self, result, completed, total):
+        """
+        Report one finished analysis
+
+        Args:
+            result (dict): Analysis dict, or None if the ticker could not be scored
+            completed (int): Analyses finished so far
+            total (int): Analyses in the scan
+        """
+        with self.condition:
+            if result is not None:
+                self.results.append(result)
+            self.completed = completed
+            self.total = total
+            self.condition.notify_all()
+
+    def finish(self, value, finished_at):
+        """
+        End the scan
+
+        Args:
+            value (list): The scan's result (None if it failed)
+            finished_at (datetime): When it finished
+        """
+        with self.condition:
+            self.running = False
+            self.value = value
+            self.finished_at = finished_at
+            self.condition.notify_all()
+
+    def state(self):
+        """
+        Returns:
+            tuple: (generation, running) of the latest scan
+        """
+        with self.condition:
+            return self.generation, self.running
+
+    def follow(self, generation, timeout=30):
+        """
+        Stream a scan from its first result
+
+        Args:
+            generation (int): Scan to follow; waits for it to begin if it has not
+                yet (a later one is followed if it was missed)
+            timeout (float): Seconds without progress after which to give up
+
+        Yields:
+            dict: {'type': 'result', 'result', 'completed', 'total'} per analysis,
+                then {'type': 'done', 'value', 'completed', 'total', 'timed_out',
+                'finished_at'}; value is None if the scan failed or timed out
+        """
+        position = 0
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.generation >= generation, timeout=timeout):
+                yield {'type': 'done', 'value': None, 'completed': 0, 'total': 0,
+                       'timed_out': True, 'finished_at': None}
+                return
+            generation = self.generation
+
+        while True:
+            with self.condition:
+                progressed = self.condition.wait_for(
+                    lambda: self.generation != generation or len(self.results) > position
+                    or not self.running,
+                    timeout=timeout
+                )
+                superseded = self.generation != generation
+                new = [] if superseded else self.results[position:]
+                completed, total = self.completed, self.total
+                finished = not superseded and not self.running
+                value, finished_at = self.value, self.finished_at
+
+            for result in new:
+                position += 1
+                yield {'type': 'result', 'result': result, 'completed': completed, 'total': total}
+
+            if finished or superseded or not progressed:
+                yield {
+                    'type': 'done', 'value': value if finished else None, 'completed': completed,
+                    'total': total, 'timed_out': not progressed, 'finished_at': finished_at,
+                }
+                return
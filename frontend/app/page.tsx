@@ -1,10 +1,20 @@
 'use client';
 
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useMemo } from 'react';
 import { fetchTopStocks, StockData } from '@/lib/api';
 import StockCard from '@/components/StockCard';
 import LoadingSkeleton from '@/components/LoadingSkeleton';
 
+const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:5000';
+
+interface RankingDiff {
+  version: number;
+  timestamp: string;
+  entered: StockData[];
+  updated: StockData[];
+  exited: string[];
+}
+
 export default function Home() {
   const [stocks, setStocks] = useState<StockData[]>([]);
   const [loading, setLoading] = useState(true);
@@ -13,6 +23,9 @@ export default function Home() {
   const [minProbability, setMinProbability] = useState(40);
   const [lastUpdated, setLastUpdated] = useState<string>('');
   const [fromCache, setFromCache] = useState(false);
+  // Scored universe pushed by /api/stream; null until the first scan arrives
+  const [universe, setUniverse] = useState<Record<string, StockData> | null>(null);
+  const [streaming, setStreaming] = useState(true);
 
   const loadStocks = async (refresh: boolean = false) => {
     setLoading(true);
@@ -38,9 +51,82 @@ export default function Home() {
     setLoading(false);
   };
 
+  // Follow ranking updates pushed by the server; filters are applied locally
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') {
+      setStreaming(false);
+      return;
+    }
+
+    let version = -1;
+    const source = new EventSource(`${API_URL}/api/stream`);
+
+    source.addEventListener('snapshot', (event) => {
+      const snapshot = JSON.parse((event as MessageEvent).data);
+      version = snapshot.version;
+      // Version 0: the first scan is still running
+      if (snapshot.version > 0) {
+        setUniverse(Object.fromEntries(snapshot.data.map((stock: StockData) => [stock.ticker, stock])));
+        setLastUpdated(new Date(snapshot.timestamp).toLocaleString());
+        setFromCache(false);
+        setError(null);
+      }
+    });
+
+    source.addEventListener('diff', (event) => {
+      const diff: RankingDiff = JSON.parse((event as MessageEvent).data);
+      // Already part of the snapshot we hold
+      if (diff.version <= version) return;
+      version = diff.version;
+      setUniverse((previous) => {
+        const next = { ...previous };
+        [...diff.entered, ...diff.updated].forEach((stock) => {
+          next[stock.ticker] = stock;
+        });
+        diff.exited.forEach((ticker) => {
+          delete next[ticker];
+        });
+        return next;
+      });
+      setLastUpdated(new Date(diff.timestamp).toLocaleString());
+    });
+
+    source.onerror = () => {
+      // No stream endpoint (e.g. serverless deployment): fall back to requests.
+      // Otherwise EventSource reconnects on its own and sends a fresh snapshot.
+      if (version < 0) {
+        source.close();
+        setStreaming(false);
+      }
+    };
+
+    return () => source.close();
+  }, []);
+
+  const streamedStocks = useMemo(() => {
+    if (!universe) return null;
+    return Object.values(universe)
+      .filter((stock) => parseFloat(stock.probability_score) >= minProbability)
+      .sort(
+        (a, b) =>
+          parseFloat(b.probability_score) - parseFloat(a.probability_score) ||
+          parseFloat(b.swing_score) - parseFloat(a.swing_score)
+      )
+      .slice(0, limit);
+  }, [universe, limit, minProbability]);
+
   useEffect(() => {
-    loadStocks();
-  }, [limit, minProbability]);
+    if (streamedStocks) {
+      setStocks(streamedStocks);
+      setLoading(false);
+    }
+  }, [streamedStocks]);
+
+  useEffect(() => {
+    if (!streaming) {
+      loadStocks();
+    }
+  }, [limit, minProbability, streaming]);
 
   const handleRefresh = () => {
     loadStocks(true);
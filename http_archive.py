@@ -0,0 +1,300 @@
+"""
+Recorded Upstream Responses
+requests.Session stand-ins that record upstream HTTP responses (Yahoo chart
+JSON, NSE quote JSON, scraped HTML) to a compressed SQLite archive, or replay
+them from it with optional injected latency and failures, for deterministic
+offline runs
+"""
+
+import os
+import json
+import time
+import zlib
+import random
+import sqlite3
+import logging
+import tempfile
+import threading
+from datetime import timedelta
+from urllib.parse import urlencode
+
+import pandas as pd
+import requests
+
+from ohlcv_store import EXCHANGE_TZ
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PROVIDER_MODES = ('live', 'record', 'replay')
+
+# Query parameters that carry wall-clock time; they are left out of the match key
+# (Yahoo's period1/period2 move with every call for the same period)
+VOLATILE_PARAMS = ('period1', 'period2', '_')
+
+
+def request_key(method, url, params=None):
+    """
+    Archive key of a request
+
+    Args:
+        method (str): HTTP method
+        url (str): URL without the query string
+        params (dict): Query parameters
+
+    Returns:
+        tuple: (key, span) where key is the method, URL and sorted stable
+            parameters, and span the requested period1..period2 window in
+            days (0 without one)
+    """
+    params = dict(params or {})
+    span = 0
+    if 'period1' in params and 'period2' in params:
+        span = round((int(params['period2']) - int(params['period1'])) / 86400)
+    stable = sorted((name, str(value)) for name, value in params.items() if name not in VOLATILE_PARAMS)
+    query = urlencode(stable)
+    return f"{method.upper()} {url}{'?' + query if query else ''}", span
+
+
+class ResponseArchive:
+    """Responses by request key and window, zlib-compressed in one SQLite file"""
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str): Archive file (default: responses.db in the user cache
+                directory, or the temp directory if that is not writable)
+        """
+        if path is None:
+            path = os.path.join(os.path.expanduser('~'), '.cache', 'bse-swing-trading', 'responses.db')
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            except OSError:
+                path = os.path.join(tempfile.gettempdir(), 'bse-swing-trading-responses.db')
+        self.path = path
+        self.local = threading.local()
+        self._connect().execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT, span INTEGER, status INTEGER, headers TEXT, body BLOB,
+                elapsed REAL, recorded_at REAL, PRIMARY KEY (key, span)
+            )
+        """)
+
+    def _connect(self):
+        # One connection per thread; autocommit
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self.local.conn = conn
+        return conn
+
+    def save(self, key, span, response, elapsed):
+        """
+        Store a response, replacing an earlier one for the same key and window
+
+        Args:
+            key (str): From request_key
+            span (int): From request_key
+            response (requests.Response): Upstream response
+            elapsed (float): Seconds the upstream took
+        """
+        headers = {
+            name: value for name, value in response.headers.items()
+            # Not Content-Encoding: requests has already decoded the body
+            if name.lower() in ('content-type', 'date')
+        }
+        self._connect().execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, span, response.status_code, json.dumps(headers), zlib.compress(response.content, 6),
+             elapsed, time.time())
+        )
+
+    def load(self, key, span=0):
+        """
+        Recorded response for a key, preferring the same window, then the
+        smallest longer one, then the longest shorter one
+
+        Returns:
+            dict: status, headers, body (bytes) and elapsed, or None if the key
+                was never recorded
+        """
+        row = self._connect().execute(
+            """
+            SELECT status, headers, body, elapsed FROM responses WHERE key = ?
+            ORDER BY span < ?, CASE WHEN span >= ? THEN span ELSE -span END LIMIT 1
+            """,
+            (key, span, span)
+        ).fetchone()
+        if row is None:
+            return None
+        status, headers, body, elapsed = row
+        return {'status': status, 'headers': json.loads(headers), 'body': zlib.decompress(body), 'elapsed': elapsed}
+
+    def recorded_until(self):
+        """
+        When the latest response was recorded
+
+        Returns:
+            datetime: Naive exchange-local (IST) time, or None for an empty archive
+        """
+        latest = self._connect().execute("SELECT MAX(recorded_at) FROM responses").fetchone()[0]
+        if latest is None:
+            return None
+        return pd.Timestamp(latest, unit='s', tz='UTC').tz_convert(EXCHANGE_TZ).tz_localize(None).floor('us').to_pydatetime()
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+def _split_url(url, params):
+    """Move a query string already in the URL into params"""
+    if '?' not in url:
+        return url, dict(params or {})
+    base, query = url.split('?', 1)
+    merged = dict(pair.split('=', 1) if '=' in pair else (pair, '') for pair in query.split('&') if pair)
+    merged.update(params or {})
+    return base, merged
+
+
+class RecordingSession(requests.Session):
+    """Live session that also writes every completed response to an archive"""
+
+    def __init__(self, archive):
+        super().__init__()
+        self.archive = archive
+
+    def request(self, method, url, params=None, **kwargs):
+        started = time.perf_counter()
+        response = super().request(method, url, params=params, **kwargs)
+        try:
+            key, span = request_key(method, *_split_url(url, params))
+            self.archive.save(key, span, response, time.perf_counter() - started)
+        except Exception as e:
+            logger.error(f"Error recording response for {url}: {str(e)}")
+        return response
+
+
+class ReplaySession(requests.Session):
+    """
+    Session answering from an archive without touching the network
+
+    Requests that were never recorded raise requests.ConnectionError, like an
+    unreachable host, so the callers' fallbacks run as they would offline.
+    """
+
+    def __init__(self, archive, latency=0.0, failure_rate=0.0, seed=0):
+        """
+        Args:
+            archive (ResponseArchive): Recorded responses
+            latency (float or str): Seconds added to every response, or
+                'recorded' to wait as long as the upstream originally took
+            failure_rate (float): Share of requests failed with
+                requests.ConnectionError; the draw depends only on the seed, the
+                request and how often it was made, so concurrent runs fail the
+                same requests every time
+            seed (int): Seed of the failure draws
+        """
+        super().__init__()
+        self.archive = archive
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.calls = {}  # request key -> times requested
+        self.calls_lock = threading.Lock()
+        # Synthetic fallbacks date their history by this rather than the wall clock
+        self.clock = archive.recorded_until()
+
+    def request(self, method, url, params=None, **kwargs):
+        base, merged = _split_url(url, params)
+        key, span = request_key(method, base, merged)
+        recorded = self.archive.load(key, span)
+
+        delay = (recorded['elapsed'] if recorded else 0.0) if self.latency == 'recorded' else float(self.latency)
+        if delay > 0:
+            time.sleep(delay)
+
+        if self.failure_rate > 0:
+            with self.calls_lock:
+                attempt = self.calls[key] = self.calls.get(key, 0) + 1
+            if random.Random(f"{self.seed}:{key}:{attempt}").random() < self.failure_rate:
+                raise requests.ConnectionError(f"Injected failure for {key}")
+        if recorded is None:
+            raise requests.ConnectionError(f"No recorded response for {key}")
+
+        response = requests.Response()
+        response.status_code = recorded['status']
+        response.headers.update(recorded['headers'])
+        response._content = recorded['body']
+        response.url = base + ('?' + urlencode(merged) if merged else '')
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers) or 'utf-8'
+        response.elapsed = timedelta(seconds=delay)
+        response.request = requests.Request(method, response.url).prepare()
+        return response
+
+
+def provider_mode():
+    """Upstream access mode from $DATA_PROVIDER: 'live' (default), 'record' or 'replay'"""
+    mode = os.environ.get('DATA_PROVIDER', 'live').lower()
+    if mode not in PROVIDER_MODES:
+        raise ValueError(f"DATA_PROVIDER must be one of {', '.join(PROVIDER_MODES)}")
+    return mode
+
+
+_archive = None
+_archive_lock = threading.Lock()
+_replay_dir = None
+
+
+def replay_state_dir():
+    """
+    Scratch directory for this run's on-disk state when replaying, else None
+
+    The OHLCV store and metadata file default to it in replay mode, so a run is
+    served from the archive alone rather than from history persisted by an
+    earlier (replayed or live) run. It is created once per process.
+    """
+    global _replay_dir
+    if provider_mode() != 'replay':
+        return None
+    with _archive_lock:
+        if _replay_dir is None:
+            _replay_dir = tempfile.mkdtemp(prefix='bse-swing-trading-replay-')
+            logger.info(f"✓ Replay keeps its history and metadata in {_replay_dir}")
+        return _replay_dir
+
+
+def session_from_env():
+    """
+    HTTP session for the upstream fetchers, as configured by the environment
+
+    $DATA_PROVIDER selects a plain requests.Session ('live', default), a
+    RecordingSession ('record') or a ReplaySession ('replay') on the archive at
+    $DATA_ARCHIVE (default: responses.db in the user cache directory). Replay
+    takes $REPLAY_LATENCY (seconds, or 'recorded'), $REPLAY_FAILURE_RATE (0-1)
+    and $REPLAY_SEED. Replay also keeps the default on-disk caches in
+    replay_state_dir() and leaves the host-shared cache off.
+
+    Returns:
+        requests.Session
+    """
+    global _archive
+    mode = provider_mode()
+    if mode == 'live':
+        return requests.Session()
+
+    path = os.environ.get('DATA_ARCHIVE')
+    with _archive_lock:
+        if _archive is None or (path and _archive.path != path):
+            _archive = ResponseArchive(path)
+            logger.info(f"✓ {mode.capitalize()}ing upstream responses {'to' if mode == 'record' else 'from'} {_archive.path}")
+    if mode == 'record':
+        return RecordingSession(_archive)
+
+    latency = os.environ.get('REPLAY_LATENCY', '0')
+    return ReplaySession(
+        _archive,
+        latency=latency if latency == 'recorded' else float(latency),
+        failure_rate=float(os.environ.get('REPLAY_FAILURE_RATE', 0)),
+        seed=int(os.environ.get('REPLAY_SEED', 0))
+    )
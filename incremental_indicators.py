@@ -0,0 +1,304 @@
+"""
+Incremental Indicator State
+Keeps running indicator state per ticker so a new bar costs O(1) instead of
+re-walking the whole history
+"""
+
+import math
+import logging
+from collections import deque
+from itertools import islice
+
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class RollingWindow:
+    """Fixed-size window with running sum / sum of squares (pandas rolling semantics)"""
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.nan_count = 0
+
+    def _add(self, value, sign):
+        if math.isnan(value):
+            self.nan_count += sign
+        else:
+            self.total += sign * value
+            self.total_sq += sign * value * value
+
+    def push(self, value):
+        """Append a value, dropping the oldest once the window is full"""
+        value = float(value)
+        if len(self.values) == self.size:
+            self._add(self.values[0], -1)
+        self.values.append(value)
+        self._add(value, 1)
+
+    def replace_last(self, value):
+        """Overwrite the most recent value"""
+        value = float(value)
+        self._add(self.values[-1], -1)
+        self.values[-1] = value
+        self._add(value, 1)
+
+    @property
+    def ready(self):
+        return len(self.values) == self.size and self.nan_count == 0
+
+    def mean(self):
+        """Rolling mean, NaN until the window is full and NaN-free"""
+        if not self.ready:
+            return float('nan')
+        return self.total / self.size
+
+    def std(self):
+        """Rolling sample standard deviation (ddof=1)"""
+        if not self.ready or self.size < 2:
+            return float('nan')
+        mean = self.total / self.size
+        variance = (self.total_sq - self.size * mean * mean) / (self.size - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class RunningEMA:
+    """Exponential moving average matching pandas ewm(span=...).mean() (adjust=True)"""
+
+    def __init__(self, span):
+        self.decay = 1 - 2.0 / (span + 1)
+        self.numerator = 0.0
+        self.denominator = 0.0
+        self._previous = (0.0, 0.0)
+
+    def _apply(self, value):
+        numerator, denominator = self._previous
+        if math.isnan(value):
+            self.numerator = self.decay * numerator
+            self.denominator = self.decay * denominator
+        else:
+            self.numerator = value + self.decay * numerator
+            self.denominator = 1.0 + self.decay * denominator
+
+    def push(self, value):
+        """Fold a new value into the average"""
+        self._previous = (self.numerator, self.denominator)
+        self._apply(float(value))
+
+    def replace_last(self, value):
+        """Recompute the average with the most recent value overwritten"""
+        self._apply(float(value))
+
+    @property
+    def value(self):
+        if self.denominator == 0:
+            return float('nan')
+        return self.numerator / self.denominator
+
+
+class IncrementalIndicators:
+    """
+    Per-ticker indicator state updated one OHLCV bar at a time
+
+    Produces the same columns as SwingTradingAnalyzer.calculate_technical_indicators
+    (RSI, MACD, Bollinger Bands, SMA_20/50/200, TR/ATR) with the same formulas,
+    so swing scores computed from to_frame() match a full recomputation.
+    """
+
+    INDICATOR_KEYS = (
+        'RSI', 'MACD', 'MACD_signal', 'MACD_diff', 'BB_upper', 'BB_middle', 'BB_lower',
+        'SMA_20', 'SMA_50', 'SMA_200', 'TR', 'ATR'
+    )
+
+    def __init__(self, keep_rows=20):
+        """
+        Args:
+            keep_rows (int): Number of recent bars kept for to_frame(); 20 covers
+                the support/resistance lookback used by calculate_trade_levels
+        """
+        self.rsi_gain = RollingWindow(14)
+        self.rsi_loss = RollingWindow(14)
+        self.ema_fast = RunningEMA(12)
+        self.ema_slow = RunningEMA(26)
+        self.macd_signal = RunningEMA(9)
+        self.sma_20 = RollingWindow(20)
+        self.sma_50 = RollingWindow(50)
+        self.sma_200 = RollingWindow(200)
+        self.true_range = RollingWindow(14)
+        self.rows = deque(maxlen=keep_rows)
+        self.index = deque(maxlen=keep_rows)
+        self.prev_close = float('nan')
+        self.bars = 0
+
+    @classmethod
+    def from_history(cls, df, keep_rows=20):
+        """
+        Seed the state from a history DataFrame
+
+        Args:
+            df (pd.DataFrame): OHLCV data
+            keep_rows (int): Number of recent bars kept for to_frame()
+
+        Returns:
+            IncrementalIndicators: State positioned after the last row of df
+        """
+        state = cls(keep_rows=keep_rows)
+        for timestamp, bar in zip(df.index, df.to_dict('records')):
+            state.update(bar, timestamp=timestamp)
+        return state
+
+    def _indicators(self, bar):
+        """Compute the indicator row for a bar whose components were just pushed"""
+        avg_gain = self.rsi_gain.mean()
+        avg_loss = self.rsi_loss.mean()
+        if math.isnan(avg_gain) or math.isnan(avg_loss) or (avg_gain == 0 and avg_loss == 0):
+            rsi = 50.0
+        elif avg_loss == 0:
+            rsi = 100.0
+        else:
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+
+        macd = self.ema_fast.value - self.ema_slow.value
+        signal_line = self.macd_signal.value
+
+        bb_middle = self.sma_20.mean()
+        bb_std = self.sma_20.std()
+
+        row = dict(bar)
+        row.update({
+            'RSI': rsi,
+            'MACD': macd,
+            'MACD_signal': signal_line,
+            'MACD_diff': macd - signal_line,
+            'BB_upper': bb_middle + bb_std * 2,
+            'BB_middle': bb_middle,
+            'BB_lower': bb_middle - bb_std * 2,
+            'SMA_20': bb_middle,
+            'SMA_50': self.sma_50.mean(),
+            'SMA_200': self.sma_200.mean(),
+            'TR': self.true_range.values[-1],
+            'ATR': self.true_range.mean(),
+        })
+        return row
+
+    def _components(self, bar):
+        """Per-bar inputs derived from the bar and the previous close"""
+        close = float(bar['Close'])
+        high = float(bar['High'])
+        low = float(bar['Low'])
+        delta = close - self.prev_close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        if math.isnan(self.prev_close):
+            true_range = float('nan')
+        return close, gain, loss, true_range
+
+    def update(self, bar, timestamp=None):
+        """
+        Append a completed or newly opened bar
+
+        Args:
+            bar (dict): Mapping with Open, High, Low, Close (Volume optional)
+            timestamp: Index label for the bar (optional)
+
+        Returns:
+            dict: Indicator row for the new bar
+        """
+        if self.bars:
+            self.prev_close = float(self.rows[-1]['Close'])
+        close, gain, loss, true_range = self._components(bar)
+
+        self.rsi_gain.push(gain)
+        self.rsi_loss.push(loss)
+        self.ema_fast.push(close)
+        self.ema_slow.push(close)
+        self.macd_signal.push(self.ema_fast.value - self.ema_slow.value)
+        self.sma_20.push(close)
+        self.sma_50.push(close)
+        self.sma_200.push(close)
+        self.true_range.push(true_range)
+        self.bars += 1
+
+        row = self._indicators(bar)
+        self.rows.append(row)
+        self.index.append(timestamp if timestamp is not None else self.bars - 1)
+        return row
+
+    def replace_last(self, bar):
+        """
+        Revise the most recent bar in place (e.g. an intraday tick on the
+        still-forming daily bar)
+
+        Args:
+            bar (dict): Mapping with Open, High, Low, Close (Volume optional)
+
+        Returns:
+            dict: Recomputed indicator row for the last bar
+        """
+        if not self.bars:
+            return self.update(bar)
+        close, gain, loss, true_range = self._components(bar)
+
+        self.rsi_gain.replace_last(gain)
+        self.rsi_loss.replace_last(loss)
+        self.ema_fast.replace_last(close)
+        self.ema_slow.replace_last(close)
+        self.macd_signal.replace_last(self.ema_fast.value - self.ema_slow.value)
+        self.sma_20.replace_last(close)
+        self.sma_50.replace_last(close)
+        self.sma_200.replace_last(close)
+        self.true_range.replace_last(true_range)
+
+        row = self._indicators(bar)
+        self.rows[-1] = row
+        return row
+
+    def update_price(self, price, volume=None):
+        """
+        Apply a last-trade price to the current bar
+
+        Args:
+            price (float): Latest traded price
+            volume (float): Cumulative volume of the bar so far (optional)
+
+        Returns:
+            dict: Recomputed indicator row for the last bar, or None if unseeded
+        """
+        if not self.bars:
+            return None
+        last = self.rows[-1]
+        bar = {key: last[key] for key in last if key not in self.INDICATOR_KEYS}
+        bar['Close'] = price
+        bar['High'] = max(float(last['High']), price)
+        bar['Low'] = min(float(last['Low']), price)
+        if 'Adj Close' in bar:
+            bar['Adj Close'] = price
+        if volume is not None and 'Volume' in bar:
+            bar['Volume'] = volume
+        return self.replace_last(bar)
+
+    def current(self):
+        """Latest indicator row (dict), or None before the first bar"""
+        return self.rows[-1] if self.rows else None
+
+    def to_frame(self, rows=None):
+        """
+        Recent bars with indicators as a DataFrame
+
+        The frame can be passed straight to SwingTradingAnalyzer.calculate_swing_score,
+        calculate_trade_levels and get_entry_time.
+
+        Args:
+            rows (int): Only the last rows bars, in O(rows) however many are kept
+                (default: all kept bars)
+        """
+        if rows is None or rows >= len(self.rows):
+            return pd.DataFrame(list(self.rows), index=list(self.index))
+        recent = list(islice(reversed(self.rows), rows))[::-1]
+        index = list(islice(reversed(self.index), rows))[::-1]
+        return pd.DataFrame(recent, index=index)
@@ -0,0 +1,228 @@
+"""
+BSE Market Calendar
+Session model for the exchange (IST, Monday-Friday 09:15-15:30, minus exchange
+holidays) used to decide how fresh rankings and price data need to be
+"""
+
+import os
+import re
+import logging
+from datetime import date, datetime, time, timedelta
+
+import pandas as pd
+
+from ohlcv_store import EXCHANGE_TZ, exchange_now
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SESSION_OPEN = time(9, 15)
+SESSION_CLOSE = time(15, 30)
+
+# Daily bars can still be revised for a while after the close (closing price
+# computation), so they are only frozen once this has passed
+SETTLEMENT_GRACE = timedelta(minutes=30)
+
+# Holidays that fall on the same date every year
+FIXED_HOLIDAYS = [
+    (1, 26),   # Republic Day
+    (4, 14),   # Dr. Baba Saheb Ambedkar Jayanti
+    (5, 1),    # Maharashtra Day
+    (8, 15),   # Independence Day
+    (10, 2),   # Mahatma Gandhi Jayanti
+    (12, 25),  # Christmas
+]
+
+# Published BSE trading holidays with moving dates; other years can be supplied
+# through $BSE_HOLIDAYS_FILE (one YYYY-MM-DD date per line)
+BSE_HOLIDAYS = {
+    date(2025, 2, 26),   # Mahashivratri
+    date(2025, 3, 14),   # Holi
+    date(2025, 3, 31),   # Id-Ul-Fitr (Ramadan Eid)
+    date(2025, 4, 10),   # Shri Mahavir Jayanti
+    date(2025, 4, 18),   # Good Friday
+    date(2025, 8, 27),   # Ganesh Chaturthi
+    date(2025, 10, 21),  # Diwali Laxmi Pujan
+    date(2025, 10, 22),  # Diwali Balipratipada
+    date(2025, 11, 5),   # Prakash Gurpurb Sri Guru Nanak Dev
+    date(2026, 1, 15),   # Municipal Corporation Elections (Maharashtra)
+    date(2026, 3, 3),    # Holi
+    date(2026, 3, 26),   # Shri Ram Navami
+    date(2026, 3, 31),   # Shri Mahavir Jayanti
+    date(2026, 4, 3),    # Good Friday
+    date(2026, 5, 28),   # Bakri Id
+    date(2026, 6, 26),   # Muharram
+    date(2026, 9, 14),   # Ganesh Chaturthi
+    date(2026, 10, 20),  # Dussehra
+    date(2026, 11, 10),  # Diwali Balipratipada
+    date(2026, 11, 24),  # Prakash Gurpurb Sri Guru Nanak Dev
+}
+
+
+def load_holidays(path=None):
+    """
+    Read extra holiday dates
+
+    Args:
+        path (str): File with one YYYY-MM-DD date per line; '#' starts a comment
+            (default: $BSE_HOLIDAYS_FILE)
+
+    Returns:
+        set: Dates read (empty if there is no file)
+    """
+    path = path or os.environ.get('BSE_HOLIDAYS_FILE')
+    if not path:
+        return set()
+    holidays = set()
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if line:
+                    holidays.add(date.fromisoformat(line))
+        logger.info(f"✓ Loaded {len(holidays)} exchange holidays from {path}")
+    except (OSError, ValueError) as e:
+        logger.error(f"Error loading holidays from {path}: {str(e)}")
+    return holidays
+
+
+HOLIDAYS = BSE_HOLIDAYS | load_holidays()
+
+
+def has_holiday_list(year=None, holidays=None):
+    """
+    Check whether the moving-date holidays of a year are known
+
+    Args:
+        year (int): Calendar year (default: the current exchange year)
+        holidays (set): Holiday dates to check (default: HOLIDAYS)
+
+    Returns:
+        bool: True if at least one holiday of that year is listed
+    """
+    year = year or exchange_now().year
+    holidays = HOLIDAYS if holidays is None else holidays
+    return any(day.year == year for day in holidays)
+
+
+if not has_holiday_list():
+    logger.warning(
+        f"No BSE holidays listed for {exchange_now().year}: holidays will count as trading days "
+        f"until they are added to BSE_HOLIDAYS or $BSE_HOLIDAYS_FILE"
+    )
+
+
+def is_trading_day(day):
+    """
+    Check whether the exchange trades on a date
+
+    Args:
+        day (date): Exchange-local date
+
+    Returns:
+        bool: True on weekdays that are not exchange holidays
+    """
+    return day.weekday() < 5 and (day.month, day.day) not in FIXED_HOLIDAYS and day not in HOLIDAYS
+
+
+def is_session_open(now=None):
+    """
+    Check whether the regular session is in progress
+
+    Args:
+        now (datetime): Exchange-local time (default: now)
+
+    Returns:
+        bool: True between the open and the close of a trading day
+    """
+    now = now or exchange_now()
+    return is_trading_day(now.date()) and SESSION_OPEN <= now.time() < SESSION_CLOSE
+
+
+def next_session_open(now=None):
+    """
+    Start of the next regular session strictly after now
+
+    Args:
+        now (datetime): Exchange-local time (default: now)
+
+    Returns:
+        datetime: Exchange-local time of the next open
+    """
+    now = now or exchange_now()
+    day = now.date()
+    if now.time() >= SESSION_OPEN:
+        day += timedelta(days=1)
+    while not is_trading_day(day):
+        day += timedelta(days=1)
+    return datetime.combine(day, SESSION_OPEN)
+
+
+def next_refresh_time(computed_at, market_interval, idle_interval):
+    """
+    When a result computed at a given time should be recomputed
+
+    During the session results age by market_interval (so the first refresh
+    after the close still picks up closing prices); outside it they are kept
+    for idle_interval or until the next open, whichever comes first.
+
+    Args:
+        computed_at (datetime): Exchange-local time the result was computed
+        market_interval (timedelta): Refresh cadence while the market is open
+        idle_interval (timedelta): Refresh cadence while it is closed
+
+    Returns:
+        datetime: Exchange-local time the result becomes stale
+    """
+    if is_session_open(computed_at):
+        return computed_at + market_interval
+    return min(computed_at + idle_interval, next_session_open(computed_at))
+
+
+def interval_minutes(interval):
+    """
+    Bar length of an intraday interval
+
+    Args:
+        interval (str): Interval such as '5m' or '1h'
+
+    Returns:
+        int: Minutes per bar, or None for daily and longer intervals
+    """
+    match = re.fullmatch(r'(\d+)([mh])', interval)
+    if match is None:
+        return None
+    return int(match.group(1)) * (60 if match.group(2) == 'h' else 1)
+
+
+def cache_ttl(interval, live_ttl, now=None):
+    """
+    Seconds data for an interval stays valid
+
+    While the session runs, intraday data is valid until the next bar boundary
+    (bars are anchored at the open) and daily data for live_ttl. Once the market
+    has closed (after SETTLEMENT_GRACE), nothing changes until the next open.
+
+    Args:
+        interval (str): Bar interval
+        live_ttl (float): Seconds to keep daily data during the session
+        now (datetime): Exchange-local time (default: now)
+
+    Returns:
+        float: Time to live in seconds
+    """
+    now = now or exchange_now()
+    session_close = datetime.combine(now.date(), SESSION_CLOSE)
+
+    if is_session_open(now):
+        minutes = interval_minutes(interval)
+        if minutes is None:
+            return live_ttl
+        session_open = datetime.combine(now.date(), SESSION_OPEN)
+        bar = timedelta(minutes=minutes)
+        next_bar = session_open + ((now - session_open) // bar + 1) * bar
+        return max((min(next_bar, session_close) - now).total_seconds(), 1.0)
+
+    if is_trading_day(now.date()) and session_close <= now < session_close + SETTLEMENT_GRACE:
+        return live_ttl
+    return (next_session_open(now) - now).total_seconds()
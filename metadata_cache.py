@@ -0,0 +1,177 @@
+"""
+Stock Metadata Cache
+Long-lived, disk-backed cache for slow-changing stock info (name, sector, PE)
+so yf.Ticker(...).info stays out of the per-scan hot path
+"""
+
+import os
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from ttl_cache import shared_cache
+from singleflight import SingleFlight
+from http_archive import replay_state_dir
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class StockMetadataCache:
+    """Stale-while-revalidate cache in front of BSEDataFetcher.get_stock_info"""
+
+    def __init__(self, fetcher, path=None, ttl=timedelta(hours=24), refresh_workers=2, cache=None):
+        """
+        Args:
+            fetcher (BSEDataFetcher): Source of stock info
+            path (str): JSON file backing the cache (default: metadata.json in
+                replay_state_dir() when replaying, else $METADATA_CACHE_FILE or
+                metadata.json in the user cache directory)
+            ttl (timedelta): Age after which an entry is refreshed in the background
+            refresh_workers (int): Threads used for background refreshes
+            cache (TTLCache): In-memory cache in front of the entries (default:
+                the process-wide shared_cache()); entries never expire there,
+                stale ones are refreshed instead. It is bounded, so every entry
+                is also kept in self.entries, which is what gets saved to disk
+        """
+        self.fetcher = fetcher
+        replay_dir = replay_state_dir()
+        if path is None and replay_dir:
+            path = os.path.join(replay_dir, 'metadata.json')
+        self.path = path or os.environ.get('METADATA_CACHE_FILE') or os.path.join(
+            os.path.expanduser('~'), '.cache', 'bse-swing-trading', 'metadata.json'
+        )
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=refresh_workers)
+        self.pending = set()
+        self.flights = SingleFlight()
+        self.entries = {}  # ticker -> entry, everything loaded or fetched
+        self.cache = cache if cache is not None else shared_cache()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)
+            for ticker, entry in entries.items():
+                self._set_entry(ticker, entry)
+            logger.info(f"✓ Loaded metadata for {len(entries)} stocks from disk")
+        except (OSError, ValueError):
+            pass
+
+    def _entry(self, ticker):
+        entry = self.cache.get(('metadata', ticker))
+        if entry is None:
+            # Evicted from the shared cache, not forgotten
+            with self.lock:
+                entry = self.entries.get(ticker)
+            if entry is not None:
+                self.cache.set(('metadata', ticker), entry, ttl=float('inf'))
+        return entry
+
+    def _set_entry(self, ticker, entry):
+        with self.lock:
+            self.entries[ticker] = entry
+        # No TTL: stale entries are still served while they are refreshed
+        self.cache.set(('metadata', ticker), entry, ttl=float('inf'))
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # Merge with the file so entries written by other processes survive
+            try:
+                with open(self.path, 'r') as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                snapshot = {}
+            with self.lock:
+                snapshot.update(self.entries)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Error saving metadata cache: {str(e)}")
+
+    def _is_fresh(self, entry):
+        return datetime.now() - datetime.fromisoformat(entry['fetched_at']) < self.ttl
+
+    def refresh(self, ticker):
+        """
+        Fetch info for a ticker and store it
+
+        Concurrent refreshes of the same ticker share one upstream fetch.
+
+        Returns:
+            dict: Stock info ({} if the fetch failed; failures are not cached)
+        """
+        return self.flights.do(('metadata', ticker), self._refresh, ticker)
+
+    def _refresh(self, ticker):
+        """Uncoalesced refresh"""
+        try:
+            info = self.fetcher.get_stock_info(ticker)
+            if info:
+                self._set_entry(ticker, {'info': info, 'fetched_at': datetime.now().isoformat()})
+                self._save()
+            return info
+        finally:
+            with self.lock:
+                self.pending.discard(ticker)
+
+    def _refresh_in_background(self, ticker):
+        with self.lock:
+            if ticker in self.pending:
+                return
+            self.pending.add(ticker)
+        self.executor.submit(self.refresh, ticker)
+
+    def get(self, ticker, wait=True):
+        """
+        Get stock info
+
+        Fresh entries are returned directly; stale entries are returned and
+        refreshed in the background; missing entries are fetched now (wait=True)
+        or scheduled for the background (wait=False, returns {}).
+
+        Args:
+            ticker (str): Stock ticker
+            wait (bool): Fetch synchronously when nothing is cached
+
+        Returns:
+            dict: Stock info
+        """
+        entry = self._entry(ticker)
+        if entry is not None:
+            if not self._is_fresh(entry):
+                self._refresh_in_background(ticker)
+            return entry['info']
+        if wait:
+            with self.lock:
+                self.pending.add(ticker)
+            return self.refresh(ticker)
+        self._refresh_in_background(ticker)
+        return {}
+
+    def get_many(self, tickers):
+        """
+        Get info for several tickers, fetching missing ones concurrently
+
+        Returns:
+            dict: ticker -> stock info
+        """
+        results = {}
+        missing = []
+        for ticker in tickers:
+            info = self.get(ticker, wait=False) if self._entry(ticker) is not None else None
+            if info is None:
+                missing.append(ticker)
+            else:
+                results[ticker] = info
+
+        for ticker, info in zip(missing, self.executor.map(self.refresh, missing)):
+            results[ticker] = info
+        return results
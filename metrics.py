@@ -0,0 +1,319 @@
+"""
+Runtime Metrics
+Low-overhead counters and latency histograms for the analysis stages and data
+sources, rendered in the Prometheus text exposition format
+"""
+
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency buckets: sub-millisecond math to slow downloads
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label combination"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """Add amount to the count of a label combination"""
+        key = tuple(labels[name] for name in self.labelnames)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        """Current count of a label combination"""
+        return self.values.get(tuple(labels[name] for name in self.labelnames), 0)
+
+    def samples(self):
+        with self.lock:
+            values = dict(self.values)
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram:
+    """
+    Observation counts in fixed cumulative buckets, plus sum and count, per
+    label combination
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.series = {}  # labels -> [bucket counts..., sum, count]
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """Record one observation (e.g. seconds) for a label combination"""
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of a with block (also when it raises)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def get(self, **labels):
+        """
+        Returns:
+            dict: 'count' and 'sum' of a label combination
+        """
+        series = self.series.get(tuple(labels[name] for name in self.labelnames))
+        return {'count': series[-1], 'sum': series[-2]} if series else {'count': 0, 'sum': 0.0}
+
+    def samples(self):
+        with self.lock:
+            series = {key: list(values) for key, values in self.series.items()}
+        lines = []
+        for key, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values):
+                cumulative += count
+                le = [('le', _format_value(bound) if bound == float('inf') else repr(float(bound)))]
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(values[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {values[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics of a process, plus collectors read at render time"""
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = {}
+        self.lock = threading.Lock()
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def _add(self, metric):
+        with self.lock:
+            self.metrics.append(metric)
+        return metric
+
+    def register_collector(self, name, collect):
+        """
+        Add a callable producing metrics on demand, replacing any collector
+        registered under the same name
+
+        Args:
+            name (str): Collector name
+            collect (callable): Returns a list of (name, kind, documentation,
+                [(labels dict, value), ...]) tuples
+        """
+        with self.lock:
+            self.collectors[name] = collect
+
+    def render(self):
+        """
+        Every metric in the Prometheus text exposition format (version 0.0.4)
+
+        Returns:
+            str: The exposition, newline-terminated
+        """
+        lines = []
+        for metric in list(self.metrics):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for collect in list(self.collectors.values()):
+            try:
+                families = collect()
+            except Exception as e:
+                logger.error(f"Error collecting metrics: {str(e)}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(
+                        f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}"
+                    )
+        return '\n'.join(lines) + '\n'
+
+
+# Content type of render()'s output
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'swing_stage_seconds', 'Time spent in each stage of a stock analysis', ['stage']
+)
+FETCH_SECONDS = REGISTRY.histogram(
+    'swing_fetch_seconds', 'Time spent per attempt on each market data source', ['source']
+)
+FETCH_ATTEMPTS = REGISTRY.counter(
+    'swing_fetch_attempts_total', 'Market data source attempts by outcome (ok, empty, error)',
+    ['source', 'outcome']
+)
+
+
+# Per-thread list that stage_timer also appends to while recorded_stages is active
+_recording = threading.local()
+
+
+@contextmanager
+def stage_timer(stage):
+    """
+    Time one analysis stage into swing_stage_seconds
+
+    Usage:
+        with stage_timer('indicators'):
+            df = analyzer.calculate_technical_indicators(data)
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        STAGE_SECONDS.observe(seconds, stage=stage)
+        recorded = getattr(_recording, 'stages', None)
+        if recorded is not None:
+            recorded.append((stage, seconds))
+
+
+@contextmanager
+def recorded_stages():
+    """
+    Collect the stage timings of a block, e.g. in a pool worker process whose
+    own registry is never scraped, to hand them to merge_stages in the parent
+
+    Yields:
+        list: (stage, seconds) pairs, appended as stages finish
+    """
+    _recording.stages = stages = []
+    try:
+        yield stages
+    finally:
+        _recording.stages = None
+
+
+def merge_stages(stages):
+    """Observe stage timings recorded in another process"""
+    for stage, seconds in stages:
+        STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+class FetchAttempt:
+    """Result holder for fetch_timer; set data to what the source returned"""
+
+    __slots__ = ('data',)
+
+    def __init__(self):
+        self.data = None
+
+
+@contextmanager
+def fetch_timer(source):
+    """
+    Time one data source attempt and count its outcome
+
+    The outcome is 'error' if the block raises (the exception propagates),
+    'ok' if attempt.data was set to something non-empty, else 'empty'.
+
+    Usage:
+        with fetch_timer('yahoo_api') as attempt:
+            attempt.data = self._fetch_via_yahoo_api(ticker, period)
+    """
+    attempt = FetchAttempt()
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield attempt
+        outcome = 'ok' if attempt.data is not None and len(attempt.data) > 0 else 'empty'
+    finally:
+        FETCH_SECONDS.observe(time.perf_counter() - started, source=source)
+        FETCH_ATTEMPTS.inc(source=source, outcome=outcome)
+
+
+def register_cache(name, cache):
+    """
+    Export a TTLCache's counters, per key namespace where it has them
+
+    Args:
+        name (str): Value of the cache label
+        cache (TTLCache): Cache to read at render time
+    """
+    def collect():
+        stats = cache.stats()
+        lookups = [
+            ({'cache': name, 'namespace': namespace, 'result': result}, counts[key])
+            for namespace, counts in sorted(stats['namespaces'].items())
+            for result, key in (('hit', 'hits'), ('miss', 'misses'))
+        ]
+        ratios = [
+            ({'cache': name, 'namespace': namespace},
+             counts['hits'] / (counts['hits'] + counts['misses']) if counts['hits'] + counts['misses'] else 0.0)
+            for namespace, counts in sorted(stats['namespaces'].items())
+        ]
+        return [
+            ('swing_cache_lookups_total', 'counter', 'Cache lookups by key namespace and result', lookups),
+            ('swing_cache_hit_ratio', 'gauge', 'Share of cache lookups that hit, by key namespace', ratios),
+            ('swing_cache_evictions_total', 'counter', 'Entries evicted to stay within bounds',
+             [({'cache': name}, stats['evictions'])]),
+            ('swing_cache_expirations_total', 'counter', 'Entries dropped after their TTL',
+             [({'cache': name}, stats['expirations'])]),
+            ('swing_cache_entries', 'gauge', 'Entries held', [({'cache': name}, stats['entries'])]),
+            ('swing_cache_bytes', 'gauge', 'Estimated bytes held', [({'cache': name}, stats['bytes'])]),
+        ]
+
+    REGISTRY.register_collector(f'cache:{name}', collect)
+
+
+def render():
+    """The process-wide registry in Prometheus text format"""
+    return REGISTRY.render()
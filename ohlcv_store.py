@@ -0,0 +1,236 @@
+"""
+On-disk OHLCV Store
+Keeps full price history per ticker/interval as memory-mapped NumPy files so
+refreshes only need to download the bars after the last stored one
+"""
+
+import os
+import json
+import logging
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Calendar days covered by each yfinance-style period string
+PERIOD_DAYS = {
+    "1d": 1, "5d": 5, "7d": 7, "1mo": 30, "60d": 60, "3mo": 90, "6mo": 180,
+    "1y": 365, "2y": 730, "5y": 1825, "10y": 3650
+}
+
+# Intervals whose bars are whole sessions; their timestamps are stored as dates
+DAILY_INTERVALS = ("1d", "5d", "1wk", "1mo", "3mo")
+
+EXCHANGE_TZ = "Asia/Kolkata"
+
+
+def exchange_now():
+    """Current exchange-local (IST) time as a naive datetime"""
+    return pd.Timestamp.now(tz=EXCHANGE_TZ).tz_localize(None).to_pydatetime()
+
+
+def period_start(period, now=None):
+    """
+    Start of the window covered by a period string
+
+    Args:
+        period (str): Period such as '3mo', '1y', 'ytd' or 'max'
+        now (datetime): Naive exchange-local reference time (default:
+            exchange_now(), the clock stored timestamps are kept in)
+
+    Returns:
+        datetime: Start of the window, or None for 'max' / unknown periods
+    """
+    now = now or exchange_now()
+    if period == "ytd":
+        return datetime(now.year, 1, 1)
+    days = PERIOD_DAYS.get(period)
+    if days is None:
+        return None
+    return now - timedelta(days=days)
+
+
+def exchange_epoch(ts):
+    """Unix seconds of a naive exchange-local (IST) timestamp, whatever the host timezone"""
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize(EXCHANGE_TZ)
+    return int(ts.timestamp())
+
+
+def to_exchange_time(df, interval="1d"):
+    """
+    Normalize a frame's index to naive exchange-local (IST) timestamps
+
+    Tz-aware indexes (yfinance) are converted to IST; daily bars are floored to
+    the session date so that different sources agree on a bar's timestamp.
+    """
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_convert(EXCHANGE_TZ).tz_localize(None)
+    if interval in DAILY_INTERVALS:
+        index = index.normalize()
+    df = df.copy()
+    df.index = index
+    return df[~df.index.duplicated(keep='last')].sort_index()
+
+
+class OHLCVStore:
+    """Per-ticker columnar OHLCV history on disk"""
+
+    COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Adj Close']
+    DTYPE = np.dtype([('ts', '<i8')] + [(column, '<f8') for column in COLUMNS])
+
+    def __init__(self, root=None):
+        """
+        Args:
+            root (str): Directory for the store (default: $OHLCV_STORE_DIR, or a
+                per-user cache directory; /tmp in serverless environments)
+        """
+        if root is None:
+            root = os.environ.get('OHLCV_STORE_DIR') or os.path.join(
+                os.path.expanduser('~'), '.cache', 'bse-swing-trading', 'ohlcv'
+            )
+        self.root = root
+        self.lock = threading.Lock()
+        try:
+            os.makedirs(self.root, exist_ok=True)
+        except OSError:
+            self.root = os.path.join(tempfile.gettempdir(), 'bse-swing-trading-ohlcv')
+            os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, ticker, interval, suffix):
+        safe_ticker = ticker.replace('/', '_').replace('^', '_')
+        return os.path.join(self.root, f"{safe_ticker}_{interval}{suffix}")
+
+    def _read_meta(self, ticker, interval):
+        try:
+            with open(self._path(ticker, interval, '.json'), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _update_meta(self, ticker, interval, **fields):
+        meta = self._read_meta(ticker, interval)
+        meta.update(fields)
+        meta_path = self._path(ticker, interval, '.json')
+        tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def refreshed_at(self, ticker, interval="1d"):
+        """Exchange-local time the stored history was last brought up to date"""
+        meta = self._read_meta(ticker, interval)
+        if meta.get('refreshed_at'):
+            return datetime.fromisoformat(meta['refreshed_at'])
+        return None
+
+    def mark_refreshed(self, ticker, interval, at):
+        """
+        Record that the stored history was complete up to a given time
+
+        Args:
+            ticker (str): Stock ticker
+            interval (str): Bar interval
+            at (datetime): Exchange-local time of the download
+        """
+        try:
+            with self.lock:
+                self._update_meta(ticker, interval, refreshed_at=at.isoformat())
+        except Exception as e:
+            logger.error(f"Error writing OHLCV store metadata for {ticker}: {str(e)}")
+
+    def covered_from(self, ticker, interval="1d"):
+        """Earliest time for which the stored history is known to be complete"""
+        meta = self._read_meta(ticker, interval)
+        if meta.get('covered_from'):
+            return datetime.fromisoformat(meta['covered_from'])
+        return None
+
+    def last_timestamp(self, ticker, interval="1d"):
+        """Timestamp of the newest stored bar, or None if nothing is stored"""
+        try:
+            values = np.load(self._path(ticker, interval, '.npy'), mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        if len(values) == 0:
+            return None
+        return pd.Timestamp(int(values['ts'][-1]))
+
+    def load(self, ticker, interval="1d", start=None):
+        """
+        Load stored history
+
+        Args:
+            ticker (str): Stock ticker
+            interval (str): Bar interval
+            start (datetime): Only return bars at or after this time (optional)
+
+        Returns:
+            pd.DataFrame: OHLCV data, or None if nothing is stored
+        """
+        try:
+            values = np.load(self._path(ticker, interval, '.npy'), mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+
+        # Only the requested tail is read from the memory map
+        first = 0
+        if start is not None:
+            first = int(np.searchsorted(values['ts'], pd.Timestamp(start).value))
+        rows = np.array(values[first:])
+        if len(rows) == 0:
+            return None
+
+        return pd.DataFrame(
+            {column: rows[column] for column in self.COLUMNS},
+            index=pd.to_datetime(rows['ts'])
+        )
+
+    def write(self, ticker, interval, df, covered_from=None):
+        """
+        Merge bars into the store; new bars replace stored bars within their time range
+
+        Args:
+            ticker (str): Stock ticker
+            interval (str): Bar interval
+            df (pd.DataFrame): OHLCV data with exchange-local timestamps
+            covered_from (datetime): Start of the window df is complete for (optional)
+        """
+        if df is None or len(df) == 0:
+            return
+        try:
+            df = df.dropna(subset=['Close'])
+            new = np.zeros(len(df), dtype=self.DTYPE)
+            new['ts'] = pd.DatetimeIndex(df.index).values.astype('datetime64[ns]').astype('<i8')
+            for column in self.COLUMNS:
+                source = column if column in df.columns else 'Close'
+                new[column] = df[source].to_numpy(dtype=float)
+
+            path = self._path(ticker, interval, '.npy')
+            with self.lock:
+                try:
+                    existing = np.load(path)
+                    outside = (existing['ts'] < new['ts'][0]) | (existing['ts'] > new['ts'][-1])
+                    merged = np.concatenate([existing[outside], new])
+                    merged = merged[np.argsort(merged['ts'], kind='stable')]
+                except (OSError, ValueError):
+                    merged = new
+
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, merged)
+                os.replace(tmp_path, path)
+
+                if covered_from is not None:
+                    previous = self.covered_from(ticker, interval)
+                    if previous is None or covered_from < previous:
+                        self._update_meta(ticker, interval, covered_from=covered_from.isoformat())
+        except Exception as e:
+            logger.error(f"Error writing OHLCV store for {ticker}: {str(e)}")
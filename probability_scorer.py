@@ -3,6 +3,7 @@ Probability Scoring System
 Calculates probability of hitting target price
 """
 
+import os
 import pandas as pd
 import numpy as np
 import logging
@@ -11,14 +12,137 @@ from datetime import datetime, timedelta
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Price-move models: the original z-score heuristic, or Monte Carlo first passage
+# with normal (GBM) or bootstrapped log returns
+PROBABILITY_MODELS = ('z_score', 'gbm', 'bootstrap')
+
+
+def simulate_first_passage(returns, target_move, stop_move, horizon=20, paths=1000,
+                           method='bootstrap', seed=0, max_elements=1 << 22):
+    """
+    Monte Carlo probability of reaching the target before the stop, for many tickers at once
+
+    Paths are simulated on bar closes as cumulative log returns. Every ticker is
+    driven by the same random draws (common random numbers): a ticker's result
+    does not depend on which others are in the batch, and differences between
+    tickers are not swamped by sampling noise.
+
+    Args:
+        returns (np.ndarray): tickers x bars log returns of each ticker's history,
+            NaN-padded where a history is shorter
+        target_move (np.ndarray): log(target / entry) per ticker (> 0)
+        stop_move (np.ndarray): log(stop / entry) per ticker (< 0)
+        horizon (int): Bars simulated per path
+        paths (int): Paths per ticker
+        method (str): 'bootstrap' resamples the ticker's own returns, 'gbm'
+            draws normal returns with the ticker's mean and volatility
+        seed (int): Seed of the random draws
+        max_elements (int): Bound on simulated steps held in memory at once;
+            tickers are processed in blocks of this size
+
+    Returns:
+        np.ndarray: Probability (0-100) per ticker; NaN with fewer than 2 returns
+            or a non-finite target or stop move
+    """
+    returns = np.atleast_2d(np.asarray(returns, dtype=float))
+    target_move = np.asarray(target_move, dtype=np.float32).reshape(-1)
+    stop_move = np.asarray(stop_move, dtype=np.float32).reshape(-1)
+    n = len(returns)
+    rng = np.random.default_rng(seed)
+
+    valid = np.isfinite(returns)
+    counts = valid.sum(axis=1)
+    if method == 'bootstrap':
+        # Valid returns packed to the left of each row, resampled by index
+        order = np.argsort(~valid, axis=1, kind='stable')
+        packed = np.take_along_axis(returns, order, axis=1).astype(np.float32)
+        draws = rng.random((paths, horizon))
+    elif method == 'gbm':
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.nanmean(np.where(valid, returns, np.nan), axis=1)
+            volatility = np.nanstd(np.where(valid, returns, np.nan), axis=1, ddof=1)
+        draws = rng.standard_normal((paths, horizon), dtype=np.float32)
+    else:
+        raise ValueError(f"method must be 'bootstrap' or 'gbm', not {method!r}")
+
+    probability = np.full(n, np.nan)
+    block = max(1, max_elements // (paths * horizon))
+    for start in range(0, n, block):
+        rows = np.arange(start, min(start + block, n))
+        if method == 'bootstrap':
+            picks = (draws[None, :, :] * counts[rows, None, None]).astype(np.intp)
+            steps = packed[rows[:, None, None], np.minimum(picks, packed.shape[1] - 1)]
+        else:
+            steps = (mean[rows, None, None] + volatility[rows, None, None] * draws[None, :, :]).astype(np.float32)
+        log_paths = np.cumsum(steps, axis=2)
+
+        up = log_paths >= target_move[rows, None, None]
+        down = log_paths <= stop_move[rows, None, None]
+        first_up = np.where(up.any(axis=2), up.argmax(axis=2), horizon)
+        first_down = np.where(down.any(axis=2), down.argmax(axis=2), horizon)
+        probability[rows] = (first_up < first_down).mean(axis=1) * 100
+
+    # A NaN level compares False everywhere and would read as "never hit the target"
+    probability[(counts < 2) | ~np.isfinite(target_move) | ~np.isfinite(stop_move)] = np.nan
+    return probability
+
 
 class ProbabilityScorer:
     """Calculates probability scores for swing trading targets"""
     
-    def __init__(self):
+    def __init__(self, model=None, paths=1000, horizon=20, seed=0):
+        """
+        Args:
+            model (str): Price-move model, one of PROBABILITY_MODELS (default:
+                $PROBABILITY_MODEL, or 'z_score')
+            paths (int): Simulated paths per stock for the Monte Carlo models
+            horizon (int): Bars within which the target must be hit first
+            seed (int): Seed of the simulation, so scores are reproducible
+        """
         self.lookback_period = 20  # Days to look back for pattern analysis
-    
-    def calculate_pattern_probability(self, df, target_price, stop_loss):
+        self.model = model or os.environ.get('PROBABILITY_MODEL', 'z_score')
+        if self.model not in PROBABILITY_MODELS:
+            raise ValueError(f"model must be one of {', '.join(PROBABILITY_MODELS)}")
+        self.paths = paths
+        self.horizon = horizon
+        self.seed = seed
+
+    @property
+    def simulated(self):
+        """True if the price-move component comes from simulate_first_passage"""
+        return self.model != 'z_score'
+
+    def first_passage_batch(self, closes, entry_prices, target_prices, stop_losses):
+        """
+        Monte Carlo P(target before stop within horizon bars) for many stocks in one pass
+
+        Args:
+            closes (list): Close price history (array-like) per stock
+            entry_prices, target_prices, stop_losses (array-like): Levels per stock
+
+        Returns:
+            np.ndarray: Probability (0-100) per stock; 50 where it cannot be estimated
+        """
+        closes = [np.asarray(close, dtype=float) for close in closes]
+        width = max((len(close) for close in closes), default=1) - 1
+        returns = np.full((len(closes), max(width, 1)), np.nan)
+        for row, close in enumerate(closes):
+            with np.errstate(invalid='ignore', divide='ignore'):
+                log_returns = np.diff(np.log(close))
+            returns[row, :len(log_returns)] = log_returns
+
+        entry = np.asarray(entry_prices, dtype=float)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            target_move = np.log(np.asarray(target_prices, dtype=float) / entry)
+            stop_move = np.log(np.asarray(stop_losses, dtype=float) / entry)
+
+        probability = simulate_first_passage(
+            returns, target_move, stop_move, horizon=self.horizon, paths=self.paths,
+            method=self.model, seed=self.seed
+        )
+        return np.where(np.isfinite(probability), probability, 50.0)
+
+    def calculate_pattern_probability(self, df, target_price, stop_loss, first_passage=None):
         """
         Calculate probability based on historical pattern matching
         
@@ -26,6 +150,8 @@ class ProbabilityScorer:
             df (pd.DataFrame): Historical data with indicators
             target_price (float): Target price to hit
             stop_loss (float): Stop loss level
+            first_passage (float): Precomputed first_passage_batch result for this
+                stock (Monte Carlo models only; simulated here if omitted)
         
         Returns:
             float: Probability (0-100)
@@ -47,8 +173,19 @@ class ProbabilityScorer:
             similar_patterns = self._find_similar_patterns(df, current_price)
             win_rate = similar_patterns['win_rate']
             
+            # Likelihood of the move: the z-score heuristic ignores the stop, the
+            # simulated models race the target against it
+            if not self.simulated:
+                move_probability = self._z_score_probability(price_move_needed, volatility)
+            elif first_passage is not None:
+                move_probability = first_passage
+            else:
+                move_probability = float(self.first_passage_batch(
+                    [df['Close'].to_numpy(dtype=float)], [current_price], [target_price], [stop_loss]
+                )[0])
+
             # Composite probability
-            probability = (win_rate * 0.4) + (self._z_score_probability(price_move_needed, volatility) * 0.4) + \
+            probability = (win_rate * 0.4) + (move_probability * 0.4) + \
                          (self._mean_reversion_probability(df) * 0.2)
             
             return max(0, min(100, probability))
@@ -72,6 +209,8 @@ class ProbabilityScorer:
                 return 50
             
             z_score = abs(price_move) / volatility
+            if not np.isfinite(z_score):
+                return 50  # Neutral, as for the simulated models
             
             # Using normal distribution approximation
             # Z-score of 1 ≈ 68% probability (one standard deviation)
@@ -127,35 +266,33 @@ class ProbabilityScorer:
         """
         try:
             # Look for similar RSI levels and MACD patterns
-            current_rsi = df['RSI'].iloc[-1]
+            rsi = df['RSI'].to_numpy(dtype=float)
+            close = df['Close'].to_numpy(dtype=float)
+            current_rsi = rsi[-1]
+            n = len(df)
             
             # Find periods where RSI was similar (within 10 points)
-            similar_periods = df[
-                (df['RSI'] >= current_rsi - 10) & 
-                (df['RSI'] <= current_rsi + 10)
-            ].index
-            
-            if len(similar_periods) < 3:
-                return {'win_rate': 50, 'samples': len(similar_periods)}
-            
-            # Calculate what happened after similar patterns
-            wins = 0
-            total = 0
-            
-            # Convert index to integer positions
-            for i, idx in enumerate(similar_periods[:-1]):  # Exclude current
-                current_pos = df.index.get_loc(idx)
-                next_pos = current_pos + 1
-                
-                if next_pos < len(df) - 1:
-                    # Look at next 5-20 days for max price
-                    end_pos = min(next_pos + 20, len(df))
-                    future_price = df['Close'].iloc[next_pos:end_pos].max()
-                    entry_price = df['Close'].iloc[current_pos]
-                    
-                    if future_price > entry_price * 1.02:  # 2% gain
-                        wins += 1
-                    total += 1
+            similar_positions = np.flatnonzero(
+                (rsi >= current_rsi - 10) & (rsi <= current_rsi + 10)
+            )
+            
+            if len(similar_positions) < 3:
+                return {'win_rate': 50, 'samples': len(similar_positions)}
+            
+            # Exclude current, and require at least one bar after the next one
+            candidates = similar_positions[:-1]
+            candidates = candidates[candidates + 1 < n - 1]
+            
+            # Max Close over the next 20 bars (p+1 .. p+20), truncated at the end:
+            # a trailing rolling max on the reversed series, shifted by one bar
+            forward_max = (
+                df['Close'][::-1].rolling(window=20, min_periods=1).max()[::-1]
+                .shift(-1).to_numpy(dtype=float)
+            )
+            
+            # A win is a 2% gain within the window
+            wins = int(np.count_nonzero(forward_max[candidates] > close[candidates] * 1.02))
+            total = len(candidates)
             
             win_rate = (wins / total * 100) if total > 0 else 50
             return {'win_rate': win_rate, 'samples': total}
@@ -193,7 +330,7 @@ class ProbabilityScorer:
             return 0.5
     
     def calculate_overall_probability(self, df, entry_price, target_price, stop_loss, 
-                                     swing_score, rr_ratio):
+                                     swing_score, rr_ratio, first_passage=None, pattern_probability=None):
         """
         Calculate overall probability of hitting target
         
@@ -204,13 +341,18 @@ class ProbabilityScorer:
             stop_loss (float): Stop loss
             swing_score (float): Swing trading favorability score (0-100)
             rr_ratio (float): Risk-reward ratio
+            first_passage (float): Precomputed first_passage_batch result (optional)
+            pattern_probability (float): Precomputed calculate_pattern_probability
+                result; df then only needs the recent bars (optional)
         
         Returns:
             float: Overall probability (0-100)
         """
         try:
             # Pattern-based probability
-            pattern_prob = self.calculate_pattern_probability(df, target_price, stop_loss)
+            pattern_prob = pattern_probability
+            if pattern_prob is None:
+                pattern_prob = self.calculate_pattern_probability(df, target_price, stop_loss, first_passage)
             
             # Swing score probability (convert score to probability)
             swing_prob = swing_score * 0.8  # Max 80% from swing score
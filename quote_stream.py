@@ -0,0 +1,311 @@
+"""
+Live Quote Streaming
+Polls last-trade prices for the watch universe in batched requests, folds them
+into per-ticker incremental indicator state and re-scores only the tickers
+whose price moved, publishing the resulting ranking changes
+"""
+
+import logging
+import threading
+from datetime import timedelta
+
+import pandas as pd
+
+from data_fetcher import BSE_TOP_STOCKS
+from ranker import analyze_data, diff_rankings, select_top
+from incremental_indicators import IncrementalIndicators
+from market_calendar import SETTLEMENT_GRACE, exchange_now, is_session_open, next_session_open
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Adj Close']
+
+# Bars a tick is scored from: the support/resistance lookback of calculate_trade_levels
+LIVE_ROWS = 20
+
+
+class QuoteStreamer:
+    """
+    Live daily-bar state for a universe, driven by last-trade quotes
+
+    Each ticker keeps an IncrementalIndicators seeded from its daily history; a
+    quote revises the still-forming bar in O(1) (or opens a new bar on a new
+    session) and only that ticker is re-scored. A tick is scored from the last
+    LIVE_ROWS bars and the pattern probability of the last bar close; the
+    pattern probability, which walks the whole history, is recomputed only
+    when a new bar opens. Subscribers receive the re-scored results and the
+    leaderboard changes after each poll that moved a price.
+    """
+
+    def __init__(self, ranker, tickers=None, poll_interval=timedelta(seconds=15), period="3mo",
+                 limit=10, min_probability=40, sort_by='probability', fetch_quotes=None):
+        """
+        Args:
+            ranker (SwingTradingRanker): Supplies the fetcher, analyzer and scorer
+            tickers (list): Watch universe (default: BSE_TOP_STOCKS)
+            poll_interval (timedelta): Delay between quote polls while BSE is open
+            period (str): Daily history used to seed the indicator state
+            limit (int): Leaderboard size
+            min_probability (float): Minimum probability for the leaderboard
+            sort_by (str): One of ranker.SORT_KEYS
+            fetch_quotes (callable): tickers -> {ticker: quote} (default: the
+                fetcher's batched fetch_quotes)
+        """
+        self.ranker = ranker
+        self.tickers = list(tickers) if tickers is not None else list(dict.fromkeys(BSE_TOP_STOCKS))
+        self.poll_interval = poll_interval
+        self.period = period
+        self.limit = limit
+        self.min_probability = min_probability
+        self.sort_by = sort_by
+        self.fetch_quotes = fetch_quotes or ranker.fetcher.fetch_quotes
+        self.states = {}
+        self.patterns = {}  # ticker -> pattern probability as of the last bar close
+        self.versions = {}  # ticker -> quotes applied, so stale scores are not swapped in
+        self.results = {}
+        self.leaderboard = []
+        self.updated_at = None
+        self.seeded_on = None
+        self.subscribers = []
+        self.lock = threading.RLock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def seed(self, data_dict=None):
+        """
+        Build indicator state and initial scores from daily history
+
+        Args:
+            data_dict (dict): ticker -> OHLCV DataFrame (default: downloaded for
+                the watch universe)
+
+        Returns:
+            int: Number of tickers seeded
+        """
+        if data_dict is None:
+            data_dict = self.ranker.fetcher.fetch_multiple_stocks(self.tickers, period=self.period)
+        states, patterns, results = {}, {}, {}
+        for ticker, df in data_dict.items():
+            if df is None or len(df) < 50:
+                continue
+            try:
+                columns = [column for column in OHLCV_COLUMNS if column in df.columns]
+                # Keep the whole history: the pattern probability looks at all of it
+                state = IncrementalIndicators.from_history(df[columns], keep_rows=len(df))
+                states[ticker] = state
+                patterns[ticker] = self._pattern_probability(state.to_frame())
+                result = self._score(ticker, state.to_frame(rows=LIVE_ROWS), patterns[ticker])
+                if result is not None:
+                    results[ticker] = result
+            except Exception as e:
+                logger.error(f"Error seeding live state for {ticker}: {str(e)}")
+
+        with self.lock:
+            self.states = states
+            self.patterns = patterns
+            self.versions = {}
+            self.results = results
+            self.seeded_on = exchange_now().date()
+            event = self._publish(set(results))
+        self._notify(event)
+        logger.info(f"✓ Seeded live state for {len(states)} stocks")
+        return len(states)
+
+    def _pattern_probability(self, frame):
+        """Pattern probability of a full-history frame, for the levels of its last bar"""
+        levels = self.ranker.analyzer.calculate_trade_levels(frame)
+        if levels is None:
+            return None
+        return self.ranker.scorer.calculate_pattern_probability(frame, levels['target_price'], levels['stop_loss'])
+
+    def _score(self, ticker, frame, pattern_probability):
+        return analyze_data(
+            ticker, frame, self.ranker.analyzer, self.ranker.scorer, pattern_probability=pattern_probability
+        )
+
+    def apply_quotes(self, quotes):
+        """
+        Fold quotes into the live state and re-score the tickers that moved
+
+        The state is updated under the lock; scoring runs outside it, and a
+        score is only swapped in if no newer quote for that ticker (or a new
+        seed) landed meanwhile.
+
+        Args:
+            quotes (dict): ticker -> {'price', 'time', 'volume' (optional)}
+
+        Returns:
+            dict: The published event (see subscribe), or None if no price moved
+        """
+        pending = []
+        with self.lock:
+            for ticker, quote in quotes.items():
+                state = self.states.get(ticker)
+                if state is None:
+                    continue
+                try:
+                    change = self._apply_quote(state, quote)
+                except Exception as e:
+                    logger.error(f"Error applying quote for {ticker}: {str(e)}")
+                    continue
+                if not change:
+                    continue
+                version = self.versions[ticker] = self.versions.get(ticker, 0) + 1
+                # A new bar closed the previous one: rescore the pattern from the whole history
+                full = state.to_frame() if change == 'bar' else None
+                pending.append((ticker, state, version, state.to_frame(rows=LIVE_ROWS), full,
+                                self.patterns.get(ticker)))
+
+        scored = []
+        for ticker, state, version, frame, full, pattern in pending:
+            try:
+                if full is not None:
+                    pattern = self._pattern_probability(full)
+                scored.append((ticker, state, version, pattern, self._score(ticker, frame, pattern)))
+            except Exception as e:
+                logger.error(f"Error scoring {ticker}: {str(e)}")
+
+        with self.lock:
+            moved = set()
+            for ticker, state, version, pattern, result in scored:
+                if self.states.get(ticker) is not state or self.versions.get(ticker) != version:
+                    continue
+                self.patterns[ticker] = pattern
+                if result is None:
+                    self.results.pop(ticker, None)
+                else:
+                    self.results[ticker] = result
+                moved.add(ticker)
+            if not moved:
+                return None
+            event = self._publish(moved)
+        self._notify(event)
+        return event
+
+    def _apply_quote(self, state, quote):
+        """
+        Update a ticker's state from a quote
+
+        Returns:
+            str: 'bar' if the quote opened a new bar, 'tick' if it revised the
+                current one, None if nothing changed
+        """
+        price = float(quote['price'])
+        volume = quote.get('volume')
+        session = pd.Timestamp(quote['time']).normalize()
+        last = state.current()
+        if session > pd.Timestamp(state.index[-1]):
+            # First trade of a new session opens a new daily bar
+            state.update({
+                'Open': price, 'High': price, 'Low': price, 'Close': price,
+                'Volume': float(volume or 0), 'Adj Close': price
+            }, timestamp=session)
+            return 'bar'
+        if price == last['Close'] and (volume is None or volume == last.get('Volume')):
+            return None
+        state.update_price(price, volume=float(volume) if volume is not None else None)
+        return 'tick'
+
+    def _publish(self, moved):
+        """Recompute the leaderboard and build the event for subscribers (lock held)"""
+        leaderboard = select_top(self.results.values(), self.limit, self.min_probability, self.sort_by)
+        changes = diff_rankings(self.leaderboard, leaderboard)
+        self.leaderboard = leaderboard
+        self.updated_at = exchange_now()
+
+        event = dict(
+            changes, moved=sorted(moved), leaderboard=leaderboard, updated_at=self.updated_at,
+            results=[self.results[ticker] for ticker in sorted(moved) if ticker in self.results]
+        )
+        return event
+
+    def _notify(self, event):
+        """Call the subscribers (without the lock, so slow ones don't block readers)"""
+        with self.lock:
+            callbacks = list(self.subscribers)
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Error in live ranking subscriber: {str(e)}")
+
+    def poll_once(self):
+        """
+        Fetch quotes for the whole universe once and apply them
+
+        Returns:
+            dict: The published event, or None if no price moved
+        """
+        quotes = self.fetch_quotes(list(self.states))
+        return self.apply_quotes(quotes)
+
+    def subscribe(self, callback):
+        """
+        Receive ranking changes
+
+        Args:
+            callback (callable): Called with an event dict holding 'order',
+                'entered', 'updated', 'exited' (leaderboard changes, see
+                ranker.diff_rankings), plus 'moved' (tickers re-scored),
+                'results' (their new analyses), 'leaderboard' and 'updated_at'
+        """
+        with self.lock:
+            self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """Stop receiving ranking changes"""
+        with self.lock:
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
+
+    def snapshot(self):
+        """
+        Current live scores
+
+        Returns:
+            dict: 'results' (all scored tickers), 'leaderboard' and 'updated_at'
+        """
+        with self.lock:
+            return {
+                'results': list(self.results.values()),
+                'leaderboard': list(self.leaderboard),
+                'updated_at': self.updated_at,
+            }
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            now = exchange_now()
+            # Keep polling through the closing session so the final prices land
+            trading = is_session_open(now) or is_session_open(now - SETTLEMENT_GRACE)
+            # Seed on start and once per session so each day starts from settled bars
+            if not self.states or (trading and self.seeded_on != now.date()):
+                try:
+                    self.seed()
+                except Exception as e:
+                    logger.error(f"Error seeding live state: {str(e)}")
+            if trading:
+                if self.states:
+                    try:
+                        self.poll_once()
+                    except Exception as e:
+                        logger.error(f"Error polling quotes: {str(e)}")
+                wait = self.poll_interval
+            else:
+                wait = min(next_session_open(now) - now, timedelta(hours=1))
+            self.stop_event.wait(max(wait.total_seconds(), 1))
+
+    def start(self):
+        """Start polling in a daemon thread if it is not running"""
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, name='quote-streamer', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Stop polling"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
@@ -3,98 +3,511 @@ Stock Ranking and Filtering Engine
 Ranks top 10 stocks for swing trading opportunities
 """
 
+import heapq
+import itertools
+import threading
+import numpy as np
 import pandas as pd
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from data_fetcher import BSEDataFetcher, BSE_TOP_STOCKS
-from swing_analyzer import SwingTradingAnalyzer
+from swing_analyzer import SwingTradingAnalyzer, build_panel
 from probability_scorer import ProbabilityScorer
+from metadata_cache import StockMetadataCache
+from singleflight import SingleFlight
+from timeframes import DEFAULT_PERIODS
+from metrics import stage_timer, recorded_stages, merge_stages
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def analyze_data(ticker, data_with_indicators, analyzer, scorer, timeframe='1d', first_passage=None,
+                 pattern_probability=None):
+    """
+    CPU part of a stock analysis: swing score, trade levels and probability
+
+    Indicators and scoring are expressed in bars, so the same rules apply to any
+    timeframe; levels and probabilities refer to bars of that timeframe.
+
+    Args:
+        ticker (str): Stock ticker
+        data_with_indicators (pd.DataFrame): OHLCV data with indicators
+        analyzer (SwingTradingAnalyzer): Analyzer to score with
+        scorer (ProbabilityScorer): Probability scorer
+        timeframe (str): Bar interval of the data
+        first_passage (float): Precomputed Monte Carlo probability for this stock,
+            from SwingTradingRanker.first_passage_probabilities (optional)
+        pattern_probability (float): Precomputed pattern probability (see
+            ProbabilityScorer.calculate_overall_probability); with it the last
+            20 bars are enough (optional)
+
+    Returns:
+        dict: Analysis results with name/sector/PE left as 'N/A', or None
+    """
+    # Get swing score
+    with stage_timer('score'):
+        swing_score_data = analyzer.calculate_swing_score(data_with_indicators, ticker)
+
+    # Calculate trade levels
+    with stage_timer('levels'):
+        trade_levels = analyzer.calculate_trade_levels(data_with_indicators)
+    if trade_levels is None:
+        return None
+
+    # Get entry time recommendation
+    with stage_timer('entry_time'):
+        entry_time = analyzer.get_entry_time(data_with_indicators)
+
+    # Calculate probability
+    with stage_timer('probability'):
+        probability = scorer.calculate_overall_probability(
+            data_with_indicators,
+            trade_levels['entry_price'],
+            trade_levels['target_price'],
+            trade_levels['stop_loss'],
+            swing_score_data['score'],
+            trade_levels['rr_ratio'],
+            first_passage,
+            pattern_probability
+        )
+
+    return {
+        'ticker': ticker,
+        'timeframe': timeframe,
+        'name': 'N/A',
+        'sector': 'N/A',
+        'current_price': trade_levels['entry_price'],
+        'entry_price': trade_levels['entry_price'],
+        'stop_loss': trade_levels['stop_loss'],
+        'target_price': trade_levels['target_price'],
+        'risk': trade_levels['risk'],
+        'reward': trade_levels['reward'],
+        'rr_ratio': trade_levels['rr_ratio'],
+        'support': trade_levels['support'],
+        'resistance': trade_levels['resistance'],
+        'entry_time': entry_time,
+        'swing_score': swing_score_data['score'],
+        'swing_score_reasons': swing_score_data['reasons'],
+        'probability_score': probability,
+        'rsi': swing_score_data['rsi'],
+        'macd': swing_score_data['macd'],
+        'pe_ratio': 'N/A',
+    }
+
+
+def to_arrays(df):
+    """Split a frame into (timestamps, columns, values) for cheap transfer to a worker process"""
+    df = df.select_dtypes('number')
+    return (
+        pd.DatetimeIndex(df.index).asi8,
+        list(df.columns),
+        np.ascontiguousarray(df.to_numpy(dtype=float))
+    )
+
+
+def scorer_config(scorer):
+    """ProbabilityScorer constructor arguments, for rebuilding it in a worker process"""
+    return {'model': scorer.model, 'paths': scorer.paths, 'horizon': scorer.horizon, 'seed': scorer.seed}
+
+
+# Per-process analyzer/scorer by scorer config, created on first use in each pool worker
+_worker_engines = {}
+
+
+def analyze_arrays(ticker, timestamps, columns, values, with_indicators=True, timeframe='1d',
+                   scorer_kwargs=None, first_passage=None):
+    """
+    Process-pool entry point: rebuild the frame from arrays and analyze it
+
+    Args:
+        ticker (str): Stock ticker
+        timestamps (np.ndarray): int64 nanosecond timestamps
+        columns (list): Column names of values
+        values (np.ndarray): 2-D float array
+        with_indicators (bool): values already hold indicator columns; if False
+            they are raw OHLCV and indicators are computed here
+        timeframe (str): Bar interval of the data
+        scorer_kwargs (dict): The parent's scorer_config (default: a default
+            ProbabilityScorer)
+        first_passage (float): Precomputed Monte Carlo probability (optional)
+
+    Returns:
+        tuple: (analysis results or None, [(stage, seconds)] timed in this process)
+    """
+    with recorded_stages() as stages:
+        try:
+            key = tuple(sorted((scorer_kwargs or {}).items()))
+            if key not in _worker_engines:
+                _worker_engines[key] = (SwingTradingAnalyzer(), ProbabilityScorer(**dict(key)))
+            analyzer, scorer = _worker_engines[key]
+
+            df = pd.DataFrame(values, index=pd.to_datetime(timestamps), columns=columns)
+            if not with_indicators:
+                with stage_timer('indicators'):
+                    df = analyzer.calculate_technical_indicators(df)
+            if len(df) < 50:
+                return None, stages
+            return analyze_data(ticker, df, analyzer, scorer, timeframe, first_passage), stages
+        except Exception as e:
+            logger.error(f"Error analyzing {ticker}: {str(e)}")
+            return None, stages
+
+
+# Orderings a scored universe can be queried by (ties broken by the second field)
+SORT_KEYS = {
+    'probability': lambda result: (result['probability_score'], result['swing_score']),
+    'swing_score': lambda result: (result['swing_score'], result['probability_score']),
+    'rr_ratio': lambda result: (result['rr_ratio'], result['probability_score']),
+}
+
+
+def select_top(results, limit=10, min_probability=0, sort_by='probability'):
+    """
+    Query a scored universe without rescanning
+
+    Args:
+        results (list): Analysis dicts, e.g. from SwingTradingRanker.score_universe
+        limit (int): Number of results to return
+        min_probability (float): Minimum probability threshold
+        sort_by (str): One of SORT_KEYS
+
+    Returns:
+        list: Best matching results first
+    """
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"sort_by must be one of {', '.join(SORT_KEYS)}")
+    passing = (result for result in results if result['probability_score'] >= min_probability)
+    return heapq.nlargest(limit, passing, key=SORT_KEYS[sort_by])
+
+
+def diff_rankings(previous, current):
+    """
+    Changes between two leaderboards
+
+    Args:
+        previous (list): Earlier results, best first
+        current (list): Newer results, best first
+
+    Returns:
+        dict: 'order' (tickers of current, best first), 'entered' (results new to
+            the board), 'updated' (results whose rank or values changed) and
+            'exited' (tickers that dropped off)
+    """
+    before = {result['ticker']: (rank, result) for rank, result in enumerate(previous)}
+    order = [result['ticker'] for result in current]
+    entered, updated = [], []
+    for rank, result in enumerate(current):
+        if result['ticker'] not in before:
+            entered.append(result)
+        elif before[result['ticker']] != (rank, result):
+            updated.append(result)
+    remaining = set(order)
+    exited = [ticker for ticker in before if ticker not in remaining]
+    return {'order': order, 'entered': entered, 'updated': updated, 'exited': exited}
+
+
+class TopKSelector:
+    """
+    Streaming top-K of analysis results, ordered by (probability_score, swing_score)
+
+    Keeps a bounded min-heap so each result costs O(log k), and can be read from
+    other threads while a scan is still feeding it. Ties keep the earlier result,
+    matching a stable sort of the full list.
+    """
+
+    def __init__(self, k):
+        """
+        Args:
+            k (int): Number of results to keep
+        """
+        self.k = k
+        self.heap = []
+        self.seen = 0
+        self.lock = threading.Lock()
+        self.counter = itertools.count()
+        self.stop_event = threading.Event()
+
+    def push(self, result):
+        """
+        Offer a result
+
+        Returns:
+            bool: True if the result entered the leaderboard
+        """
+        key = (result['probability_score'], result['swing_score'], -next(self.counter))
+        with self.lock:
+            self.seen += 1
+            if len(self.heap) < self.k:
+                heapq.heappush(self.heap, (key, result))
+                return True
+            if key > self.heap[0][0]:
+                heapq.heapreplace(self.heap, (key, result))
+                return True
+            return False
+
+    def leaderboard(self):
+        """Current top results, best first"""
+        with self.lock:
+            entries = sorted(self.heap, key=lambda entry: entry[0], reverse=True)
+        return [result for _, result in entries]
+
+    def stop(self):
+        """Ask the scan feeding this selector to finish early"""
+        self.stop_event.set()
+
+    @property
+    def stopped(self):
+        return self.stop_event.is_set()
+
+    def __len__(self):
+        return len(self.heap)
+
+
 class SwingTradingRanker:
     """Ranks stocks for swing trading opportunities"""
     
-    def __init__(self, num_workers=5):
+    def __init__(self, num_workers=5, async_fetch=False, io_workers=None, cpu_workers=0):
+        """
+        Args:
+            num_workers (int): Analysis threads (default for io_workers)
+            async_fetch (bool): Download the universe through the async fetch
+                backend (requires aiohttp) instead of yf.download
+            io_workers (int): Threads for per-ticker downloads
+            cpu_workers (int): Worker processes for the scoring math, fed NumPy
+                arrays; 0 keeps analysis on the I/O threads (use os.cpu_count()
+                to saturate the machine)
+        """
         self.fetcher = BSEDataFetcher()
         self.analyzer = SwingTradingAnalyzer()
         self.scorer = ProbabilityScorer()
+        self.metadata = StockMetadataCache(self.fetcher)
+        self.flights = SingleFlight()
         self.num_workers = num_workers
+        self.io_workers = io_workers or num_workers
+        self.cpu_workers = cpu_workers
+        self.cpu_pool = None
+        self.cpu_pool_lock = threading.Lock()  # Concurrent scans must not each start a pool
+        self.async_fetch = async_fetch
+
+        # Staged ranking: last-bar rules a candidate must pass before full scoring
+        self.prefilter_max_rsi = 70
+        self.prefilter_min_atr_pct = 0.5
+        self.prefilter_factor = 3  # Survivors kept per requested result
     
-    def analyze_single_stock(self, ticker):
+    def analyze_single_stock(self, ticker, data_with_indicators=None, include_info=True, interval='1d',
+                             first_passage=None):
         """
         Analyze a single stock for swing trading opportunity
         
         Args:
             ticker (str): Stock ticker with .BO suffix
+            data_with_indicators (pd.DataFrame): Precomputed indicator frame, e.g. one
+                entry of SwingTradingAnalyzer.calculate_panel_indicators (optional)
+            include_info (bool): Look up name/sector/PE; scans skip this and call
+                attach_stock_info on the final top N only
+            interval (str): Timeframe to analyze (e.g. '15m', '1h', '1d')
+            first_passage (float): Precomputed Monte Carlo probability, used with
+                data_with_indicators (see first_passage_probabilities)
         
         Returns:
             dict: Analysis results
         """
+        if data_with_indicators is None:
+            # Concurrent lookups of the same stock share one analysis
+            return self.flights.do(
+                ('analyze', ticker, include_info, interval),
+                self._analyze_single_stock, ticker, None, include_info, interval
+            )
+        return self._analyze_single_stock(ticker, data_with_indicators, include_info, interval, first_passage)
+
+    def _analyze_single_stock(self, ticker, data_with_indicators, include_info, interval='1d', first_passage=None):
+        """Uncoalesced analyze_single_stock"""
         try:
             logger.info(f"Analyzing {ticker}...")
             
-            # Fetch data
-            data = self.fetcher.fetch_historical_data(ticker, period="3mo")
-            if data is None or len(data) < 50:
+            if data_with_indicators is None:
+                # Fetch data
+                with stage_timer('fetch'):
+                    data = self.fetcher.fetch_historical_data(
+                        ticker, period=DEFAULT_PERIODS.get(interval, "3mo"), interval=interval
+                    )
+                if data is None or len(data) < 50:
+                    logger.warning(f"Insufficient data for {ticker}")
+                    return None
+                
+                # Calculate indicators
+                with stage_timer('indicators'):
+                    data_with_indicators = self.analyzer.calculate_technical_indicators(data)
+            elif len(data_with_indicators) < 50:
                 logger.warning(f"Insufficient data for {ticker}")
                 return None
             
-            # Calculate indicators
-            data_with_indicators = self.analyzer.calculate_technical_indicators(data)
-            
-            # Get swing score
-            swing_score_data = self.analyzer.calculate_swing_score(data_with_indicators, ticker)
-            
-            # Calculate trade levels
-            trade_levels = self.analyzer.calculate_trade_levels(data_with_indicators)
-            if trade_levels is None:
-                return None
-            
-            # Get entry time recommendation
-            entry_time = self.analyzer.get_entry_time(data_with_indicators)
-            
-            # Calculate probability
-            probability = self.scorer.calculate_overall_probability(
-                data_with_indicators,
-                trade_levels['entry_price'],
-                trade_levels['target_price'],
-                trade_levels['stop_loss'],
-                swing_score_data['score'],
-                trade_levels['rr_ratio']
+            result = analyze_data(
+                ticker, data_with_indicators, self.analyzer, self.scorer, interval, first_passage
             )
-            
+            if result is None or not include_info:
+                return result
+
             # Get stock info
-            stock_info = self.fetcher.get_stock_info(ticker)
-            
-            return {
-                'ticker': ticker,
-                'name': stock_info.get('name', 'N/A'),
-                'sector': stock_info.get('sector', 'N/A'),
-                'current_price': trade_levels['entry_price'],
-                'entry_price': trade_levels['entry_price'],
-                'stop_loss': trade_levels['stop_loss'],
-                'target_price': trade_levels['target_price'],
-                'risk': trade_levels['risk'],
-                'reward': trade_levels['reward'],
-                'rr_ratio': trade_levels['rr_ratio'],
-                'support': trade_levels['support'],
-                'resistance': trade_levels['resistance'],
-                'entry_time': entry_time,
-                'swing_score': swing_score_data['score'],
-                'swing_score_reasons': swing_score_data['reasons'],
-                'probability_score': probability,
-                'rsi': swing_score_data['rsi'],
-                'macd': swing_score_data['macd'],
-                'pe_ratio': stock_info.get('pe_ratio', 'N/A'),
-            }
+            with stage_timer('info'):
+                stock_info = self.metadata.get(ticker)
+            result['name'] = stock_info.get('name', 'N/A')
+            result['sector'] = stock_info.get('sector', 'N/A')
+            result['pe_ratio'] = stock_info.get('pe_ratio', 'N/A')
+            return result
         except Exception as e:
             logger.error(f"Error analyzing {ticker}: {str(e)}")
             return None
     
-    def get_top_stocks(self, limit=10, stock_list=None, min_probability=40):
+    def analyze_timeframes(self, ticker, intervals=('15m', '1h', '1d'), include_info=True):
+        """
+        Analyze one stock on several timeframes with a single intraday download
+
+        Args:
+            ticker (str): Stock ticker with .BO suffix
+            intervals (iterable): Timeframes to analyze
+            include_info (bool): Look up name/sector/PE
+
+        Returns:
+            dict: interval -> analysis results (None where data was insufficient)
+        """
+        frames = self.fetcher.fetch_timeframes(ticker, intervals)
+        results = {}
+        for interval in intervals:
+            data = frames.get(interval)
+            if data is None or len(data) < 50:
+                logger.warning(f"Insufficient {interval} data for {ticker}")
+                results[interval] = None
+                continue
+            results[interval] = self.analyze_single_stock(
+                ticker, self.analyzer.calculate_technical_indicators(data), include_info, interval
+            )
+        return results
+
+    def prepare_universe(self, stock_list, period="3mo", interval="1d"):
+        """
+        Bulk-download a universe and compute its indicators in one panel pass
+
+        Args:
+            stock_list (list): Tickers to prepare
+            period (str): History period
+            interval (str): Bar interval
+
+        Returns:
+            dict: ticker -> DataFrame with indicators, for the tickers that could be
+                batched; others are left to analyze_single_stock
+        """
+        try:
+            with stage_timer('universe_fetch'):
+                data_dict = self.fetcher.fetch_multiple_stocks(
+                    stock_list, period=period, interval=interval, use_async=self.async_fetch
+                )
+
+            if interval != "1d":
+                # Intraday feeds have no daily-style fallbacks; each frame is
+                # indicator-ready on its own bar calendar
+                with stage_timer('indicators'):
+                    return {
+                        ticker: self.analyzer.calculate_technical_indicators(data)
+                        for ticker, data in data_dict.items() if len(data) > 0
+                    }
+
+            # Only session-dated history shares a calendar; fallback frames with
+            # wall-clock timestamps would punch holes in everyone's rolling windows
+            batchable = {
+                ticker: data for ticker, data in data_dict.items()
+                if len(data) > 0 and (data.index == data.index.normalize()).all()
+            }
+            if not batchable:
+                return {}
+            with stage_timer('panel_indicators'):
+                return self.analyzer.calculate_panel_indicators(build_panel(batchable))
+        except Exception as e:
+            logger.error(f"Error preparing universe: {str(e)}")
+            return {}
+
+    def first_passage_probabilities(self, indicators, tickers=None):
+        """
+        Monte Carlo first-passage probabilities for prepared tickers in one batch
+
+        Only used with a simulated probability model; the values equal what each
+        analysis would simulate on its own (common random numbers), this just
+        runs the simulation as one array operation for the universe.
+
+        Args:
+            indicators (dict): ticker -> DataFrame with indicators
+            tickers (list): Subset to compute (default: all of indicators)
+
+        Returns:
+            dict: ticker -> probability (0-100), for tickers with ATR-based levels
+        """
+        if not self.scorer.simulated:
+            return {}
+        try:
+            tickers = [
+                ticker for ticker in (tickers if tickers is not None else indicators)
+                if ticker in indicators and len(indicators[ticker]) >= 50
+            ]
+            if not tickers:
+                return {}
+            last_bars = pd.DataFrame([indicators[ticker].iloc[-1] for ticker in tickers], index=tickers)
+            levels = self.analyzer.calculate_atr_levels(last_bars).dropna()
+            with stage_timer('first_passage'):
+                probabilities = self.scorer.first_passage_batch(
+                    [indicators[ticker]['Close'].to_numpy(dtype=float) for ticker in levels.index],
+                    levels['entry_price'], levels['target_price'], levels['stop_loss']
+                )
+            return dict(zip(levels.index, probabilities))
+        except Exception as e:
+            logger.error(f"Error simulating first-passage probabilities: {str(e)}")
+            return {}
+
+    def prefilter_candidates(self, indicators, limit, min_probability):
+        """
+        Cheap vectorized pass over every ticker's last bar
+
+        Drops overbought names (RSI above prefilter_max_rsi), names with neither
+        MACD momentum nor an oversold RSI, and names too quiet to swing (ATR%),
+        plus any whose best possible overall probability is below min_probability.
+        The rest are ranked by swing score and the top limit * prefilter_factor kept.
+
+        Args:
+            indicators (dict): ticker -> DataFrame with indicators
+            limit (int): Number of results the caller wants
+            min_probability (float): Minimum probability threshold
+
+        Returns:
+            list: Tickers worth full scoring, best first
+        """
+        frames = {ticker: df for ticker, df in indicators.items() if len(df) >= 2}
+        if not frames:
+            return []
+
+        current = pd.DataFrame({ticker: df.iloc[-1] for ticker, df in frames.items()}).T.astype(float)
+        previous = pd.DataFrame({ticker: df.iloc[-2] for ticker, df in frames.items()}).T.astype(float)
+
+        swing_score = self.analyzer.calculate_swing_scores(current, previous)
+        atr_pct = current['ATR'] / current['Close'] * 100
+
+        # Upper bound of calculate_overall_probability: pattern probability <= 100,
+        # RR probability <= 75
+        best_probability = 100 * 0.35 + swing_score * 0.8 * 0.35 + 75 * 0.30
+
+        keep = (
+            (current['RSI'] <= self.prefilter_max_rsi)
+            & ((current['MACD_diff'] > 0) | (current['RSI'] < 40))
+            & (atr_pct > self.prefilter_min_atr_pct)
+            & (best_probability >= min_probability)
+        )
+
+        survivors = swing_score[keep].sort_values(ascending=False, kind='stable')
+        logger.info(f"Prefilter kept {int(keep.sum())}/{len(current)} candidates")
+        return list(survivors.index[:limit * self.prefilter_factor])
+
+    def get_top_stocks(self, limit=10, stock_list=None, min_probability=40, staged=False,
+                       leaderboard=None, interval='1d', on_result=None):
         """
         Get top N stocks for swing trading
 
@@ -102,44 +515,301 @@ class SwingTradingRanker:
             limit (int): Number of top stocks to return (default: 10)
             stock_list (list): List of tickers to analyze (default: BSE_TOP_STOCKS)
             min_probability (float): Minimum probability threshold
+            staged (bool): Run prefilter_candidates first and fully score only its
+                survivors (tickers that could not be batched are always scored)
+            leaderboard (TopKSelector): Selector to fill as results complete, so other
+                threads can read a partial top N or call stop() to end the scan early
+            interval (str): Timeframe to scan (e.g. '15m', '1h', '1d')
+            on_result (callable): Called with (result, completed, total) as each
+                analysis finishes; result is None if the ticker could not be scored
 
         Returns:
             list: Top N stocks sorted by probability and swing score
         """
+        if leaderboard is not None or on_result is not None:
+            return self._get_top_stocks(
+                limit, stock_list, min_probability, staged, leaderboard, interval, on_result
+            )
+
+        # Identical scans already running are joined rather than repeated
+        key = ('scan', limit, tuple(stock_list) if stock_list else None, min_probability, staged, interval)
+        return self.flights.do(
+            key, self._get_top_stocks, limit, stock_list, min_probability, staged, None, interval
+        )
+
+    def _get_top_stocks(self, limit, stock_list, min_probability, staged, leaderboard, interval='1d',
+                        on_result=None):
+        """Uncoalesced get_top_stocks"""
         if stock_list is None:
             # Analyze more stocks than requested to filter by min_probability
             analyze_count = min(len(BSE_TOP_STOCKS), max(limit * 2, 20))
             stock_list = BSE_TOP_STOCKS[:analyze_count]
 
-        results = []
+        # An empty selector is falsy, so test for None to keep the caller's one
+        if leaderboard is None:
+            leaderboard = TopKSelector(limit)
+
+        indicators = self.prepare_universe(stock_list, DEFAULT_PERIODS.get(interval, "3mo"), interval)
+
+        if staged and indicators:
+            survivors = set(self.prefilter_candidates(indicators, limit, min_probability))
+            stock_list = [
+                ticker for ticker in stock_list
+                if ticker in survivors or ticker not in indicators
+            ]
 
         # Use thread pool for faster analysis
-        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
-            future_to_ticker = {
-                executor.submit(self.analyze_single_stock, ticker): ticker
-                for ticker in stock_list
-            }
+        with ThreadPoolExecutor(max_workers=self.io_workers) as executor:
+            first_passage = self.first_passage_probabilities(indicators, stock_list)
+            if self.cpu_workers:
+                future_to_ticker = self._submit_to_processes(
+                    executor, stock_list, indicators, interval, first_passage
+                )
+            else:
+                future_to_ticker = {
+                    executor.submit(
+                        self.analyze_single_stock, ticker, indicators.get(ticker), False, interval,
+                        first_passage.get(ticker)
+                    ): ticker
+                    for ticker in stock_list
+                }
 
             # Use timeout on as_completed to prevent infinite hangs
+            completed = 0
             try:
                 for future in as_completed(future_to_ticker, timeout=30):
+                    completed += 1
+                    result = None
                     try:
                         result = future.result(timeout=5)
                         if result and result['probability_score'] >= min_probability:
-                            results.append(result)
+                            leaderboard.push(result)
                     except Exception as e:
                         ticker = future_to_ticker.get(future, 'unknown')
                         logger.error(f"Error analyzing {ticker}: {str(e)}")
+                    if on_result is not None:
+                        on_result(result or None, completed, len(stock_list))
+                    if leaderboard.stopped:
+                        logger.info(f"Scan stopped early after {leaderboard.seen} results")
+                        for pending in future_to_ticker:
+                            pending.cancel()
+                        break
             except Exception as timeout_e:
                 logger.error(f"ThreadPoolExecutor timeout: {str(timeout_e)}")
                 # Return whatever we have so far
                 pass
 
-        # Sort by probability score (descending) and then by swing score
-        results.sort(key=lambda x: (x['probability_score'], x['swing_score']), reverse=True)
+        # Top N by probability score and then swing score, with metadata looked
+        # up for the survivors only
+        return self.attach_stock_info(leaderboard.leaderboard())
+
+    def iter_top_stocks(self, limit=10, stock_list=None, min_probability=40, interval='1d', timeout=30):
+        """
+        Scan like get_top_stocks, reporting each analysis as soon as it finishes
+
+        There is no up-front bulk download: every ticker is fetched and analyzed
+        on its own, so the first result arrives after the fastest ticker instead
+        of after the whole download. Closing the generator (e.g. when the client
+        disconnects) cancels the analyses that have not started.
+
+        Args:
+            limit (int): Size of the running top N
+            stock_list (list): List of tickers to analyze (default: as get_top_stocks)
+            min_probability (float): Minimum probability for the top N
+            interval (str): Timeframe to scan
+            timeout (float): Seconds after which the scan ends with what it has
+
+        Yields:
+            dict: {'type': 'result', 'result', 'top', 'completed', 'total'} per
+                analyzed ticker, with 'top' the running top N when this result
+                changed it (else None); then {'type': 'done', 'top', 'completed',
+                'total', 'timed_out'} with stock info attached to the final top N
+        """
+        if stock_list is None:
+            analyze_count = min(len(BSE_TOP_STOCKS), max(limit * 2, 20))
+            stock_list = BSE_TOP_STOCKS[:analyze_count]
+
+        leaderboard = TopKSelector(limit)
+        executor = ThreadPoolExecutor(max_workers=self.io_workers)
+        future_to_ticker = {
+            executor.submit(self.analyze_single_stock, ticker, None, False, interval): ticker
+            for ticker in stock_list
+        }
+        completed = 0
+        timed_out = False
+        try:
+            try:
+                for future in as_completed(future_to_ticker, timeout=timeout):
+                    completed += 1
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"Error analyzing {future_to_ticker[future]}: {str(e)}")
+                        continue
+                    if not result:
+                        continue
+                    # Names only from the cache; a lookup must not delay the result
+                    self.attach_stock_info([result], wait=False)
+                    changed = result['probability_score'] >= min_probability and leaderboard.push(result)
+                    yield {
+                        'type': 'result',
+                        'result': result,
+                        'top': leaderboard.leaderboard() if changed else None,
+                        'completed': completed,
+                        'total': len(future_to_ticker),
+                    }
+            except FuturesTimeoutError:
+                timed_out = True
+                logger.warning(f"Streaming scan timed out after {completed}/{len(future_to_ticker)} tickers")
+
+            yield {
+                'type': 'done',
+                'top': self.attach_stock_info(leaderboard.leaderboard()),
+                'completed': completed,
+                'total': len(future_to_ticker),
+                'timed_out': timed_out,
+            }
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def score_universe(self, stock_list=None, interval='1d', on_result=None):
+        """
+        Score every ticker of a universe, for answering many queries with select_top
+
+        Args:
+            stock_list (list): Tickers to score (default: BSE_TOP_STOCKS)
+            interval (str): Timeframe to score on
+            on_result (callable): Progress callback, as for get_top_stocks
+
+        Returns:
+            list: Every successfully analyzed stock with raw numeric fields,
+                sorted by probability and swing score
+        """
+        stock_list = stock_list or BSE_TOP_STOCKS
+        return self.get_top_stocks(
+            limit=len(stock_list), stock_list=stock_list, min_probability=0, interval=interval,
+            on_result=on_result
+        )
+
+    def _submit_to_processes(self, executor, stock_list, indicators, interval='1d', first_passage=None):
+        """
+        Queue analyses on the process pool
+
+        Prepared tickers go to the pool first; the rest are downloaded on the
+        I/O threads, each going to the pool (which computes its indicators) as
+        soon as its own download finishes. Workers score with this ranker's
+        scorer configuration, and their stage timings are merged into the
+        parent's metrics.
 
-        # Return top N
-        return results[:limit]
+        Returns:
+            dict: future -> ticker; each future resolves to the analysis result
+        """
+        pool = self._process_pool()
+        first_passage = first_passage or {}
+        scorer_kwargs = scorer_config(self.scorer)
+
+        def settle(outcome, result=None, error=None):
+            try:
+                if error is not None:
+                    outcome.set_exception(error)
+                else:
+                    outcome.set_result(result)
+            except InvalidStateError:
+                pass  # Cancelled by the scan meanwhile
+
+        def resolve(outcome, analysis):
+            try:
+                result, stages = analysis.result()
+            except Exception as e:
+                settle(outcome, error=e)
+                return
+            merge_stages(stages)
+            settle(outcome, result)
+
+        def analyze(ticker, outcome, data, with_indicators):
+            if outcome.cancelled():
+                return
+            try:
+                analysis = pool.submit(
+                    analyze_arrays, ticker, *to_arrays(data), with_indicators=with_indicators,
+                    timeframe=interval, scorer_kwargs=scorer_kwargs, first_passage=first_passage.get(ticker)
+                )
+            except RuntimeError as e:
+                # The pool was shut down by close() during the scan
+                settle(outcome, error=e)
+                return
+            analysis.add_done_callback(lambda done: resolve(outcome, done))
+
+        def download(ticker, outcome):
+            if outcome.cancelled():
+                return
+            try:
+                with stage_timer('fetch'):
+                    data = self.fetcher.fetch_historical_data(
+                        ticker, period=DEFAULT_PERIODS.get(interval, "3mo"), interval=interval
+                    )
+                if data is None or len(data) < 50:
+                    logger.warning(f"Insufficient data for {ticker}")
+                    settle(outcome, None)
+                    return
+                if isinstance(data.columns, pd.MultiIndex):
+                    data = data.copy()
+                    data.columns = data.columns.get_level_values(0)
+                analyze(ticker, outcome, data, with_indicators=False)
+            except Exception as e:
+                settle(outcome, error=e)
+
+        # Prepared tickers first, so the pool starts while downloads are in flight
+        future_to_ticker = {}
+        prepared = [ticker for ticker in stock_list if ticker in indicators]
+        missing = [ticker for ticker in stock_list if ticker not in indicators]
+        for ticker in prepared + missing:
+            future_to_ticker[Future()] = ticker
+        for outcome, ticker in future_to_ticker.items():
+            if ticker in indicators:
+                analyze(ticker, outcome, indicators[ticker], with_indicators=True)
+            else:
+                executor.submit(download, ticker, outcome)
+        return future_to_ticker
+
+    def _process_pool(self):
+        """The analysis process pool, started on first use"""
+        with self.cpu_pool_lock:
+            if self.cpu_pool is None:
+                self.cpu_pool = ProcessPoolExecutor(max_workers=self.cpu_workers)
+            return self.cpu_pool
+
+    def close(self):
+        """Shut down the analysis process pool, if one was started"""
+        with self.cpu_pool_lock:
+            pool, self.cpu_pool = self.cpu_pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    def attach_stock_info(self, results, wait=True):
+        """
+        Fill name, sector and PE from the metadata cache
+
+        Args:
+            results (list): Analysis dicts from analyze_single_stock
+            wait (bool): Fetch missing info now; if False, tickers without cached
+                info keep 'N/A' and are fetched in the background
+
+        Returns:
+            list: The same dicts, updated in place
+        """
+        tickers = [result['ticker'] for result in results]
+        if wait:
+            with stage_timer('info'):
+                infos = self.metadata.get_many(tickers)
+        else:
+            infos = {ticker: self.metadata.get(ticker, wait=False) for ticker in tickers}
+        for result in results:
+            stock_info = infos.get(result['ticker'], {})
+            result['name'] = stock_info.get('name', 'N/A')
+            result['sector'] = stock_info.get('sector', 'N/A')
+            result['pe_ratio'] = stock_info.get('pe_ratio', 'N/A')
+        return results
 
     def get_top_10_stocks(self, stock_list=None, min_probability=40):
         """
@@ -154,7 +824,8 @@ class SwingTradingRanker:
         """
         return self.get_top_stocks(limit=10, stock_list=stock_list, min_probability=min_probability)
     
-    def format_for_display(self, stock_data):
+    @staticmethod
+    def format_for_display(stock_data):
         """
         Format stock data for web display
         
@@ -166,6 +837,7 @@ class SwingTradingRanker:
         """
         return {
             'ticker': stock_data['ticker'],
+            'timeframe': stock_data.get('timeframe', '1d'),
             'name': stock_data['name'],
             'sector': stock_data['sector'],
             'current_price': f"₹{stock_data['current_price']:.2f}",
@@ -0,0 +1,195 @@
+"""
+Background Refresher
+Recomputes expensive results (universe scans) on a market-hours-aware cadence so
+requests are answered from the last good result instead of waiting for a scan
+"""
+
+import logging
+import threading
+from datetime import timedelta
+
+from market_calendar import exchange_now, next_refresh_time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class RefreshJob:
+    """State of one registered computation"""
+
+    def __init__(self, key, compute, on_update=None):
+        self.key = key
+        self.compute = compute
+        self.on_update = on_update
+        self.value = None
+        self.computed_at = None
+        self.error = None
+        self.retry_at = None
+        self.forced = False
+        self.running = False
+
+
+class BackgroundRefresher:
+    """
+    Runs registered computations in a daemon thread and serves their last result
+
+    Jobs run one at a time (a universe scan already uses its own worker pools).
+    A job is due when it has no result, was triggered, or its result has aged
+    past market_calendar.next_refresh_time; failures keep the last good result
+    and are retried after retry_interval.
+    """
+
+    def __init__(self, market_interval=timedelta(minutes=5), idle_interval=timedelta(hours=12),
+                 retry_interval=timedelta(minutes=1)):
+        """
+        Args:
+            market_interval (timedelta): Refresh cadence while BSE is open
+            idle_interval (timedelta): Refresh cadence while it is closed
+            retry_interval (timedelta): Delay before retrying a failed computation
+        """
+        self.market_interval = market_interval
+        self.idle_interval = idle_interval
+        self.retry_interval = retry_interval
+        self.jobs = {}
+        self.condition = threading.Condition()
+        self.thread = None
+        self.stopping = False
+
+    def register(self, key, compute, value=None, computed_at=None, on_update=None):
+        """
+        Add a computation (no-op if the key is already registered)
+
+        Args:
+            key (str): Job name
+            compute (callable): Produces the result; raising keeps the previous one
+            value: Previously computed result to serve until the first refresh (optional)
+            computed_at (datetime): Exchange-local time value was computed
+            on_update (callable): Called with (value, computed_at) after each success
+        """
+        with self.condition:
+            if key not in self.jobs:
+                job = RefreshJob(key, compute, on_update)
+                job.value = value
+                job.computed_at = computed_at
+                self.jobs[key] = job
+                self.condition.notify_all()
+        self.start()
+
+    def start(self):
+        """Start the refresh thread if it is not running"""
+        with self.condition:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.stopping = False
+            self.thread = threading.Thread(target=self._run, name='background-refresher', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Stop the refresh thread after the current job"""
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+
+    def trigger(self, key):
+        """Ask for a job to be recomputed as soon as possible"""
+        with self.condition:
+            job = self.jobs.get(key)
+            if job is not None:
+                job.forced = True
+                job.retry_at = None
+                self.condition.notify_all()
+
+    def stale_at(self, job):
+        """Exchange-local time a job's result becomes stale (None if it has none)"""
+        if job.computed_at is None:
+            return None
+        return next_refresh_time(job.computed_at, self.market_interval, self.idle_interval)
+
+    def _due_at(self, job, now):
+        if job.running:
+            return None
+        if job.retry_at is not None:
+            return job.retry_at
+        if job.forced or job.computed_at is None:
+            return now
+        return self.stale_at(job)
+
+    def get(self, key, wait=None):
+        """
+        Read a job's latest result
+
+        Args:
+            key (str): Job name
+            wait (float): Seconds to wait for a first result when none exists yet
+
+        Returns:
+            dict: value, computed_at, stale, refreshing and error; None if the
+                key is not registered
+        """
+        with self.condition:
+            job = self.jobs.get(key)
+            if job is None:
+                return None
+            if job.value is None and wait:
+                attempts = job.computed_at, job.error
+                self.condition.wait_for(
+                    lambda: (job.computed_at, job.error) != attempts and not job.running,
+                    timeout=wait
+                )
+
+            stale_at = self.stale_at(job)
+            return {
+                'value': job.value,
+                'computed_at': job.computed_at,
+                'stale': stale_at is None or job.forced or exchange_now() >= stale_at,
+                'refreshing': job.running or job.forced,
+                'error': job.error,
+            }
+
+    def _run(self):
+        while True:
+            with self.condition:
+                if self.stopping:
+                    return
+                now = exchange_now()
+                due = [(self._due_at(job, now), job) for job in self.jobs.values()]
+                due = [(at, job) for at, job in due if at is not None]
+                ready = [job for at, job in due if at <= now]
+                if not ready:
+                    timeout = min((at - now).total_seconds() for at, _ in due) if due else None
+                    self.condition.wait(timeout=timeout)
+                    continue
+                job = ready[0]
+                job.running = True
+                job.forced = False
+
+            self._refresh(job)
+
+    def _refresh(self, job):
+        logger.info(f"Refreshing {job.key}...")
+        try:
+            value = job.compute()
+            error = None
+        except Exception as e:
+            logger.error(f"Background refresh of {job.key} failed: {str(e)}")
+            value, error = None, str(e)
+
+        with self.condition:
+            job.running = False
+            if error is None:
+                job.value = value
+                job.computed_at = exchange_now()
+                job.error = None
+                job.retry_at = None
+            else:
+                job.error = error
+                job.retry_at = exchange_now() + self.retry_interval
+            self.condition.notify_all()
+
+        if error is None:
+            logger.info(f"✓ Refreshed {job.key}")
+            if job.on_update is not None:
+                try:
+                    job.on_update(job.value, job.computed_at)
+                except Exception as e:
+                    logger.error(f"Error handling refresh of {job.key}: {str(e)}")
@@ -0,0 +1,256 @@
+"""
+Host-Shared Cache
+Cache backend shared by every worker process on a host (SQLite in WAL mode, or
+any Redis-compatible server) so scans and downloads run once per host rather
+than once per gunicorn worker
+"""
+
+import os
+import time
+import uuid
+import pickle
+import sqlite3
+import logging
+import tempfile
+import threading
+
+# redis is only needed for the Redis backend
+try:
+    import redis
+except ImportError:
+    redis = None
+
+from http_archive import provider_mode
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SQLiteBackend:
+    """Key/value table plus leases in one SQLite file (WAL, so readers never block)"""
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str): Database file (default: shared.db in the user cache directory,
+                or the temp directory if that is not writable)
+        """
+        if path is None:
+            path = os.path.join(os.path.expanduser('~'), '.cache', 'bse-swing-trading', 'shared.db')
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            except OSError:
+                path = os.path.join(tempfile.gettempdir(), 'bse-swing-trading-shared.db')
+        self.path = path
+        self.local = threading.local()
+        self._connect().executescript("""
+            CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB, expires_at REAL);
+            CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT, expires_at REAL);
+        """)
+
+    def _connect(self):
+        # One connection per thread; autocommit so transactions are explicit
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            'SELECT value FROM entries WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl):
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            'INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, value, now + ttl)
+        )
+        conn.execute('DELETE FROM entries WHERE expires_at <= ?', (now,))
+
+    def delete(self, key):
+        self._connect().execute('DELETE FROM entries WHERE key = ?', (key,))
+
+    def acquire(self, name, owner, timeout):
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT expires_at FROM leases WHERE name = ?', (name,)).fetchone()
+            acquired = row is None or row[0] <= now
+            if acquired:
+                conn.execute(
+                    'INSERT OR REPLACE INTO leases (name, owner, expires_at) VALUES (?, ?, ?)',
+                    (name, owner, now + timeout)
+                )
+            conn.execute('COMMIT')
+            return acquired
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def release(self, name, owner):
+        self._connect().execute('DELETE FROM leases WHERE name = ? AND owner = ?', (name, owner))
+
+
+class RedisBackend:
+    """Backend over a Redis-compatible client (redis.Redis or any stand-in with get/set/delete)"""
+
+    def __init__(self, client, prefix='bse-swing-trading:'):
+        """
+        Args:
+            client: Object with redis-py's get(key), set(key, value, ex=, px=, nx=)
+                and delete(key)
+            prefix (str): Namespace for this application's keys
+        """
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, value, px=max(int(ttl * 1000), 1))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def acquire(self, name, owner, timeout):
+        return bool(self.client.set(self.prefix + name, owner, nx=True, px=int(timeout * 1000)))
+
+    def release(self, name, owner):
+        key = self.prefix + name
+        current = self.client.get(key)
+        if current is not None and (current.decode() if isinstance(current, bytes) else current) == owner:
+            self.client.delete(key)
+
+
+class HostCache:
+    """
+    Pickled values in a shared backend, with per-key leases so that when several
+    processes miss at once only one computes and the rest wait for its result
+    """
+
+    def __init__(self, backend, lease_timeout=120, poll_interval=0.25):
+        """
+        Args:
+            backend (SQLiteBackend or RedisBackend): Storage shared by the workers
+            lease_timeout (float): Seconds after which a computing worker's lease
+                lapses (e.g. it crashed) and another worker takes over
+            poll_interval (float): Seconds between checks while waiting on another worker
+        """
+        self.backend = backend
+        self.lease_timeout = lease_timeout
+        self.poll_interval = poll_interval
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex}"
+
+    @staticmethod
+    def _key(key):
+        return key if isinstance(key, str) else repr(key)
+
+    def get(self, key):
+        """
+        Returns:
+            The stored value, or None if missing, expired or unreadable
+        """
+        try:
+            payload = self.backend.get(self._key(key))
+            return pickle.loads(payload) if payload is not None else None
+        except Exception as e:
+            logger.warning(f"Shared cache read failed for {key}: {str(e)}")
+            return None
+
+    def set(self, key, value, ttl):
+        """Store a value for ttl seconds (None values are not stored)"""
+        if value is None or ttl <= 0:
+            return
+        try:
+            self.backend.set(self._key(key), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ttl)
+        except Exception as e:
+            logger.warning(f"Shared cache write failed for {key}: {str(e)}")
+
+    def delete(self, key):
+        try:
+            self.backend.delete(self._key(key))
+        except Exception as e:
+            logger.warning(f"Shared cache delete failed for {key}: {str(e)}")
+
+    def get_or_compute(self, key, compute, ttl):
+        """
+        Return the host-wide value for key, computing it in at most one worker
+
+        Args:
+            key (hashable): Cache key
+            compute (callable): Produces the value (None results are not shared)
+            ttl (float): Seconds the computed value is shared for
+
+        Returns:
+            The value
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        lease = f"lease:{self._key(key)}"
+        owner = f"{self.owner}-{threading.get_ident()}"
+        while True:
+            try:
+                acquired = self.backend.acquire(lease, owner, self.lease_timeout)
+            except Exception as e:
+                logger.warning(f"Shared cache lease failed for {key}: {str(e)}")
+                return compute()
+
+            if acquired:
+                try:
+                    # Another worker may have finished between our miss and the lease
+                    value = self.get(key)
+                    if value is None:
+                        value = compute()
+                        self.set(key, value, ttl)
+                    return value
+                finally:
+                    self.backend.release(lease, owner)
+
+            time.sleep(self.poll_interval)
+            value = self.get(key)
+            if value is not None:
+                return value
+
+
+_host_cache = None
+_host_cache_lock = threading.Lock()
+
+
+def host_cache_from_env():
+    """
+    HostCache configured by $SHARED_CACHE_URL, or None when it is unset or
+    upstream responses are being replayed ($DATA_PROVIDER=replay), since shared
+    results may come from other runs
+
+    Accepted values: 'sqlite' (default file), 'sqlite:///path/to/file.db',
+    'redis://host:port/db'.
+    """
+    global _host_cache
+    url = os.environ.get('SHARED_CACHE_URL')
+    if not url or provider_mode() == 'replay':
+        return None
+    with _host_cache_lock:
+        if _host_cache is None:
+            if url.startswith('redis://') or url.startswith('rediss://'):
+                if redis is None:
+                    raise ImportError("redis is required for SHARED_CACHE_URL=redis://... (pip install redis)")
+                backend = RedisBackend(redis.Redis.from_url(url))
+            elif url == 'sqlite':
+                backend = SQLiteBackend()
+            elif url.startswith('sqlite:///'):
+                backend = SQLiteBackend(url[len('sqlite:///'):])
+            else:
+                raise ValueError(f"Unsupported SHARED_CACHE_URL: {url}")
+            _host_cache = HostCache(backend)
+            logger.info(f"✓ Using shared cache {url}")
+        return _host_cache
@@ -0,0 +1,60 @@
+"""
+Request Coalescing
+Single-flight execution: concurrent callers asking for the same work wait on one
+in-progress computation instead of each starting their own
+"""
+
+import logging
+import threading
+from concurrent.futures import Future
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls by key"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.shared = 0  # Calls answered by another caller's computation
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs), or wait for the identical call already running
+
+        The leader's result (or exception) is handed to every caller that joined
+        while it was running; later calls start a new computation.
+
+        Args:
+            key (hashable): Identity of the work
+            fn (callable): Work to run
+
+        Returns:
+            The result of fn
+        """
+        with self.lock:
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.in_flight[key] = future
+            else:
+                self.shared += 1
+
+        if not leader:
+            logger.info(f"Waiting on in-flight {key}")
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.in_flight[key]
@@ -2,6 +2,11 @@
 const API_BASE = '/api';
 let currentStocks = [];
 
+// Scored universe pushed by /api/stream (ticker -> row); filters apply locally
+let universe = new Map();
+let streamVersion = -1;
+let streamTimestamp = null;
+
 // Metric definitions for tooltips
 const METRIC_INFO = {
     'Ticker': 'Stock Symbol: BSE/NSE stock ticker code (e.g., RELIANCE.BO)',
@@ -23,11 +28,85 @@ const METRIC_INFO = {
 
 // Initialize on page load
 document.addEventListener('DOMContentLoaded', function() {
-    loadStocks(false);
     setupEventListeners();
     initializeTooltips();
+    connectStream();
 });
 
+// Follow ranking updates pushed by the server instead of polling
+function connectStream() {
+    if (!window.EventSource) {
+        loadStocks(false);
+        return;
+    }
+
+    showLoading(true);
+    const stream = new EventSource(`${API_BASE}/stream`);
+
+    stream.addEventListener('snapshot', (e) => {
+        const snapshot = JSON.parse(e.data);
+        universe = new Map(snapshot.data.map(stock => [stock.ticker, stock]));
+        streamVersion = snapshot.version;
+        // Version 0: the first scan is still running, keep the loader up
+        if (snapshot.version > 0) {
+            streamTimestamp = snapshot.timestamp;
+            renderUniverse();
+        }
+    });
+
+    stream.addEventListener('diff', (e) => {
+        const diff = JSON.parse(e.data);
+        // Already part of the snapshot we hold
+        if (diff.version <= streamVersion) return;
+        streamVersion = diff.version;
+        streamTimestamp = diff.timestamp;
+        diff.entered.concat(diff.updated).forEach(stock => universe.set(stock.ticker, stock));
+        diff.exited.forEach(ticker => universe.delete(ticker));
+        renderUniverse();
+    });
+
+    stream.onerror = () => {
+        // No stream endpoint (e.g. serverless deployment): fall back to requests.
+        // Otherwise EventSource reconnects on its own and we get a fresh snapshot.
+        if (streamVersion < 0) {
+            stream.close();
+            loadStocks(false);
+        }
+    };
+}
+
+// Apply the filters to the streamed universe
+function renderUniverse() {
+    const minProb = parseFloat(document.getElementById('probabilityFilter').value);
+    const count = parseInt(document.getElementById('countFilter').value, 10);
+
+    currentStocks = Array.from(universe.values())
+        .filter(stock => parseFloat(stock.probability_score) >= minProb)
+        .sort((a, b) =>
+            parseFloat(b.probability_score) - parseFloat(a.probability_score) ||
+            parseFloat(b.swing_score) - parseFloat(a.swing_score))
+        .slice(0, count);
+
+    showLoading(false);
+    hideAllMessages();
+    if (currentStocks.length === 0) {
+        displayStocks();
+        showError('No stocks found matching your criteria. Try lowering the minimum probability.');
+    } else {
+        displayStocks();
+        showStatus({ timestamp: streamTimestamp, count: currentStocks.length });
+    }
+}
+
+// Re-filter locally while streaming, otherwise ask the API
+function applyFilters() {
+    if (streamVersion > 0) {
+        renderUniverse();
+    } else {
+        loadStocks(false);
+    }
+}
+
 // Setup event listeners
 function setupEventListeners() {
     document.getElementById('refreshBtn').addEventListener('click', () => {
@@ -36,11 +115,11 @@ function setupEventListeners() {
 
     document.getElementById('probabilityFilter').addEventListener('change', (e) => {
         document.getElementById('probabilityValue').textContent = e.target.value + '%';
-        loadStocks(true);
+        applyFilters();
     });
 
     document.getElementById('countFilter').addEventListener('change', () => {
-        loadStocks(false);
+        applyFilters();
     });
 
     // Close modal when clicking outside
@@ -60,7 +139,7 @@ async function loadStocks(refresh) {
     hideAllMessages();
 
     try {
-        const url = `${API_BASE}/top-stocks?min_probability=${minProb}&count=${count}&refresh=${refresh}`;
+        const url = `${API_BASE}/top-stocks?min_probability=${minProb}&limit=${count}&refresh=${refresh}`;
 
         // Set timeout for mobile browsers
         const controller = new AbortController();
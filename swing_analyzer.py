@@ -53,6 +53,27 @@ class BollingerBands:
         return upper_band, sma, lower_band
 
 
+OHLCV_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Adj Close']
+
+
+def build_panel(data_dict):
+    """
+    Build a wide OHLCV panel from per-ticker DataFrames
+
+    Args:
+        data_dict (dict): ticker -> OHLCV DataFrame
+
+    Returns:
+        dict: field -> DataFrame (dates x tickers) aligned on the union of dates
+    """
+    panel = {}
+    for field in OHLCV_FIELDS:
+        columns = {ticker: df[field] for ticker, df in data_dict.items() if field in df.columns}
+        if columns:
+            panel[field] = pd.concat(columns, axis=1).sort_index()
+    return panel
+
+
 class SwingTradingAnalyzer:
     """Analyzes stocks for swing trading opportunities"""
     
@@ -60,6 +81,7 @@ class SwingTradingAnalyzer:
         self.min_rsi_oversold = 30
         self.max_rsi_overbought = 70
         self.support_resistance_periods = 20
+        self.target_atr_multiplier = 2.5
     
     def calculate_technical_indicators(self, df):
         """
@@ -109,6 +131,94 @@ class SwingTradingAnalyzer:
             logger.error(f"Error calculating indicators: {str(e)}")
             return df
     
+    def calculate_panel_indicators(self, panel):
+        """
+        Calculate technical indicators for a whole universe in one pass
+
+        Every indicator is computed column-wise on dates x tickers frames, so
+        the per-ticker pandas overhead of calculate_technical_indicators is
+        paid once per universe instead of once per stock. Tickers missing a bar
+        inside their own history (e.g. a suspension) would have those gaps
+        blank every rolling window spanning them, so they go through
+        calculate_technical_indicators on their own rows instead; results match
+        the per-ticker pipeline either way.
+
+        Args:
+            panel (dict or pd.DataFrame): Either field -> DataFrame (dates x tickers),
+                as returned by build_panel, or a DataFrame with (field, ticker)
+                MultiIndex columns (the yf.download layout; (ticker, field)
+                from group_by='ticker' is accepted too)
+
+        Returns:
+            dict: ticker -> DataFrame with the same columns as
+                calculate_technical_indicators, restricted to the dates on
+                which that ticker has a Close
+        """
+        try:
+            if isinstance(panel, pd.DataFrame):
+                if 'Close' not in panel.columns.get_level_values(0):
+                    panel = panel.swaplevel(axis=1)
+                panel = {field: panel[field] for field in panel.columns.get_level_values(0).unique()}
+
+            close = panel['Close']
+            high = panel['High'].reindex_like(close)
+            low = panel['Low'].reindex_like(close)
+
+            fields = {field: panel[field].reindex_like(close) for field in OHLCV_FIELDS if field in panel}
+
+            # RSI treats missing deltas as zero moves, so mask the warm-up rows
+            # of tickers whose history starts later than the panel
+            if len(close) >= 14:
+                rsi = RSI.calculate(close, period=14)
+                fields['RSI'] = rsi.where(close.notna().cumsum() >= 14, 50)
+            else:
+                fields['RSI'] = pd.DataFrame(50.0, index=close.index, columns=close.columns)
+
+            macd, signal_line, histogram = MACD.calculate(close, fast=12, slow=26, signal=9)
+            fields['MACD'] = macd
+            fields['MACD_signal'] = signal_line
+            fields['MACD_diff'] = histogram
+
+            bb_upper, bb_middle, bb_lower = BollingerBands.calculate(close, period=20, std_dev=2)
+            fields['BB_upper'] = bb_upper
+            fields['BB_middle'] = bb_middle
+            fields['BB_lower'] = bb_lower
+
+            fields['SMA_20'] = close.rolling(window=20).mean()
+            fields['SMA_50'] = close.rolling(window=50).mean()
+            fields['SMA_200'] = close.rolling(window=200).mean()
+
+            prev_close = close.shift()
+            fields['TR'] = np.maximum(
+                high - low,
+                np.maximum(abs(high - prev_close), abs(low - prev_close))
+            )
+            fields['ATR'] = fields['TR'].rolling(window=14).mean()
+
+            # Stack into a (fields, dates, tickers) cube and slice per ticker
+            names = list(fields.keys())
+            cube = np.stack([fields[name].to_numpy(dtype=float) for name in names])
+            close_idx = names.index('Close')
+            ohlcv = [name for name in names if name in OHLCV_FIELDS]
+
+            # Missing Closes after a ticker's first bar and before its last one
+            listed = close.notna()
+            gapped = (~listed & listed.cummax() & listed[::-1].cummax()[::-1]).any()
+
+            results = {}
+            for j, ticker in enumerate(close.columns):
+                values = cube[:, :, j].T
+                rows = ~np.isnan(values[:, close_idx])
+                if gapped[ticker]:
+                    bars = pd.DataFrame(values[rows][:, :len(ohlcv)], index=close.index[rows], columns=ohlcv)
+                    results[ticker] = self.calculate_technical_indicators(bars)[names]
+                else:
+                    results[ticker] = pd.DataFrame(values[rows], index=close.index[rows], columns=names)
+            return results
+        except Exception as e:
+            logger.error(f"Error calculating panel indicators: {str(e)}")
+            return {}
+
     def identify_support_resistance(self, df, lookback=20):
         """
         Identify support and resistance levels
@@ -208,6 +318,65 @@ class SwingTradingAnalyzer:
             logger.error(f"Error calculating swing score: {str(e)}")
             return {'score': 0, 'reasons': [str(e)], 'rsi': None, 'macd': None, 'close': None}
     
+    def calculate_swing_scores(self, current, previous):
+        """
+        Vectorized swing score for many rows at once
+
+        Applies the scoring rules of calculate_swing_score row by row across
+        aligned frames, e.g. the last bar of every ticker in a universe or
+        every bar of one ticker's history (previous = df.shift()).
+
+        Args:
+            current (pd.DataFrame): Rows with indicator columns
+            previous (pd.DataFrame): The bar before each row, aligned with current
+
+        Returns:
+            pd.Series: Score (0-100) per row
+        """
+        rsi = current['RSI']
+        close = current['Close']
+        score = pd.Series(0.0, index=current.index)
+
+        # RSI Analysis (30 weight)
+        score += np.select(
+            [
+                rsi < self.min_rsi_oversold,
+                (rsi >= self.min_rsi_oversold) & (rsi <= 40),
+                (rsi >= 60) & (rsi <= self.max_rsi_overbought),
+            ],
+            [30, 20, 10],
+            default=0
+        )
+
+        # MACD Analysis (25 weight)
+        above_signal = current['MACD'] > current['MACD_signal']
+        crossover = above_signal & (previous['MACD'] <= previous['MACD_signal'])
+        score += np.select(
+            [crossover, above_signal, current['MACD_diff'] > 0],
+            [25, 15, 10],
+            default=0
+        )
+
+        # Bollinger Bands Analysis (20 weight)
+        score += np.select(
+            [close < current['BB_lower'], close < current['BB_middle']],
+            [20, 10],
+            default=0
+        )
+
+        # Volatility Analysis (15 weight)
+        atr_pct = (current['ATR'] / close) * 100
+        score += np.select(
+            [(atr_pct > 1) & (atr_pct < 5), atr_pct > 0.5],
+            [15, 8],
+            default=0
+        )
+
+        # Trend Analysis (10 weight)
+        score += np.where((close > current['SMA_20']) & (current['SMA_20'] > current['SMA_50']), 5, 0)
+
+        return score.clip(upper=100)
+
     def calculate_trade_levels(self, df, atr_multiplier=1.5):
         """
         Calculate entry price, stop loss, and target price
@@ -237,7 +406,7 @@ class SwingTradingAnalyzer:
             
             # Target price based on resistance or 2xATR profit
             if pd.notna(current['ATR']):
-                profit_target = entry_price + (current['ATR'] * 2.5)
+                profit_target = entry_price + (current['ATR'] * self.target_atr_multiplier)
             else:
                 profit_target = entry_price * 1.05
             
@@ -260,6 +429,31 @@ class SwingTradingAnalyzer:
             logger.error(f"Error calculating trade levels: {str(e)}")
             return None
     
+    def calculate_atr_levels(self, df, atr_multiplier=1.5):
+        """
+        Vectorized ATR trade levels for every row, as calculate_trade_levels sets them
+
+        Rows without an ATR get NaN levels (calculate_trade_levels falls back to
+        support or percentage levels there).
+
+        Args:
+            df (pd.DataFrame): Rows with Close and ATR columns
+            atr_multiplier (float): Multiplier for ATR-based stop loss
+
+        Returns:
+            pd.DataFrame: entry_price, stop_loss, target_price and rr_ratio per row
+        """
+        entry_price = df['Close']
+        stop_loss = entry_price - df['ATR'] * atr_multiplier
+        target_price = entry_price + df['ATR'] * self.target_atr_multiplier
+        risk = entry_price - stop_loss
+        return pd.DataFrame({
+            'entry_price': entry_price,
+            'stop_loss': stop_loss,
+            'target_price': target_price,
+            'rr_ratio': ((target_price - entry_price) / risk).where(risk > 0, 0.0),
+        }, index=df.index)
+
     def get_entry_time(self, df):
         """
         Determine optimal entry time based on recent price action
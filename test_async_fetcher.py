@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the async fetch layer
+Runs AsyncFetcher against a local stub HTTP server
+"""
+
+import sys
+import os
+import json
+import time
+import asyncio
+import threading
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from async_fetcher import AsyncFetcher
+from web_scraper import WebScraper
+from test_ohlcv_store import with_host_tz
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves canned Yahoo/NSE/Moneycontrol responses and tracks concurrency"""
+
+    in_flight = 0
+    max_in_flight = 0
+    chart_starts = []
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            time.sleep(0.05)
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+            if url.path.startswith('/v8/finance/chart/'):
+                ticker = url.path.rsplit('/', 1)[-1]
+                if ticker == 'MISSING.BO':
+                    return self._send(404, b'{}')
+                start = int(query['period1'][0])
+                cls.chart_starts.append(start)
+                body = {'chart': {'result': [{
+                    'timestamp': [start + 86400 * i for i in range(3)],
+                    'indicators': {'quote': [{
+                        'open': [1.0, 2.0, 3.0], 'high': [1.5, 2.5, 3.5],
+                        'low': [0.5, 1.5, 2.5], 'close': [1.2, 2.2, 3.2],
+                        'volume': [100, 200, 300]
+                    }]}
+                }]}}
+                return self._send(200, json.dumps(body).encode())
+            if url.path == '/api/quote-equity':
+                body = {'priceInfo': {'lastPrice': 2500.5, 'symbol': query['symbol'][0]}}
+                return self._send(200, json.dumps(body).encode())
+            if url.path.startswith('/india/stockpricequote/'):
+                return self._send(200, '<span class="price">₹ 1,234.50</span>'.encode(), 'text/html')
+            return self._send(404, b'not found', 'text/html')
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+
+@pytest.fixture(scope="module")
+def stub_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_fetch_charts_respects_host_limit(stub_url):
+    StubHandler.max_in_flight = 0
+    tickers = [f"T{i}.BO" for i in range(20)] + ['MISSING.BO']
+
+    async def run():
+        async with AsyncFetcher(per_host_limit=4, base_urls={'yahoo': stub_url}) as client:
+            return await client.fetch_charts(tickers)
+
+    frames = asyncio.run(run())
+
+    assert set(frames) == set(tickers) - {'MISSING.BO'}
+    assert list(frames['T0.BO']['Close']) == [1.2, 2.2, 3.2]
+    assert 1 < StubHandler.max_in_flight <= 4
+
+
+def test_tail_start_is_sent_as_ist_on_utc_hosts(stub_url):
+    StubHandler.chart_starts = []
+
+    async def run():
+        async with AsyncFetcher(base_urls={'yahoo': stub_url}) as client:
+            # Last stored bar: 10:00 IST, i.e. 04:30 UTC
+            return await client.fetch_chart('T0.BO', start=datetime(2026, 10, 15, 10, 0), interval='15m')
+
+    assert with_host_tz('UTC', lambda: asyncio.run(run())) is not None
+    assert StubHandler.chart_starts == [int(pd.Timestamp('2026-10-15 04:30', tz='UTC').timestamp())]
+
+
+def test_nse_quote_and_scrapers(stub_url):
+    scraper = WebScraper(base_urls={key: stub_url for key in
+                                    ('moneycontrol', 'economictimes', 'nseindia', 'bseindia', 'tradingview')})
+
+    async def run():
+        async with AsyncFetcher(base_urls={'nse': stub_url}, scraper=scraper) as client:
+            return await asyncio.gather(client.fetch_nse_quote('RELIANCE'), client.scrape_price('RELIANCE'))
+
+    quote, scraped = asyncio.run(run())
+
+    assert quote['lastPrice'] == 2500.5
+    assert scraped['source'] == 'moneycontrol'
+    assert scraped['current_price'] == 1234.5
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the backtester
+Checks vectorized first-touch resolution against a bar-by-bar replay
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from test_indicators import make_ohlcv
+from backtest import Backtester, first_touch, TARGET, STOP, TIMEOUT, OPEN
+from swing_analyzer import SwingTradingAnalyzer
+
+
+def replay(codes, open_, high, low, close, stop, target, horizon):
+    """Bar-by-bar reference for first_touch"""
+    outcomes, exits, prices = [], [], []
+    for i in range(len(close)):
+        outcome, exit_index, price = OPEN, -1, np.nan
+        for j in range(i + 1, i + horizon + 1):
+            if j >= len(close) or codes[j] != codes[i]:
+                break
+            if low[j] <= stop[i]:
+                outcome, exit_index, price = STOP, j, min(open_[j], stop[i])
+                break
+            if high[j] >= target[i]:
+                outcome, exit_index, price = TARGET, j, max(open_[j], target[i])
+                break
+            if j == i + horizon:
+                outcome, exit_index, price = TIMEOUT, j, close[j]
+        outcomes.append(outcome)
+        exits.append(exit_index)
+        prices.append(price)
+    return outcomes, exits, prices
+
+
+def test_first_touch_matches_replay():
+    frames = [make_ohlcv(seed, days=days) for seed, days in ((1, 120), (2, 45), (3, 90))]
+    codes = np.concatenate([np.full(len(df), code) for code, df in enumerate(frames)])
+    bars = {field: np.concatenate([df[field].to_numpy() for df in frames]) for field in ('Open', 'High', 'Low', 'Close')}
+    rng = np.random.default_rng(0)
+    stop = bars['Close'] * (1 - rng.uniform(0.01, 0.05, len(codes)))
+    target = bars['Close'] * (1 + rng.uniform(0.01, 0.08, len(codes)))
+    stop[::7] = np.nan
+    target[::7] = np.nan
+
+    for horizon in (1, 5, 20):
+        got = first_touch(codes, bars['Open'], bars['High'], bars['Low'], bars['Close'], stop, target, horizon)
+        outcomes, exits, prices = replay(codes, bars['Open'], bars['High'], bars['Low'], bars['Close'],
+                                         stop, target, horizon)
+        assert list(got['outcome']) == outcomes
+        assert list(got['exit_index']) == exits
+        np.testing.assert_allclose(got['exit_price'], prices)
+
+
+def test_trades_use_the_analyzer_levels():
+    analyzer = SwingTradingAnalyzer()
+    history = {'AAA.BO': make_ohlcv(7, days=300), 'BBB.BO': make_ohlcv(8, days=200)}
+    trades = Backtester(analyzer, min_score=40, one_position_per_ticker=False).run(history)
+    assert len(trades) > 0 and set(trades['ticker']) <= set(history)
+
+    trade = trades.iloc[len(trades) // 2]
+    df = analyzer.calculate_technical_indicators(history[trade['ticker']])
+    upto = df.loc[:trade['entry_date']]
+    levels = analyzer.calculate_trade_levels(upto)
+    assert np.isclose(trade['stop_loss'], levels['stop_loss'])
+    assert np.isclose(trade['target_price'], levels['target_price'])
+    assert trade['swing_score'] == analyzer.calculate_swing_score(upto, trade['ticker'])['score']
+
+    # One position at a time never overlaps trades of a ticker
+    single = Backtester(analyzer, min_score=40).run(history)
+    for _, group in single[single['outcome'] != OPEN].groupby('ticker'):
+        assert (group['entry_date'].iloc[1:].to_numpy() >= group['exit_date'].iloc[:-1].to_numpy()).all()
+
+    summary = Backtester.summarize(single)
+    assert summary['trades'] == summary['targets'] + summary['stops'] + summary['timeouts']
+
+
+if __name__ == "__main__":
+    test_first_touch_matches_replay()
+    test_trades_use_the_analyzer_levels()
+    print("✓ All backtest tests passed")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the benchmark suite
+"""
+
+import sys
+import os
+import json
+import logging
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+from benchmark import synthetic_universe, run_benchmarks, compare, main
+
+
+def test_synthetic_universe_is_deterministic():
+    first = synthetic_universe(5, "3mo", seed=3)
+    second = synthetic_universe(5, "3mo", seed=3)
+    assert list(first) == list(second)
+    for ticker in first:
+        pd.testing.assert_frame_equal(first[ticker], second[ticker])
+    df = first[next(iter(first))]
+    assert (df['High'] >= df['Close']).all() and (df['Low'] <= df['Close']).all()
+    assert len(synthetic_universe(2, "1y")[next(iter(first))]) > len(df)
+
+
+def test_every_stage_runs_on_a_tiny_universe():
+    run = run_benchmarks(tickers=[10], periods=["3mo"], repeat=1)
+    stages = run['results']['10x3mo']
+    assert {'indicators', 'panel_indicators', 'scan', 'backtest', 'first_passage'} <= set(stages)
+    for measured in stages.values():
+        assert measured['seconds'] > 0 and measured['rows_per_sec'] > 0 and measured['peak_mb'] >= 0
+
+
+def test_baseline_comparison_flags_regressions():
+    baseline = {'results': {'10x3mo': {'scan': {'seconds': 1.0}, 'backtest': {'seconds': 1.0}}}}
+    current = {'results': {'10x3mo': {
+        'scan': {'seconds': 1.05}, 'backtest': {'seconds': 2.0}, 'indicators': {'seconds': 1.0}
+    }}}
+    rows = {row['stage']: row for row in compare(current, baseline, tolerance=0.10)}
+    assert set(rows) == {'scan', 'backtest'}  # Stages missing from the baseline are skipped
+    assert not rows['scan']['regression']
+    assert rows['backtest']['regression'] and rows['backtest']['speedup'] == 0.5
+
+    path = os.path.join(tempfile.mkdtemp(), 'baseline.json')
+    args = ['--tickers', '10', '--periods', '3mo', '--stages', 'indicators', '--repeat', '1', '--baseline', path]
+    assert main(args + ['--save-baseline']) == 0
+    with open(path) as f:
+        saved = json.load(f)
+    # An impossibly fast baseline makes the next run a regression
+    saved['results']['10x3mo']['indicators']['seconds'] = 1e-9
+    with open(path, 'w') as f:
+        json.dump(saved, f)
+    assert main(args) == 0
+    assert main(args + ['--fail-on-regression']) == 1
+    # Logging is only silenced while the benchmarks run
+    assert logging.root.manager.disable == logging.NOTSET
+
+
+if __name__ == "__main__":
+    test_synthetic_universe_is_deterministic()
+    test_every_stage_runs_on_a_tiny_universe()
+    test_baseline_comparison_flags_regressions()
+    print("✓ All benchmark tests passed")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the ranking broadcaster
+"""
+
+import sys
+import os
+import json
+import threading
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from broadcast import RankingBroadcaster, ScanProgress, format_sse
+
+
+def display(result):
+    return {'ticker': result['ticker'], 'probability_score': f"{result['probability_score']:.1f}%"}
+
+
+def result(ticker, probability):
+    return {'ticker': ticker, 'probability_score': probability, 'swing_score': 50}
+
+
+def test_publishes_visible_changes_only():
+    broadcaster = RankingBroadcaster(display)
+    subscription = broadcaster.subscribe()
+    now = datetime(2024, 6, 28, 10, 0)
+
+    broadcaster.publish_universe([result('A', 60), result('B', 50)], now)
+    first = subscription.get_nowait()
+    assert [row['ticker'] for row in first['entered']] == ['A', 'B'] and first['version'] == 1
+
+    # Below display precision: nothing is pushed
+    assert broadcaster.publish_updates([result('B', 50.01)], now) is None
+    assert subscription.empty()
+
+    event = broadcaster.publish_updates([result('C', 70)], now)
+    assert event['order'] == ['C', 'A', 'B'] and [row['ticker'] for row in event['entered']] == ['C']
+    assert broadcaster.publish_universe([result('A', 60), result('C', 70)], now)['exited'] == ['B']
+    assert [row['ticker'] for row in broadcaster.snapshot()['data']] == ['C', 'A']
+
+
+def test_slow_subscriber_is_resynced():
+    broadcaster = RankingBroadcaster(display, max_pending=2)
+    subscription = broadcaster.subscribe()
+    for i in range(5):
+        broadcaster.publish_universe([result('A', 50 + i)], datetime(2024, 6, 28, 10, i))
+    assert subscription.get_nowait() is None
+    assert subscription.empty()
+
+    broadcaster.unsubscribe(subscription)
+    assert len(broadcaster) == 0
+
+
+def test_format_sse():
+    message = format_sse('diff', {'version': 3, 'timestamp': datetime(2024, 6, 28)}, 3)
+    lines = message.split('\n')
+    assert lines[:2] == ['id: 3', 'event: diff'] and message.endswith('\n\n')
+    assert json.loads(lines[2][len('data: '):]) == {'version': 3, 'timestamp': '2024-06-28T00:00:00'}
+
+
+def test_clients_share_one_scan():
+    progress = ScanProgress()
+    generation, running = progress.state()
+    assert (generation, running) == (0, False)
+    now = datetime(2024, 6, 28, 10, 0)
+
+    # A client waiting for the next scan, and one joining it halfway
+    early = []
+    follower = threading.Thread(target=lambda: early.extend(progress.follow(generation + 1, timeout=5)))
+    follower.start()
+    progress.begin()
+    progress.add(result('A', 60), 1, 3)
+    progress.add(None, 2, 3)
+    late = progress.follow(progress.state()[0], timeout=5)
+    assert next(late) == {'type': 'result', 'result': result('A', 60), 'completed': 2, 'total': 3}
+    progress.add(result('B', 50), 3, 3)
+    progress.finish([result('A', 60), result('B', 50)], now)
+    follower.join(timeout=5)
+
+    late = [next(late)] + list(late)
+    assert [event['result']['ticker'] for event in early[:-1]] == ['A', 'B']
+    assert [event['result']['ticker'] for event in late[:-1]] == ['B']
+    for events in (early, late):
+        done = events[-1]
+        assert done['type'] == 'done' and not done['timed_out'] and done['finished_at'] == now
+        assert [stock['ticker'] for stock in done['value']] == ['A', 'B'] and done['completed'] == 3
+
+    # Nothing new within the timeout ends the stream without a result
+    progress.begin()
+    done = list(progress.follow(progress.state()[0], timeout=0.05))[-1]
+    assert done['timed_out'] and done['value'] is None
+
+
+if __name__ == "__main__":
+    test_publishes_visible_changes_only()
+    test_slow_subscriber_is_resynced()
+    test_format_sse()
+    test_clients_share_one_scan()
+    print("✓ All broadcast tests passed")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Offline tests for bulk universe downloads (fetch_multiple_stocks) with a stubbed yf.download
+"""
+
+import sys
+import os
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from data_fetcher import BSEDataFetcher
+from ohlcv_store import OHLCVStore
+from ttl_cache import TTLCache
+from benchmark import synthetic_universe
+
+
+class FallbackCountingFetcher(BSEDataFetcher):
+    """Records per-ticker fallbacks instead of downloading them"""
+
+    def __init__(self, fallback, **kwargs):
+        super().__init__(**kwargs)
+        self.fallback = fallback
+        self.fallbacks = []
+
+    def fetch_historical_data(self, ticker, period="3mo", interval="1d"):
+        self.fallbacks.append(ticker)
+        return self.fallback.get(ticker)
+
+
+def offline_fetcher(fallback=None):
+    return FallbackCountingFetcher(fallback or {}, store=OHLCVStore(tempfile.mkdtemp()), cache=TTLCache())
+
+
+def bulk_frame(universe):
+    """Frame shaped like yf.download(..., group_by='ticker'): (ticker, field) columns"""
+    return pd.concat(universe, axis=1)
+
+
+def with_download(download, run):
+    original = yf.download
+    yf.download = download
+    try:
+        return run()
+    finally:
+        yf.download = original
+
+
+def test_bulk_download_splits_per_ticker():
+    universe = synthetic_universe(3, '3mo', seed=6, end=pd.Timestamp.now().normalize())
+    tickers = list(universe)
+    empty = tickers[2]
+    raw = universe.copy()
+    raw[empty] = raw[empty] * np.nan  # Listed in the response, but without a single bar
+    calls = []
+
+    def download(requested, **kwargs):
+        calls.append((list(requested), kwargs))
+        return bulk_frame(raw)
+
+    fetcher = offline_fetcher({empty: universe[empty], 'GONE.BO': None})
+    data = with_download(download, lambda: fetcher.fetch_multiple_stocks(tickers + ['GONE.BO']))
+
+    assert len(calls) == 1 and calls[0][0] == tickers + ['GONE.BO'] and calls[0][1]['group_by'] == 'ticker'
+    for ticker in tickers[:2]:
+        assert list(data[ticker].columns) == list(universe[ticker].columns)
+        assert np.allclose(data[ticker]['Close'].to_numpy(), universe[ticker]['Close'].to_numpy())
+        # Stored for the next scan
+        assert fetcher.store.last_timestamp(ticker, '1d') == universe[ticker].index[-1]
+    # Tickers the bulk call did not deliver fall back to single downloads
+    assert fetcher.fallbacks == [empty, 'GONE.BO']
+    assert data[empty] is universe[empty] and 'GONE.BO' not in data
+
+
+def test_failed_bulk_download_falls_back_per_ticker():
+    universe = synthetic_universe(2, '3mo', seed=7, end=pd.Timestamp.now().normalize())
+
+    def download(requested, **kwargs):
+        raise ConnectionError('rate limited')
+
+    fetcher = offline_fetcher(universe)
+    data = with_download(download, lambda: fetcher.fetch_multiple_stocks(list(universe)))
+    assert fetcher.fallbacks == list(universe)
+    assert set(data) == set(universe)
+
+
+if __name__ == "__main__":
+    test_bulk_download_splits_per_ticker()
+    test_failed_bulk_download_falls_back_per_ticker()
+    print("✓ All bulk download tests passed")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the indicator engines
+Checks that the batch/vectorized paths agree with the per-ticker pipeline
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from swing_analyzer import SwingTradingAnalyzer, build_panel
+from incremental_indicators import IncrementalIndicators
+from probability_scorer import ProbabilityScorer
+
+
+def make_ohlcv(seed, days=250, end="2024-06-28"):
+    """Deterministic synthetic OHLCV frame"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=end, periods=days)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, days)))
+    high = close * (1 + np.abs(rng.normal(0, 0.01, days)))
+    low = close * (1 - np.abs(rng.normal(0, 0.01, days)))
+    open_ = np.roll(close, 1)
+    open_[0] = close[0]
+    volume = rng.integers(500000, 5000000, days).astype(float)
+    return pd.DataFrame({
+        'Open': open_, 'High': high, 'Low': low, 'Close': close,
+        'Volume': volume, 'Adj Close': close
+    }, index=dates)
+
+
+def test_panel_matches_single_ticker():
+    analyzer = SwingTradingAnalyzer()
+    # Different lengths exercise the NaN-padded panel
+    frames = {
+        'AAA.BO': make_ohlcv(1),
+        'BBB.BO': make_ohlcv(2, days=120),
+        'CCC.BO': make_ohlcv(3, days=60),
+    }
+
+    panel_results = analyzer.calculate_panel_indicators(build_panel(frames))
+
+    assert set(panel_results) == set(frames)
+    for ticker, df in frames.items():
+        expected = analyzer.calculate_technical_indicators(df)
+        got = panel_results[ticker]
+        assert list(got.columns) == list(expected.columns)
+        pd.testing.assert_frame_equal(got, expected.astype(float), check_freq=False)
+
+
+def test_panel_matches_single_ticker_with_gaps():
+    analyzer = SwingTradingAnalyzer()
+    suspended = make_ohlcv(4)
+    # Missing sessions inside the history, as after a suspension
+    suspended = suspended.drop(suspended.index[[100, 180, 181, 182]])
+    frames = {'AAA.BO': make_ohlcv(1), 'GAP.BO': suspended, 'CCC.BO': make_ohlcv(3, days=60)}
+
+    panel_results = analyzer.calculate_panel_indicators(build_panel(frames))
+
+    for ticker, df in frames.items():
+        expected = analyzer.calculate_technical_indicators(df)
+        got = panel_results[ticker]
+        assert list(got.columns) == list(expected.columns)
+        pd.testing.assert_frame_equal(got, expected.astype(float), check_freq=False)
+    assert panel_results['GAP.BO'][['SMA_50', 'ATR', 'BB_upper']].iloc[-60:].notna().all().all()
+
+
+def test_incremental_matches_full_recompute():
+    analyzer = SwingTradingAnalyzer()
+    df = make_ohlcv(4, days=300)
+    expected = analyzer.calculate_technical_indicators(df)
+
+    state = IncrementalIndicators.from_history(df.iloc[:250])
+    for timestamp, bar in zip(df.index[250:], df.iloc[250:].to_dict('records')):
+        state.update(bar, timestamp=timestamp)
+
+    got = state.to_frame()
+    pd.testing.assert_frame_equal(
+        got, expected.tail(len(got)).astype(float), check_freq=False, rtol=1e-8
+    )
+    assert analyzer.calculate_swing_score(got, 'X')['score'] == \
+        analyzer.calculate_swing_score(expected, 'X')['score']
+
+
+def test_incremental_replace_last():
+    analyzer = SwingTradingAnalyzer()
+    df = make_ohlcv(5, days=120)
+    state = IncrementalIndicators.from_history(df.iloc[:-1])
+
+    # A provisional bar followed by its final revision
+    state.update(dict(df.iloc[-2]), timestamp=df.index[-1])
+    state.replace_last(dict(df.iloc[-1]))
+
+    expected = analyzer.calculate_technical_indicators(df).iloc[-1]
+    got = state.to_frame().iloc[-1]
+    np.testing.assert_allclose(got[expected.index].astype(float), expected.astype(float), rtol=1e-8)
+
+
+def test_vectorized_swing_scores_match_per_row():
+    analyzer = SwingTradingAnalyzer()
+    df = analyzer.calculate_technical_indicators(make_ohlcv(6, days=200))
+    scores = analyzer.calculate_swing_scores(df, df.shift())
+    expected = [analyzer.calculate_swing_score(df.iloc[:i + 1], 'X')['score'] for i in range(len(df))]
+    assert list(scores) == expected
+
+
+def reference_similar_patterns(df):
+    """Row-by-row version of ProbabilityScorer._find_similar_patterns"""
+    current_rsi = df['RSI'].iloc[-1]
+    similar = [i for i, rsi in enumerate(df['RSI']) if current_rsi - 10 <= rsi <= current_rsi + 10]
+    if len(similar) < 3:
+        return {'win_rate': 50, 'samples': len(similar)}
+    wins = total = 0
+    for pos in similar[:-1]:
+        if pos + 1 < len(df) - 1:
+            future_price = df['Close'].iloc[pos + 1:min(pos + 21, len(df))].max()
+            if future_price > df['Close'].iloc[pos] * 1.02:
+                wins += 1
+            total += 1
+    return {'win_rate': (wins / total * 100) if total > 0 else 50, 'samples': total}
+
+
+def test_similar_patterns_matches_reference():
+    analyzer = SwingTradingAnalyzer()
+    scorer = ProbabilityScorer()
+    for seed in range(10):
+        for days in (15, 60, 500):
+            df = analyzer.calculate_technical_indicators(make_ohlcv(seed, days=days))
+            assert scorer._find_similar_patterns(df, df['Close'].iloc[-1]) == reference_similar_patterns(df)
+
+
+if __name__ == "__main__":
+    test_panel_matches_single_ticker()
+    test_panel_matches_single_ticker_with_gaps()
+    test_incremental_matches_full_recompute()
+    test_incremental_replace_last()
+    test_vectorized_swing_scores_match_per_row()
+    test_similar_patterns_matches_reference()
+    print("✓ All indicator tests passed")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the stock metadata cache
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from metadata_cache import StockMetadataCache
+from ttl_cache import TTLCache
+
+
+class CountingFetcher:
+    """Stock info source counting calls per ticker"""
+
+    def __init__(self, gate=None):
+        self.calls = {}
+        self.lock = threading.Lock()
+        self.gate = gate
+
+    def get_stock_info(self, ticker):
+        if self.gate is not None:
+            self.gate.wait(5)
+        with self.lock:
+            self.calls[ticker] = self.calls.get(ticker, 0) + 1
+        return {'name': f'{ticker} Ltd', 'version': self.calls[ticker]}
+
+
+def test_disk_round_trip():
+    path = os.path.join(tempfile.mkdtemp(), 'metadata.json')
+    first = StockMetadataCache(CountingFetcher(), path=path, cache=TTLCache())
+    assert first.get('A.BO') == {'name': 'A.BO Ltd', 'version': 1}
+    assert first.get('A.BO') == {'name': 'A.BO Ltd', 'version': 1} and first.fetcher.calls == {'A.BO': 1}
+
+    second = StockMetadataCache(CountingFetcher(), path=path, cache=TTLCache())
+    assert second.get('A.BO') == {'name': 'A.BO Ltd', 'version': 1}
+    assert second.fetcher.calls == {}
+
+
+def test_stale_entries_are_served_and_refreshed_once():
+    path = os.path.join(tempfile.mkdtemp(), 'metadata.json')
+    old = (datetime.now() - timedelta(days=2)).isoformat()
+    with open(path, 'w') as f:
+        json.dump({'A.BO': {'info': {'name': 'Old'}, 'fetched_at': old}}, f)
+
+    gate = threading.Event()
+    metadata = StockMetadataCache(CountingFetcher(gate), path=path, cache=TTLCache())
+    assert [metadata.get('A.BO') for _ in range(5)] == [{'name': 'Old'}] * 5
+    gate.set()
+    metadata.executor.shutdown(wait=True)
+    assert metadata.fetcher.calls == {'A.BO': 1}
+    assert metadata.get('A.BO') == {'name': 'A.BO Ltd', 'version': 1}
+
+
+def test_missing_entries_without_waiting():
+    metadata = StockMetadataCache(
+        CountingFetcher(), path=os.path.join(tempfile.mkdtemp(), 'metadata.json'), cache=TTLCache()
+    )
+    assert metadata.get('A.BO', wait=False) == {}
+    metadata.executor.shutdown(wait=True)
+    assert metadata.fetcher.calls == {'A.BO': 1}
+    assert metadata.get('A.BO', wait=False) == {'name': 'A.BO Ltd', 'version': 1}
+
+
+def test_concurrent_misses_share_one_fetch():
+    gate = threading.Event()
+    metadata = StockMetadataCache(
+        CountingFetcher(gate), path=os.path.join(tempfile.mkdtemp(), 'metadata.json'), cache=TTLCache()
+    )
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(metadata.get('A.BO'))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    # Let every caller reach the cache before the upstream answers
+    for _ in range(200):
+        if metadata.flights.shared == len(threads) - 1:
+            break
+        threading.Event().wait(0.01)
+    gate.set()
+    for thread in threads:
+        thread.join()
+    assert metadata.fetcher.calls == {'A.BO': 1}
+    assert results == [{'name': 'A.BO Ltd', 'version': 1}] * len(threads)
+
+
+def test_evicted_entries_stay_on_disk():
+    path = os.path.join(tempfile.mkdtemp(), 'metadata.json')
+    fetcher = CountingFetcher()
+    metadata = StockMetadataCache(fetcher, path=path, cache=TTLCache(max_entries=2))
+    tickers = [f'T{i}.BO' for i in range(5)]
+    for ticker in tickers:
+        metadata.get(ticker)
+
+    with open(path) as f:
+        assert sorted(json.load(f)) == tickers
+    # Evicted from memory, still served without refetching
+    assert metadata.get('T0.BO') == {'name': 'T0.BO Ltd', 'version': 1}
+    assert fetcher.calls['T0.BO'] == 1
+
+    reloaded = StockMetadataCache(CountingFetcher(), path=path, cache=TTLCache(max_entries=2))
+    assert {ticker: reloaded.get(ticker)['name'] for ticker in tickers} == {t: f'{t} Ltd' for t in tickers}
+    assert reloaded.fetcher.calls == {}
+
+
+if __name__ == "__main__":
+    test_disk_round_trip()
+    test_stale_entries_are_served_and_refreshed_once()
+    test_missing_entries_without_waiting()
+    test_concurrent_misses_share_one_fetch()
+    test_evicted_entries_stay_on_disk()
+    print("✓ All metadata cache tests passed")
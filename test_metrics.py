@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the runtime metrics
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import metrics
+from metrics import MetricsRegistry, STAGE_SECONDS, FETCH_ATTEMPTS, fetch_timer, register_cache
+from ttl_cache import TTLCache
+from test_indicators import make_ohlcv
+from swing_analyzer import SwingTradingAnalyzer
+from probability_scorer import ProbabilityScorer
+from ranker import analyze_data
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('demo_seconds', 'Demo latency', ['stage'], buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, stage='a"b')
+    lines = registry.render().splitlines()
+    assert lines[:2] == ['# HELP demo_seconds Demo latency', '# TYPE demo_seconds histogram']
+    assert 'demo_seconds_bucket{stage="a\\"b",le="0.1"} 2' in lines
+    assert 'demo_seconds_bucket{stage="a\\"b",le="1.0"} 3' in lines
+    assert 'demo_seconds_bucket{stage="a\\"b",le="+Inf"} 4' in lines
+    assert 'demo_seconds_sum{stage="a\\"b"} 3.65' in lines
+    assert 'demo_seconds_count{stage="a\\"b"} 4' in lines
+
+
+def test_fetch_timer_counts_outcomes():
+    before = {outcome: FETCH_ATTEMPTS.get(source='test_source', outcome=outcome) for outcome in ('ok', 'empty', 'error')}
+    with fetch_timer('test_source') as attempt:
+        attempt.data = make_ohlcv(0, days=5)
+    with fetch_timer('test_source'):
+        pass
+    try:
+        with fetch_timer('test_source'):
+            raise ConnectionError('unreachable')
+    except ConnectionError:
+        pass
+    for outcome in ('ok', 'empty', 'error'):
+        assert FETCH_ATTEMPTS.get(source='test_source', outcome=outcome) == before[outcome] + 1
+
+
+def test_analysis_stages_and_cache_ratios_are_exported():
+    counts = {stage: STAGE_SECONDS.get(stage=stage)['count'] for stage in ('score', 'levels', 'probability')}
+    df = SwingTradingAnalyzer().calculate_technical_indicators(make_ohlcv(1, days=80))
+    assert analyze_data('T.BO', df, SwingTradingAnalyzer(), ProbabilityScorer()) is not None
+    for stage, count in counts.items():
+        assert STAGE_SECONDS.get(stage=stage)['count'] == count + 1
+
+    cache = TTLCache()
+    cache.set(('history', 'T.BO'), 1)
+    cache.get(('history', 'T.BO'))
+    cache.get(('history', 'U.BO'))
+    cache.get(('metadata', 'T.BO'))
+    assert cache.stats()['namespaces'] == {
+        'history': {'hits': 1, 'misses': 1}, 'metadata': {'hits': 0, 'misses': 1}
+    }
+    register_cache('test', cache)
+    text = metrics.render()
+    assert 'swing_cache_lookups_total{cache="test",namespace="history",result="hit"} 1' in text
+    assert 'swing_cache_hit_ratio{cache="test",namespace="history"} 0.5' in text
+    assert 'swing_stage_seconds_count{stage="probability"}' in text
+
+
+if __name__ == "__main__":
+    test_histogram_renders_cumulative_buckets()
+    test_fetch_timer_counts_outcomes()
+    test_analysis_stages_and_cache_ratios_are_exported()
+    print("✓ All metrics tests passed")
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the on-disk OHLCV store and the tail-delta fetch path
+"""
+
+import sys
+import os
+import time
+import tempfile
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+import yfinance as yf
+
+from ohlcv_store import OHLCVStore, period_start
+from data_fetcher import BSEDataFetcher
+from ttl_cache import TTLCache
+from benchmark import synthetic_universe
+
+
+def daily_bars(days=30, seed=0):
+    """Synthetic daily bars ending today"""
+    universe = synthetic_universe(1, '3mo', seed=seed, end=pd.Timestamp.now().normalize())
+    return next(iter(universe.values())).tail(days)
+
+
+def test_append_dedupe_and_reopen():
+    root = tempfile.mkdtemp()
+    bars = daily_bars()
+    store = OHLCVStore(root)
+    store.write('T.BO', '1d', bars.iloc[:20], covered_from=bars.index[0].to_pydatetime())
+
+    # The tail overlaps the last two stored bars, with a revised close on them
+    tail = bars.iloc[18:].copy()
+    tail.loc[tail.index[:2], 'Close'] += 1.0
+    store.write('T.BO', '1d', tail)
+
+    reopened = OHLCVStore(root)
+    loaded = reopened.load('T.BO', '1d')
+    assert len(loaded) == len(bars) and loaded.index.is_unique and loaded.index.is_monotonic_increasing
+    assert list(loaded.index) == list(bars.index)
+    assert (loaded['Close'].iloc[18:20] == bars['Close'].iloc[18:20] + 1.0).all()
+    assert (loaded['Close'].iloc[:18] == bars['Close'].iloc[:18]).all()
+    assert reopened.last_timestamp('T.BO', '1d') == bars.index[-1]
+    assert reopened.covered_from('T.BO', '1d') == bars.index[0].to_pydatetime()
+    assert len(reopened.load('T.BO', '1d', start=bars.index[-5])) == 5
+    assert reopened.load('OTHER.BO', '1d') is None and reopened.last_timestamp('OTHER.BO', '1d') is None
+
+
+class TailFetcher(BSEDataFetcher):
+    """Fetcher whose upstream only answers tail requests, from a fixed frame"""
+
+    def __init__(self, upstream, **kwargs):
+        super().__init__(**kwargs)
+        self.upstream = upstream
+        self.tail_starts = []
+
+    def _fetch_tail(self, ticker, start, interval="1d"):
+        self.tail_starts.append(start)
+        return self.upstream[self.upstream.index >= pd.Timestamp(start)]
+
+
+def test_tail_delta_fetch_extends_stored_history():
+    root = tempfile.mkdtemp()
+    bars = synthetic_universe(1, '6mo', seed=2, end=pd.Timestamp.now().normalize())
+    bars = next(iter(bars.values()))
+    stored = bars.iloc[:-3]
+    store = OHLCVStore(root)
+    store.write('T.BO', '1d', stored, covered_from=datetime.now() - timedelta(days=200))
+
+    fetcher = TailFetcher(bars, store=store, cache=TTLCache())
+    data = fetcher.fetch_historical_data('T.BO', period='3mo')
+
+    # Only bars since the last stored one were requested
+    assert fetcher.tail_starts == [stored.index[-1].to_pydatetime()]
+    assert data.index[-1] == bars.index[-1] and data.index.is_unique
+    assert data.index[0] >= pd.Timestamp(datetime.now() - timedelta(days=92)).normalize()
+    assert store.last_timestamp('T.BO', '1d') == bars.index[-1]
+    assert store.refreshed_at('T.BO', '1d') is not None
+
+    # A reopened store serves the extended history
+    assert OHLCVStore(root).last_timestamp('T.BO', '1d') == bars.index[-1]
+
+
+class NoHistoryTicker:
+    """yf.Ticker stand-in without history, so the fetcher falls back to yf.download"""
+
+    def __init__(self, ticker):
+        self.session = None
+
+    def history(self, **kwargs):
+        return pd.DataFrame()
+
+
+def test_nse_fallback_is_stored_under_the_nse_ticker():
+    bars = daily_bars()
+    store = OHLCVStore(tempfile.mkdtemp())
+    fetcher = BSEDataFetcher(store=store, cache=TTLCache())
+    download = lambda ticker, **kwargs: bars if ticker == 'T.NS' else pd.DataFrame()
+
+    originals = yf.Ticker, yf.download
+    yf.Ticker, yf.download = NoHistoryTicker, download
+    try:
+        data = fetcher.fetch_historical_data('T.BO', period='1mo')
+    finally:
+        yf.Ticker, yf.download = originals
+
+    assert len(data) == len(bars)
+    # Later .BO tail fetches must not extend NSE history
+    assert store.load('T.BO', '1d') is None and store.last_timestamp('T.BO', '1d') is None
+    assert list(store.load('T.NS', '1d').index) == list(data.index)
+
+
+class RecordingSession:
+    """requests.Session stand-in that records query parameters and answers 404"""
+
+    def __init__(self):
+        self.params = []
+        self.headers = {}
+
+    def get(self, url, params=None, **kwargs):
+        self.params.append(params)
+        return type('Response', (), {'status_code': 404})()
+
+
+def with_host_tz(tz, run):
+    """Run with the process timezone set to tz (POSIX only)"""
+    saved = os.environ.get('TZ')
+    os.environ['TZ'] = tz
+    time.tzset()
+    try:
+        return run()
+    finally:
+        if saved is None:
+            os.environ.pop('TZ', None)
+        else:
+            os.environ['TZ'] = saved
+        time.tzset()
+
+
+def test_tail_request_starts_at_the_stored_ist_bar_on_utc_hosts():
+    fetcher = BSEDataFetcher(store=OHLCVStore(tempfile.mkdtemp()), cache=TTLCache())
+    fetcher.session = RecordingSession()
+    # Last stored bar: 10:00 IST, i.e. 04:30 UTC
+    stored = datetime(2026, 10, 15, 10, 0)
+    with_host_tz('UTC', lambda: fetcher._fetch_via_yahoo_api('T.BO', start=stored, interval='15m'))
+    assert fetcher.session.params[0]['period1'] == int(pd.Timestamp('2026-10-15 04:30', tz='UTC').timestamp())
+
+
+def test_period_start_uses_the_exchange_clock_on_utc_hosts():
+    start = with_host_tz('UTC', lambda: period_start('1mo'))
+    expected = pd.Timestamp.now(tz='Asia/Kolkata').tz_localize(None) - pd.Timedelta(days=30)
+    assert abs(pd.Timestamp(start) - expected) < pd.Timedelta(minutes=1)
+
+
+if __name__ == "__main__":
+    test_append_dedupe_and_reopen()
+    test_tail_delta_fetch_extends_stored_history()
+    test_nse_fallback_is_stored_under_the_nse_ticker()
+    test_tail_request_starts_at_the_stored_ist_bar_on_utc_hosts()
+    test_period_start_uses_the_exchange_clock_on_utc_hosts()
+    print("✓ All OHLCV store tests passed")
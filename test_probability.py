@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the Monte Carlo first-passage probability
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from test_indicators import make_ohlcv
+from probability_scorer import ProbabilityScorer, simulate_first_passage
+from ranker import SwingTradingRanker, analyze_data
+
+
+def test_driftless_gbm_matches_gamblers_ruin():
+    # Brownian log price: P(up a before down b) = b / (a + b) once either is hit
+    returns = np.array([[0.01, -0.01]])
+    probability = simulate_first_passage(
+        returns, [0.10], [-0.05], horizon=3000, paths=2000, method='gbm', seed=1
+    )
+    assert abs(probability[0] - 100 / 3) < 4
+
+
+def test_batch_matches_single_stock():
+    closes = [make_ohlcv(seed, days=days)['Close'].to_numpy() for seed, days in ((1, 60), (2, 90), (3, 30))]
+    entry = np.array([close[-1] for close in closes])
+    for model in ('gbm', 'bootstrap'):
+        scorer = ProbabilityScorer(model=model, paths=500)
+        batch = scorer.first_passage_batch(closes, entry, entry * 1.05, entry * 0.97)
+        singles = [
+            scorer.first_passage_batch([close], [price], [price * 1.05], [price * 0.97])[0]
+            for close, price in zip(closes, entry)
+        ]
+        np.testing.assert_array_equal(batch, singles)
+        # Same seed, same answer; a closer target is reached more often
+        np.testing.assert_array_equal(batch, scorer.first_passage_batch(closes, entry, entry * 1.05, entry * 0.97))
+        assert (scorer.first_passage_batch(closes, entry, entry * 1.02, entry * 0.97) >= batch).all()
+
+
+def test_unusable_levels_score_neutral_in_every_model():
+    close = make_ohlcv(1, days=60)['Close'].to_numpy()
+    price = close[-1]
+    levels = [(np.nan, price * 0.97), (price * 1.05, np.nan), (np.inf, price * 0.97), (price * 1.05, -np.inf)]
+    for model in ('gbm', 'bootstrap'):
+        scorer = ProbabilityScorer(model=model, paths=200)
+        probability = scorer.first_passage_batch(
+            [close] * len(levels), [price] * len(levels), *zip(*levels)
+        )
+        np.testing.assert_array_equal(probability, [50.0] * len(levels))
+    scorer = ProbabilityScorer(model='z_score')
+    assert scorer._z_score_probability(np.nan, 2.0) == 50
+    assert scorer._z_score_probability(np.inf, 2.0) == 50
+
+
+def test_scan_precomputation_matches_per_stock_analysis():
+    ranker = SwingTradingRanker()
+    ranker.scorer = ProbabilityScorer(model='bootstrap', paths=300)
+    indicators = {
+        f'T{i}.BO': ranker.analyzer.calculate_technical_indicators(make_ohlcv(i, days=80)) for i in range(6)
+    }
+    precomputed = ranker.first_passage_probabilities(indicators)
+    assert set(precomputed) == set(indicators)
+    for ticker, df in indicators.items():
+        expected = analyze_data(ticker, df, ranker.analyzer, ranker.scorer)
+        assert analyze_data(ticker, df, ranker.analyzer, ranker.scorer, first_passage=precomputed[ticker]) == expected
+
+
+if __name__ == "__main__":
+    test_driftless_gbm_matches_gamblers_ruin()
+    test_batch_matches_single_stock()
+    test_unusable_levels_score_neutral_in_every_model()
+    test_scan_precomputation_matches_per_stock_analysis()
+    print("✓ All probability tests passed")
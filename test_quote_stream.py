@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Offline tests for live quote streaming
+"""
+
+import sys
+import os
+import threading
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from test_indicators import make_ohlcv
+from data_fetcher import parse_yahoo_spark
+from ranker import SwingTradingRanker, analyze_data, diff_rankings
+from quote_stream import LIVE_ROWS, QuoteStreamer
+
+
+def full_analysis(ranker, ticker, df, pattern_probability=None):
+    indicators = ranker.analyzer.calculate_technical_indicators(df)
+    return analyze_data(ticker, indicators, ranker.analyzer, ranker.scorer, pattern_probability=pattern_probability)
+
+
+def test_quotes_rescore_like_full_recompute():
+    ranker = SwingTradingRanker()
+    frames = {f'T{i}.BO': make_ohlcv(i, days=80) for i in range(5)}
+    streamer = QuoteStreamer(ranker, tickers=list(frames), limit=3, min_probability=0,
+                             fetch_quotes=lambda tickers: {})
+    events = []
+    streamer.subscribe(events.append)
+    streamer.seed(frames)
+    assert len(events) == 1 and len(events[0]['entered']) == 3
+    assert streamer.results['T0.BO'] == full_analysis(ranker, 'T0.BO', frames['T0.BO'])
+
+    # Same-session tick revises the last bar, keeping the pattern probability of the last close
+    df = frames['T0.BO'].copy()
+    price = df['Close'].iloc[-1] * 1.03
+    df.loc[df.index[-1], ['Close', 'Adj Close']] = price
+    df.loc[df.index[-1], 'High'] = max(df['High'].iloc[-1], price)
+    seeded_pattern = streamer.patterns['T0.BO']
+    streamer.apply_quotes({'T0.BO': {'price': price, 'time': datetime(2024, 6, 28, 11, 0)}})
+    assert streamer.patterns['T0.BO'] == seeded_pattern
+    assert streamer.results['T0.BO'] == full_analysis(ranker, 'T0.BO', df, seeded_pattern)
+
+    # Unchanged price is not re-scored
+    assert streamer.apply_quotes({'T0.BO': {'price': price, 'time': datetime(2024, 6, 28, 11, 1)}}) is None
+
+    # A quote from the next session opens a new bar and rescores the pattern
+    streamer.apply_quotes({'T1.BO': {'price': 123.0, 'volume': 1000.0, 'time': datetime(2024, 7, 1, 9, 20)}})
+    frame = streamer.states['T1.BO'].to_frame()
+    assert frame.index[-1] == datetime(2024, 7, 1) and frame['Close'].iloc[-1] == 123.0
+    levels = ranker.analyzer.calculate_trade_levels(frame)
+    pattern = ranker.scorer.calculate_pattern_probability(frame, levels['target_price'], levels['stop_loss'])
+    assert streamer.patterns['T1.BO'] == pattern
+    assert streamer.results['T1.BO'] == analyze_data('T1.BO', frame, ranker.analyzer, ranker.scorer)
+
+
+def test_ticks_score_recent_bars_outside_the_lock():
+    ranker = SwingTradingRanker()
+    frames = {f'T{i}.BO': make_ohlcv(i, days=120) for i in range(2)}
+    streamer = QuoteStreamer(ranker, tickers=list(frames), fetch_quotes=lambda tickers: {})
+    streamer.seed(frames)
+
+    rows, readable = [], []
+    score = streamer._score
+
+    def slow_score(ticker, frame, pattern_probability):
+        rows.append(len(frame))
+        # Readers and seed() must not wait for a score in progress
+        reader = threading.Thread(target=streamer.snapshot)
+        reader.start()
+        reader.join(timeout=2)
+        readable.append(not reader.is_alive())
+        return score(ticker, frame, pattern_probability)
+
+    streamer._score = slow_score
+    streamer.apply_quotes({'T0.BO': {'price': frames['T0.BO']['Close'].iloc[-1] * 1.01,
+                                     'time': datetime(2024, 6, 28, 11, 0)}})
+    assert rows == [LIVE_ROWS] and readable == [True]
+
+
+def test_subscribers_run_without_the_lock():
+    ranker = SwingTradingRanker()
+    frames = {f'T{i}.BO': make_ohlcv(i, days=80) for i in range(3)}
+    streamer = QuoteStreamer(ranker, tickers=list(frames), fetch_quotes=lambda tickers: {})
+    readable = []
+
+    def slow_subscriber(event):
+        # Another thread reading the snapshot must not wait for this subscriber
+        reader = threading.Thread(target=streamer.snapshot)
+        reader.start()
+        reader.join(timeout=2)
+        readable.append(not reader.is_alive())
+
+    streamer.subscribe(slow_subscriber)
+    streamer.seed(frames)
+    streamer.apply_quotes({'T1.BO': {'price': frames['T1.BO']['Close'].iloc[-1] * 1.01,
+                                     'time': datetime(2024, 6, 28, 11, 0)}})
+    assert readable == [True, True]
+
+
+def test_diff_rankings():
+    a, b, c = ({'ticker': t, 'probability_score': p} for t, p in (('A', 60), ('B', 55), ('C', 50)))
+    changes = diff_rankings([a, b], [dict(b, probability_score=65), c])
+    assert changes['order'] == ['B', 'C']
+    assert [r['ticker'] for r in changes['entered']] == ['C']
+    assert [r['ticker'] for r in changes['updated']] == ['B']
+    assert changes['exited'] == ['A']
+    assert diff_rankings([a, b], [a, b]) == {'order': ['A', 'B'], 'entered': [], 'updated': [], 'exited': []}
+
+
+def test_parse_yahoo_spark():
+    data = {'spark': {'result': [
+        {'symbol': 'TCS.BO', 'response': [{'meta': {
+            'regularMarketPrice': 3900.5, 'regularMarketTime': 1719567000,
+            'chartPreviousClose': 3850.0, 'regularMarketVolume': 1200
+        }}]},
+        {'symbol': 'BAD.BO', 'response': [{'meta': {}}]},
+    ]}}
+    quotes = parse_yahoo_spark(data)
+    assert list(quotes) == ['TCS.BO']
+    assert quotes['TCS.BO']['price'] == 3900.5
+    assert quotes['TCS.BO']['time'] == datetime(2024, 6, 28, 15, 0)
+
+
+if __name__ == "__main__":
+    test_quotes_rescore_like_full_recompute()
+    test_ticks_score_recent_bars_outside_the_lock()
+    test_subscribers_run_without_the_lock()
+    test_diff_rankings()
+    test_parse_yahoo_spark()
+    print("✓ All quote stream tests passed")
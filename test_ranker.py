@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the ranking helpers
+"""
+
+import sys
+import os
+import time
+import random
+import tempfile
+import threading
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from test_indicators import make_ohlcv
+import ranker as ranker_module
+from ranker import SwingTradingRanker, TopKSelector, select_top
+from metadata_cache import StockMetadataCache
+from probability_scorer import ProbabilityScorer
+from benchmark import SyntheticFetcher, offline_ranker, synthetic_universe
+from metrics import STAGE_SECONDS
+
+
+def test_top_k_matches_full_sort():
+    rng = random.Random(0)
+    # Coarse scores so ties are common
+    results = [
+        {'ticker': f'T{i}', 'probability_score': rng.randint(40, 60), 'swing_score': rng.randint(0, 5)}
+        for i in range(500)
+    ]
+    for k in (1, 10, 600):
+        selector = TopKSelector(k)
+        for result in results:
+            selector.push(result)
+        expected = sorted(results, key=lambda x: (x['probability_score'], x['swing_score']), reverse=True)[:k]
+        assert selector.leaderboard() == expected
+        assert selector.seen == len(results)
+
+
+def test_select_top_filters_scored_universe():
+    universe = [
+        {'ticker': 'A', 'probability_score': 70, 'swing_score': 40, 'rr_ratio': 1.5},
+        {'ticker': 'B', 'probability_score': 55, 'swing_score': 80, 'rr_ratio': 3.0},
+        {'ticker': 'C', 'probability_score': 45, 'swing_score': 60, 'rr_ratio': 2.0},
+        {'ticker': 'D', 'probability_score': 70, 'swing_score': 50, 'rr_ratio': 1.0},
+    ]
+    tickers = lambda results: [result['ticker'] for result in results]
+    assert tickers(select_top(universe, limit=10)) == ['D', 'A', 'B', 'C']
+    assert tickers(select_top(universe, limit=2, min_probability=50)) == ['D', 'A']
+    assert tickers(select_top(universe, limit=10, min_probability=50, sort_by='rr_ratio')) == ['B', 'A', 'D']
+    assert tickers(select_top(universe, limit=1, sort_by='swing_score')) == ['B']
+
+
+class SlowFetcher:
+    """Serves synthetic history with a per-ticker delay and counts downloads"""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.started = []
+        self.lock = threading.Lock()
+
+    def fetch_historical_data(self, ticker, period="3mo", interval="1d"):
+        with self.lock:
+            self.started.append(ticker)
+        time.sleep(self.delays[ticker])
+        return make_ohlcv(sorted(self.delays).index(ticker), days=80)
+
+    def get_stock_info(self, ticker):
+        return {'name': ticker}
+
+
+def streaming_ranker(delays, workers):
+    ranker = SwingTradingRanker(io_workers=workers)
+    ranker.fetcher = SlowFetcher(delays)
+    ranker.metadata = StockMetadataCache(
+        ranker.fetcher, path=os.path.join(tempfile.mkdtemp(), 'metadata.json')
+    )
+    return ranker
+
+
+def test_iter_top_stocks_streams_results_as_they_finish():
+    delays = {'FAST.BO': 0.0, 'MID.BO': 0.2, 'SLOW.BO': 0.6}
+    ranker = streaming_ranker(delays, workers=3)
+
+    started = time.perf_counter()
+    events = ranker.iter_top_stocks(limit=2, stock_list=list(delays), min_probability=0)
+    first = next(events)
+    assert first['type'] == 'result' and first['result']['ticker'] == 'FAST.BO'
+    assert time.perf_counter() - started < 0.5
+    assert [result['ticker'] for result in first['top']] == ['FAST.BO']
+
+    rest = list(events)
+    done = rest[-1]
+    assert done['type'] == 'done' and done['completed'] == 3 and not done['timed_out']
+    results = [first['result']] + [event['result'] for event in rest[:-1]]
+    assert [r['ticker'] for r in done['top']] == [r['ticker'] for r in select_top(results, limit=2)]
+    assert all(result['name'] == result['ticker'] for result in done['top'])
+
+
+def test_closing_iter_top_stocks_cancels_pending_work():
+    delays = {f'T{i}.BO': 0.1 for i in range(8)}
+    ranker = streaming_ranker(delays, workers=2)
+
+    events = ranker.iter_top_stocks(limit=3, stock_list=list(delays), min_probability=0)
+    next(events)
+    events.close()
+    time.sleep(0.3)
+    assert len(ranker.fetcher.started) < len(delays)
+
+
+def test_get_top_stocks_fills_and_stops_on_callers_leaderboard():
+    delays = {'FAST.BO': 0.0, 'MID.BO': 0.1}
+    delays.update({f'SLOW{i}.BO': 0.5 for i in range(6)})
+    ranker = streaming_ranker(delays, workers=2)
+    leaderboard = TopKSelector(3)
+    results = []
+
+    scan = threading.Thread(target=lambda: results.extend(ranker.get_top_stocks(
+        limit=3, stock_list=list(delays), min_probability=0, leaderboard=leaderboard
+    )))
+    started = time.perf_counter()
+    scan.start()
+    while not len(leaderboard) and time.perf_counter() - started < 2:
+        time.sleep(0.01)
+    # The partial top N is readable while the scan runs
+    partial = leaderboard.leaderboard()
+    assert partial and scan.is_alive()
+    leaderboard.stop()
+    scan.join(timeout=5)
+
+    assert not scan.is_alive()
+    assert len(ranker.fetcher.started) < len(delays)
+    assert leaderboard.seen < len(delays)
+    assert {r['ticker'] for r in partial} <= {r['ticker'] for r in results}
+
+
+def test_score_universe_reports_progress():
+    delays = {'FAST.BO': 0.0, 'MID.BO': 0.1, 'SLOW.BO': 0.2}
+    ranker = streaming_ranker(delays, workers=3)
+    reports = []
+    scored = ranker.score_universe(list(delays), on_result=lambda *report: reports.append(report))
+    assert [(completed, total) for _, completed, total in reports] == [(1, 3), (2, 3), (3, 3)]
+    assert sorted(r['ticker'] for r, _, _ in reports if r) == sorted(r['ticker'] for r in scored)
+
+
+class PartlyBatchedFetcher(SyntheticFetcher):
+    """Leaves every other ticker out of the bulk download, so scans fetch those one by one"""
+
+    def fetch_multiple_stocks(self, tickers, **kwargs):
+        return {ticker: self.universe[ticker] for ticker in tickers[::2] if ticker in self.universe}
+
+
+def test_process_pool_matches_threads():
+    universe = synthetic_universe(8, '6mo', seed=5)
+    scans = []
+    for cpu_workers in (0, 2):
+        ranker = offline_ranker(universe)
+        ranker.fetcher = PartlyBatchedFetcher(universe)
+        ranker.scorer = ProbabilityScorer(model='bootstrap', paths=200, seed=3)
+        ranker.cpu_workers = cpu_workers
+        before = STAGE_SECONDS.get(stage='probability')['count']
+        try:
+            scans.append(ranker.score_universe(list(universe)))
+        finally:
+            ranker.close()
+        # Worker processes report their stage timings back to this one
+        assert STAGE_SECONDS.get(stage='probability')['count'] - before == len(scans[-1])
+    threads, processes = scans
+    assert len(threads) == len(universe)
+    assert threads == processes
+
+
+class SlowPool:
+    """ProcessPoolExecutor stand-in that is slow to start, widening creation races"""
+
+    created = []
+
+    def __init__(self, max_workers=None):
+        time.sleep(0.05)
+        self.shutdowns = 0
+        type(self).created.append(self)
+
+    def shutdown(self, cancel_futures=False):
+        self.shutdowns += 1
+
+
+def test_concurrent_scans_share_one_process_pool():
+    ranker = SwingTradingRanker(cpu_workers=2)
+    SlowPool.created = []
+    original = ranker_module.ProcessPoolExecutor
+    ranker_module.ProcessPoolExecutor = SlowPool
+    try:
+        pools = []
+        threads = [threading.Thread(target=lambda: pools.append(ranker._process_pool())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        closers = [threading.Thread(target=ranker.close) for _ in range(4)]
+        for thread in closers:
+            thread.start()
+        for thread in closers:
+            thread.join()
+    finally:
+        ranker_module.ProcessPoolExecutor = original
+    assert len(SlowPool.created) == 1 and all(pool is SlowPool.created[0] for pool in pools)
+    assert SlowPool.created[0].shutdowns == 1 and ranker.cpu_pool is None
+
+
+if __name__ == "__main__":
+    test_top_k_matches_full_sort()
+    test_select_top_filters_scored_universe()
+    test_iter_top_stocks_streams_results_as_they_finish()
+    test_closing_iter_top_stocks_cancels_pending_work()
+    test_get_top_stocks_fills_and_stops_on_callers_leaderboard()
+    test_score_universe_reports_progress()
+    test_process_pool_matches_threads()
+    test_concurrent_scans_share_one_process_pool()
+    print("✓ All ranker tests passed")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the market calendar and the background refresher
+"""
+
+import sys
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from market_calendar import (
+    is_session_open, is_trading_day, next_session_open, next_refresh_time, cache_ttl, has_holiday_list,
+    exchange_now
+)
+from refresher import BackgroundRefresher
+
+
+def test_session_model():
+    # 2024-06-28 is a Friday
+    assert is_session_open(datetime(2024, 6, 28, 9, 15))
+    assert not is_session_open(datetime(2024, 6, 28, 15, 30))
+    assert not is_session_open(datetime(2024, 6, 29, 11, 0))
+    assert next_session_open(datetime(2024, 6, 28, 16, 0)) == datetime(2024, 7, 1, 9, 15)
+    assert next_session_open(datetime(2024, 7, 1, 8, 0)) == datetime(2024, 7, 1, 9, 15)
+
+    market, idle = timedelta(minutes=5), timedelta(hours=12)
+    # In session: short cadence, even when it runs past the close
+    assert next_refresh_time(datetime(2024, 6, 28, 15, 28), market, idle) == datetime(2024, 6, 28, 15, 33)
+    # Friday evening: idle cadence
+    assert next_refresh_time(datetime(2024, 6, 28, 16, 0), market, idle) == datetime(2024, 6, 29, 4, 0)
+    # Sunday night: capped at Monday's open
+    assert next_refresh_time(datetime(2024, 6, 30, 23, 0), market, idle) == datetime(2024, 7, 1, 9, 15)
+
+
+def test_holidays_and_calendar_ttls():
+    # Independence Day (fixed date) and Diwali Balipratipada 2025 (published list)
+    assert not is_trading_day(datetime(2024, 8, 15).date())
+    assert not is_trading_day(datetime(2025, 10, 22).date())
+    assert next_session_open(datetime(2025, 10, 20, 16, 0)) == datetime(2025, 10, 23, 9, 15)
+    assert not is_trading_day(datetime(2026, 11, 10).date())
+    assert has_holiday_list(2026) and not has_holiday_list(1999)
+
+    # Intraday bars expire at the next bar boundary, anchored at the open
+    assert cache_ttl('5m', 300, now=datetime(2024, 6, 28, 9, 17)) == 180
+    assert cache_ttl('1h', 300, now=datetime(2024, 6, 28, 15, 20)) == 600  # last bar ends at the close
+    # Daily bars use the live TTL during the session and settlement grace...
+    assert cache_ttl('1d', 300, now=datetime(2024, 6, 28, 11, 0)) == 300
+    assert cache_ttl('1d', 300, now=datetime(2024, 6, 28, 15, 45)) == 300
+    # ...and are then frozen until Monday's open
+    assert cache_ttl('1d', 300, now=datetime(2024, 6, 28, 20, 0)) == \
+        (datetime(2024, 7, 1, 9, 15) - datetime(2024, 6, 28, 20, 0)).total_seconds()
+
+
+def test_refresher_serves_last_good_result():
+    results = iter([[1], RuntimeError('upstream down'), [2]])
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    refresher = BackgroundRefresher(retry_interval=timedelta(hours=1))
+    refresher.register('scan', compute)
+    try:
+        assert refresher.get('scan')['value'] is None
+        release.set()
+        assert refresher.get('scan', wait=5)['value'] == [1]
+
+        # A failed refresh keeps the previous result
+        refresher.trigger('scan')
+        assert refresher.get('scan')['stale']
+        for _ in range(50):
+            snapshot = refresher.get('scan')
+            if snapshot['error']:
+                break
+            threading.Event().wait(0.1)
+        assert snapshot['value'] == [1] and snapshot['error'] == 'upstream down'
+
+        refresher.trigger('scan')
+        for _ in range(50):
+            snapshot = refresher.get('scan')
+            if snapshot['value'] == [2]:
+                break
+            threading.Event().wait(0.1)
+        assert snapshot['value'] == [2] and snapshot['error'] is None and not snapshot['stale']
+    finally:
+        refresher.stop()
+
+
+def test_app_starts_background_jobs_on_first_request():
+    pytest.importorskip("flask")
+    import app
+    # Importing the app (tooling, the debug reloader's watcher) starts nothing
+    assert not app.background_started and app.quote_streamer.thread is None and not app.refresher.jobs
+
+    started = []
+    register_universe, poll_seconds = app.register_universe, app.quote_poll_seconds
+    app.register_universe, app.quote_poll_seconds = started.append, 0
+    try:
+        client = app.app.test_client()
+        client.get('/api/metrics')
+        client.get('/api/metrics')
+        assert started == ['1d'] and app.background_started and app.quote_streamer.thread is None
+    finally:
+        app.register_universe, app.quote_poll_seconds = register_universe, poll_seconds
+
+
+def test_vercel_app_honours_requested_count():
+    pytest.importorskip("flask")
+    pytest.importorskip("flask_cors")
+    from api import index
+    from benchmark import offline_ranker, synthetic_universe
+
+    universe = synthetic_universe(15, '6mo', seed=1)
+    ranker = offline_ranker(universe)
+    scored = ranker.attach_stock_info(ranker.score_universe(list(universe)))
+    refresher = BackgroundRefresher()
+    saved = index.refresher, index.register_universe
+    index.refresher = refresher
+    index.register_universe = lambda: refresher.register(
+        index.UNIVERSE_KEY, lambda: scored, value=scored, computed_at=exchange_now()
+    )
+    try:
+        client = index.app.test_client()
+        counts = {}
+        # The dashboard sends limit; count is still accepted from older clients
+        for query in ('limit=3', 'count=4', 'limit=12&count=5', ''):
+            response = client.get(f'/api/top-stocks?min_probability=0&{query}').get_json()
+            assert response['from_cache'] and not response.get('is_demo')
+            counts[query] = response['count']
+        assert counts == {'limit=3': 3, 'count=4': 4, 'limit=12&count=5': 12, '': 10}
+    finally:
+        refresher.stop()
+        index.refresher, index.register_universe = saved
+
+if __name__ == "__main__":
+    test_session_model()
+    test_holidays_and_calendar_ttls()
+    test_refresher_serves_last_good_result()
+    test_app_starts_background_jobs_on_first_request()
+    test_vercel_app_honours_requested_count()
+    print("✓ All refresher tests passed")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the host-shared cache
+"""
+
+import sys
+import os
+import time
+import tempfile
+import threading
+from multiprocessing import Pool
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+from shared_store import HostCache, SQLiteBackend, RedisBackend
+
+
+class DictRedis:
+    """Minimal in-process stand-in for a Redis client"""
+
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value, expires_at = self.data.get(key, (None, None))
+            if expires_at is not None and expires_at <= time.time():
+                del self.data[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        with self.lock:
+            if nx and key in self.data and (self.data[key][1] is None or self.data[key][1] > time.time()):
+                return None
+            ttl = ex if ex is not None else (px / 1000 if px is not None else None)
+            self.data[key] = (value, time.time() + ttl if ttl is not None else None)
+            return True
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+
+def scan_once(args):
+    """Worker process: compute a shared value, logging each real computation"""
+    db_path, log_path = args
+    cache = HostCache(SQLiteBackend(db_path), poll_interval=0.05)
+
+    def compute():
+        with open(log_path, 'a') as f:
+            f.write(f"{os.getpid()}\n")
+        time.sleep(0.5)
+        return pd.DataFrame({'Close': [1.0, 2.0, 3.0]})
+
+    return float(cache.get_or_compute(('universe',), compute, ttl=60)['Close'].sum())
+
+
+def test_workers_compute_once_per_host():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, log_path = os.path.join(tmp, 'shared.db'), os.path.join(tmp, 'computed.log')
+        with Pool(4) as pool:
+            results = pool.map(scan_once, [(db_path, log_path)] * 4)
+        assert results == [6.0] * 4
+        with open(log_path) as f:
+            assert len(f.read().split()) == 1
+
+
+def test_backends_store_and_expire():
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in (SQLiteBackend(os.path.join(tmp, 'shared.db')), RedisBackend(DictRedis())):
+            cache = HostCache(backend)
+            cache.set('frame', pd.DataFrame({'Close': [1.0]}), ttl=60)
+            cache.set('short', 1, ttl=0.05)
+            assert cache.get('frame')['Close'].iloc[0] == 1.0
+            time.sleep(0.1)
+            assert cache.get('short') is None
+            cache.delete('frame')
+            assert cache.get('frame') is None
+
+            assert backend.acquire('lease', 'a', 60)
+            assert not backend.acquire('lease', 'b', 60)
+            backend.release('lease', 'a')
+            assert backend.acquire('lease', 'b', 60)
+
+
+if __name__ == "__main__":
+    test_workers_compute_once_per_host()
+    test_backends_store_and_expire()
+    print("✓ All shared cache tests passed")
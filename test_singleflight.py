@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Offline tests for request coalescing
+"""
+
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_computation():
+    flights = SingleFlight()
+    calls = []
+
+    def scan(n):
+        calls.append(n)
+        time.sleep(0.2)
+        return n * 2
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: flights.do('scan', scan, 21), range(8)))
+
+    assert results == [42] * 8
+    assert len(calls) == 1
+    assert flights.shared == 7
+    # Finished work is not cached
+    assert flights.do('scan', scan, 1) == 2 and len(calls) == 2
+
+
+def test_errors_reach_every_waiter():
+    flights = SingleFlight()
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.2)
+        raise RuntimeError('upstream down')
+
+    def call():
+        try:
+            flights.do('fetch', failing)
+        except RuntimeError as e:
+            return str(e)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(call)
+        started.wait(5)
+        follower = executor.submit(call)
+        assert leader.result() == follower.result() == 'upstream down'
+
+
+if __name__ == "__main__":
+    test_concurrent_calls_share_one_computation()
+    test_errors_reach_every_waiter()
+    print("✓ All single-flight tests passed")
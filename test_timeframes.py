@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Offline tests for intraday timeframe handling
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from timeframes import base_interval, clip_period, resample_ohlcv
+from data_fetcher import BSEDataFetcher
+from ohlcv_store import OHLCVStore, to_exchange_time
+from ttl_cache import TTLCache
+
+
+def make_intraday(seed, days=3, minutes=5):
+    """Deterministic session-hours bars (09:15-15:30) for a few trading days"""
+    rng = np.random.default_rng(seed)
+    index = pd.DatetimeIndex([])
+    for day in pd.bdate_range('2024-06-24', periods=days):
+        index = index.append(pd.date_range(day + pd.Timedelta('9h15min'), day + pd.Timedelta('15h25min'), freq=f'{minutes}min'))
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, len(index))))
+    return pd.DataFrame({
+        'Open': np.roll(close, 1), 'High': close * 1.001, 'Low': close * 0.999,
+        'Close': close, 'Volume': rng.integers(1000, 10000, len(index)).astype(float)
+    }, index=index)
+
+
+def test_resample_matches_pandas_anchored_at_open():
+    df = make_intraday(1)
+    expected = df.resample('15min', origin='start_day', offset='9h15min').agg(
+        {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+    ).dropna()
+    pd.testing.assert_frame_equal(resample_ohlcv(df, '15m'), expected, check_freq=False)
+
+
+def test_hourly_bins_follow_session():
+    hourly = resample_ohlcv(make_intraday(2, days=1), '1h')
+    assert [ts.strftime('%H:%M') for ts in hourly.index] == \
+        ['09:15', '10:15', '11:15', '12:15', '13:15', '14:15', '15:15']
+
+    daily = resample_ohlcv(make_intraday(3), '1d')
+    assert len(daily) == 3 and (daily.index == daily.index.normalize()).all()
+
+
+def test_clip_period_and_base_interval():
+    assert clip_period('3mo', '1m') == '7d'
+    assert clip_period('3mo', '5m') == '60d'
+    assert clip_period('3mo', '1h') == '3mo'
+    assert clip_period('1y', '1d') == '1y'
+    assert base_interval(['1d', '1h', '15m']) == '15m'
+
+
+class ChartSession:
+    """Session stand-in answering every request with one chart payload"""
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def get(self, url, **kwargs):
+        return self
+
+    status_code = 200
+
+    def json(self):
+        return self.payload
+
+
+def test_chart_bars_land_on_exchange_time():
+    df = make_intraday(4, days=1)
+    # Yahoo sends epoch seconds, i.e. the IST bars shifted to UTC
+    epochs = [int(ts.timestamp()) for ts in df.index.tz_localize('Asia/Kolkata')]
+    payload = {'chart': {'result': [{
+        'meta': {'exchangeTimezoneName': 'Asia/Kolkata'},
+        'timestamp': epochs,
+        'indicators': {'quote': [{
+            'open': df['Open'].tolist(), 'high': df['High'].tolist(), 'low': df['Low'].tolist(),
+            'close': df['Close'].tolist(), 'volume': df['Volume'].tolist(),
+        }]},
+    }]}}
+    fetcher = BSEDataFetcher(store=OHLCVStore(tempfile.mkdtemp()), cache=TTLCache())
+    fetcher.session = ChartSession(payload)
+
+    bars = to_exchange_time(fetcher._fetch_tail('T.BO', datetime(2024, 6, 24), '5m'), '5m')
+    assert bars.index[0] == pd.Timestamp('2024-06-24 09:15')
+    assert list(bars.index) == list(df.index)
+
+    hourly = resample_ohlcv(bars, '1h')
+    assert hourly.index[0].strftime('%H:%M') == '09:15'
+    assert hourly['Open'].iloc[0] == df['Open'].iloc[0]
+
+
+if __name__ == "__main__":
+    test_resample_matches_pandas_anchored_at_open()
+    test_hourly_bins_follow_session()
+    test_clip_period_and_base_interval()
+    test_chart_bars_land_on_exchange_time()
+    print("✓ All timeframe tests passed")
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the bounded LRU/TTL cache
+"""
+
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from ttl_cache import TTLCache
+
+
+def test_lru_eviction_and_counters():
+    cache = TTLCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'b' is now least recently used
+    cache.set('c', 3)
+
+    assert 'b' not in cache
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['entries']) == (3, 1, 1, 2)
+
+
+def test_byte_limit_and_ttl():
+    frame = pd.DataFrame({'Close': np.arange(1000, dtype=float)})
+    size = frame.memory_usage(index=True).sum()
+    cache = TTLCache(max_entries=100, max_bytes=int(size * 2.5))
+    for key in range(3):
+        cache.set(key, frame)
+    assert len(cache) == 2 and cache.stats()['bytes'] <= size * 2.5
+
+    cache.set('short', 1, ttl=0.05)
+    cache.set('forever', 2, ttl=float('inf'))
+    cache.set('skipped', 3, ttl=0)
+    time.sleep(0.1)
+    assert cache.get('short') is None and cache.stats()['expirations'] == 1
+    assert cache.get('forever') == 2
+    assert 'skipped' not in cache
+
+
+if __name__ == "__main__":
+    test_lru_eviction_and_counters()
+    test_byte_limit_and_ttl()
+    print("✓ All cache tests passed")
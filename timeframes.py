@@ -0,0 +1,119 @@
+"""
+Timeframes
+Intraday/daily interval handling: which feed to download, how far back the
+upstream allows, and vectorized resampling of a base feed into coarser bars
+anchored at the BSE session open
+"""
+
+import pandas as pd
+
+from market_calendar import SESSION_OPEN, interval_minutes
+
+# Timeframes the scan pipeline supports, finest first
+TIMEFRAMES = ('1m', '5m', '15m', '1h', '1d')
+
+# Longest history Yahoo serves per interval (calendar days)
+MAX_LOOKBACK_DAYS = {'1m': 7, '2m': 60, '5m': 60, '15m': 60, '30m': 60, '60m': 730, '1h': 730, '90m': 60}
+
+# History a scan fetches by default on each timeframe
+DEFAULT_PERIODS = {'1m': '7d', '5m': '60d', '15m': '60d', '1h': '3mo', '1d': '3mo'}
+
+OHLCV_AGGREGATION = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Volume': 'sum',
+    'Adj Close': 'last',
+}
+
+
+def bar_minutes(interval):
+    """Minutes per bar for intraday intervals, or None for daily bars"""
+    return interval_minutes(interval)
+
+
+def clip_period(period, interval):
+    """
+    Shorten a period to what the upstream serves for an interval
+
+    Args:
+        period (str): Requested period, e.g. '3mo'
+        interval (str): Bar interval
+
+    Returns:
+        str: period, or the longest supported one for the interval
+    """
+    from ohlcv_store import PERIOD_DAYS
+
+    limit = MAX_LOOKBACK_DAYS.get(interval)
+    if limit is None or PERIOD_DAYS.get(period, float('inf')) <= limit:
+        return period
+    return max((p for p, days in PERIOD_DAYS.items() if days <= limit), key=PERIOD_DAYS.get)
+
+
+def base_interval(intervals):
+    """
+    Finest interval of a set, i.e. the one feed every other can be derived from
+
+    Args:
+        intervals (iterable): Intervals such as ['15m', '1h', '1d']
+
+    Returns:
+        str: The finest interval
+    """
+    def length(interval):
+        minutes = bar_minutes(interval)
+        return minutes if minutes is not None else 24 * 60
+    return min(intervals, key=length)
+
+
+def resample_ohlcv(df, interval):
+    """
+    Aggregate bars into a coarser interval
+
+    Intraday bins are anchored at the session open (09:15 IST) of each day, so
+    15m bars start at 09:15, 09:30, ... and 1h bars at 09:15, 10:15, ..., 15:15
+    as the exchange and Yahoo publish them; daily bins are calendar dates.
+
+    Args:
+        df (pd.DataFrame): OHLCV bars with exchange-local naive timestamps
+        interval (str): Target interval, e.g. '15m', '1h' or '1d'
+
+    Returns:
+        pd.DataFrame: Resampled OHLCV bars (empty bins dropped)
+    """
+    if df is None or len(df) == 0:
+        return df
+
+    index = pd.DatetimeIndex(df.index)
+    days = index.normalize()
+    minutes = bar_minutes(interval)
+    if minutes is None:
+        bins = days
+    else:
+        anchors = days + pd.Timedelta(hours=SESSION_OPEN.hour, minutes=SESSION_OPEN.minute)
+        bins = anchors + (index - anchors).floor(f'{minutes}min')
+
+    aggregation = {column: how for column, how in OHLCV_AGGREGATION.items() if column in df.columns}
+    resampled = df.dropna(subset=['Close']).groupby(bins[df['Close'].notna().to_numpy()]).agg(aggregation)
+    resampled.index.name = df.index.name
+    return resampled
+
+
+def derive_timeframes(base, base_interval_name, intervals):
+    """
+    Build every requested timeframe from one base feed
+
+    Args:
+        base (pd.DataFrame): Bars at base_interval_name
+        base_interval_name (str): Interval of base
+        intervals (iterable): Intervals to produce (each no finer than the base)
+
+    Returns:
+        dict: interval -> DataFrame
+    """
+    return {
+        interval: base if interval == base_interval_name else resample_ohlcv(base, interval)
+        for interval in intervals
+    }
@@ -0,0 +1,203 @@
+"""
+Bounded In-Memory Cache
+Thread-safe LRU cache with per-entry TTLs, entry/byte limits and hit/miss/eviction
+counters, shared by the data fetcher, the metadata lookups and the scraper
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def estimate_size(value):
+    """
+    Approximate memory held by a cached value
+
+    Args:
+        value: DataFrame, array, container or scalar
+
+    Returns:
+        int: Size in bytes
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(index=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class TTLCache:
+    """
+    LRU cache whose entries also expire after their own TTL
+
+    Keys are typically tuples namespaced by their user, e.g. ('history', ticker,
+    period, interval), so one instance can be shared and bounded as a whole.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None, default_ttl=300):
+        """
+        Args:
+            max_entries (int): Most entries kept before evicting the least recently used
+            max_bytes (int): Most estimated bytes kept (None for no limit)
+            default_ttl (float): Seconds an entry lives unless set() says otherwise
+                (None for no expiry)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.lock = threading.RLock()
+        self.entries = OrderedDict()  # key -> (value, expires_at, size)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.lookups = {}  # key namespace -> [hits, misses]
+
+    def get(self, key, default=None):
+        """
+        Look up a live entry and mark it recently used
+
+        Returns:
+            The cached value, or default if missing or expired
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            counts = self.lookups.setdefault(key[0] if isinstance(key, tuple) and key else None, [0, 0])
+            if entry is None:
+                self.misses += 1
+                counts[1] += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            counts[0] += 1
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a value, evicting least recently used entries to stay within bounds
+
+        Args:
+            key (hashable): Cache key
+            value: Value to store
+            ttl (float): Seconds to keep it (default: default_ttl; float('inf') never
+                expires; 0 or less skips caching)
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl is not None and ttl <= 0:
+            return
+        size = estimate_size(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (value, expires_at, size)
+            self.bytes += size
+            while len(self.entries) > self.max_entries or (
+                self.max_bytes is not None and self.bytes > self.max_bytes
+            ):
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key):
+        """Drop an entry if present"""
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+
+    def _remove(self, key):
+        _, _, size = self.entries.pop(key)
+        self.bytes -= size
+
+    def items(self, namespace=None):
+        """
+        Snapshot of live entries
+
+        Args:
+            namespace (str): Only include tuple keys whose first element matches
+
+        Returns:
+            list: (key, value) pairs, least recently used first
+        """
+        now = time.monotonic()
+        with self.lock:
+            return [
+                (key, value) for key, (value, expires_at, _) in self.entries.items()
+                if (expires_at is None or expires_at > now)
+                and (namespace is None or (isinstance(key, tuple) and key[0] == namespace))
+            ]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """
+        Returns:
+            dict: Counters and current size, with hits/misses also per key
+                namespace (the first element of tuple keys)
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'namespaces': {
+                    str(namespace): {'hits': hits, 'misses': misses}
+                    for namespace, (hits, misses) in self.lookups.items()
+                },
+            }
+
+    def __contains__(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry is not None and (entry[1] is None or entry[1] > time.monotonic())
+
+    def __len__(self):
+        return len(self.entries)
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache():
+    """
+    Process-wide cache used by default by BSEDataFetcher, StockMetadataCache and
+    WebScraper; bounded by $CACHE_MAX_ENTRIES (default 2048) and $CACHE_MAX_MB
+    (default 256)
+    """
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = TTLCache(
+                max_entries=int(os.environ.get('CACHE_MAX_ENTRIES', 2048)),
+                max_bytes=int(os.environ.get('CACHE_MAX_MB', 256)) * 1024 * 1024
+            )
+        return _shared_cache
@@ -13,17 +13,43 @@ import re
 import json
 from urllib.parse import urlencode
 
+from ttl_cache import shared_cache
+from market_calendar import cache_ttl
+from http_archive import session_from_env
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Base URL of each scraped site (overridable, e.g. to point at a local stub server)
+SOURCE_URLS = {
+    'moneycontrol': 'https://www.moneycontrol.com',
+    'bseindia': 'https://www.bseindia.com',
+    'economictimes': 'https://economictimes.indiatimes.com',
+    'nseindia': 'https://www.nseindia.com',
+    'tradingview': 'https://www.tradingview.com',
+    'investing': 'https://in.investing.com',
+}
+
+
 class WebScraper:
     """Web scraper for BSE stock data from multiple sources"""
     
-    def __init__(self):
+    def __init__(self, base_urls=None, cache=None, price_ttl=60):
+        """
+        Args:
+            base_urls (dict): Overrides for SOURCE_URLS
+            cache (TTLCache): Cache for scraped prices (default: the process-wide
+                shared_cache())
+            price_ttl (float): Seconds a scraped price is reused while BSE is open
+        """
+        self.cache = cache if cache is not None else shared_cache()
+        self.price_ttl = price_ttl
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         }
-        self.session = requests.Session()
+        # Plain, recording or replaying session, per $DATA_PROVIDER
+        self.session = session_from_env()
+        self.base_urls = dict(SOURCE_URLS, **(base_urls or {}))
     
     def scrape_moneycontrol(self, symbol):
         """
@@ -33,41 +59,54 @@ class WebScraper:
         try:
             logger.info(f"Scraping Moneycontrol for {symbol}...")
             
-            url = f"https://www.moneycontrol.com/india/stockpricequote/{symbol}"
+            url, params = self._moneycontrol_request(symbol)
             
-            response = self.session.get(url, headers=self.headers, timeout=10, verify=False)
+            response = self.session.get(url, params=params, headers=self.headers, timeout=10, verify=False)
             response.encoding = 'utf-8'
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Try to find price in different locations
-                price_text = None
-                
-                # Method 1: Look for price in span with specific class
-                price_span = soup.find('span', {'class': re.compile(r'.*price.*', re.I)})
-                if price_span:
-                    price_text = price_span.get_text(strip=True)
-                
-                # Method 2: Look in main content
-                if not price_text:
-                    main_price = soup.find('div', {'class': re.compile(r'.*main.*price.*', re.I)})
-                    if main_price:
-                        price_text = main_price.get_text(strip=True)
-                
-                if price_text:
-                    # Extract numeric value
-                    price_match = re.search(r'₹\s*([\d,\.]+)', price_text)
-                    if price_match:
-                        current_price = float(price_match.group(1).replace(',', ''))
-                        logger.info(f"✓ Moneycontrol: {symbol} = ₹{current_price:.2f}")
-                        
-                        return {
-                            'source': 'moneycontrol',
-                            'symbol': symbol,
-                            'current_price': current_price,
-                            'timestamp': datetime.now().isoformat()
-                        }
+                return self._parse_moneycontrol(response.content, symbol)
+        
+        except Exception as e:
+            logger.warning(f"Moneycontrol scrape failed: {str(e)[:100]}")
+        
+        return None
+    
+    def _moneycontrol_request(self, symbol):
+        return f"{self.base_urls['moneycontrol']}/india/stockpricequote/{symbol}", None
+    
+    def _parse_moneycontrol(self, content, symbol):
+        """Extract the price from a Moneycontrol quote page"""
+        try:
+            soup = BeautifulSoup(content, 'html.parser')
+            
+            # Try to find price in different locations
+            price_text = None
+            
+            # Method 1: Look for price in span with specific class
+            price_span = soup.find('span', {'class': re.compile(r'.*price.*', re.I)})
+            if price_span:
+                price_text = price_span.get_text(strip=True)
+            
+            # Method 2: Look in main content
+            if not price_text:
+                main_price = soup.find('div', {'class': re.compile(r'.*main.*price.*', re.I)})
+                if main_price:
+                    price_text = main_price.get_text(strip=True)
+            
+            if price_text:
+                # Extract numeric value
+                price_match = re.search(r'₹\s*([\d,\.]+)', price_text)
+                if price_match:
+                    current_price = float(price_match.group(1).replace(',', ''))
+                    logger.info(f"✓ Moneycontrol: {symbol} = ₹{current_price:.2f}")
+                    
+                    return {
+                        'source': 'moneycontrol',
+                        'symbol': symbol,
+                        'current_price': current_price,
+                        'timestamp': datetime.now().isoformat()
+                    }
         
         except Exception as e:
             logger.warning(f"Moneycontrol scrape failed: {str(e)[:100]}")
@@ -82,43 +121,54 @@ class WebScraper:
         try:
             logger.info(f"Scraping BSE India for {symbol}...")
             
-            # BSE search endpoint
-            url = "https://www.bseindia.com/markets/commoditiesearch/commsearch.aspx"
-            
-            params = {
-                'scripcode': symbol,
-                'Group': 'EQ'
-            }
+            url, params = self._bseindia_request(symbol)
             
             response = self.session.get(url, params=params, headers=self.headers, timeout=10, verify=False)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Look for price data in tables
-                price_data = {}
-                
-                # Find all tables with price information
-                for table in soup.find_all('table'):
-                    rows = table.find_all('tr')
-                    for row in rows:
-                        cols = row.find_all('td')
-                        if len(cols) >= 2:
-                            label = cols[0].get_text(strip=True).lower()
-                            value = cols[1].get_text(strip=True)
-                            
-                            if 'last traded price' in label or 'ltp' in label or 'current price' in label:
-                                price_match = re.search(r'([\d,\.]+)', value)
-                                if price_match:
-                                    current_price = float(price_match.group(1).replace(',', ''))
-                                    logger.info(f"✓ BSE India: {symbol} = ₹{current_price:.2f}")
-                                    
-                                    return {
-                                        'source': 'bseindia',
-                                        'symbol': symbol,
-                                        'current_price': current_price,
-                                        'timestamp': datetime.now().isoformat()
-                                    }
+                return self._parse_bseindia(response.content, symbol)
+        
+        except Exception as e:
+            logger.warning(f"BSE India scrape failed: {str(e)[:100]}")
+        
+        return None
+    
+    def _bseindia_request(self, symbol):
+        # BSE search endpoint
+        url = f"{self.base_urls['bseindia']}/markets/commoditiesearch/commsearch.aspx"
+        
+        params = {
+            'scripcode': symbol,
+            'Group': 'EQ'
+        }
+        return url, params
+    
+    def _parse_bseindia(self, content, symbol):
+        """Extract the last traded price from a BSE India page"""
+        try:
+            soup = BeautifulSoup(content, 'html.parser')
+            
+            # Find all tables with price information
+            for table in soup.find_all('table'):
+                rows = table.find_all('tr')
+                for row in rows:
+                    cols = row.find_all('td')
+                    if len(cols) >= 2:
+                        label = cols[0].get_text(strip=True).lower()
+                        value = cols[1].get_text(strip=True)
+                        
+                        if 'last traded price' in label or 'ltp' in label or 'current price' in label:
+                            price_match = re.search(r'([\d,\.]+)', value)
+                            if price_match:
+                                current_price = float(price_match.group(1).replace(',', ''))
+                                logger.info(f"✓ BSE India: {symbol} = ₹{current_price:.2f}")
+                                
+                                return {
+                                    'source': 'bseindia',
+                                    'symbol': symbol,
+                                    'current_price': current_price,
+                                    'timestamp': datetime.now().isoformat()
+                                }
         
         except Exception as e:
             logger.warning(f"BSE India scrape failed: {str(e)[:100]}")
@@ -133,35 +183,48 @@ class WebScraper:
         try:
             logger.info(f"Scraping Economic Times for {symbol}...")
             
-            url = f"https://economictimes.indiatimes.com/markets/stocks/{symbol.lower()}.cms"
+            url, params = self._economictimes_request(symbol)
             
-            response = self.session.get(url, headers=self.headers, timeout=10, verify=False)
+            response = self.session.get(url, params=params, headers=self.headers, timeout=10, verify=False)
             response.encoding = 'utf-8'
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Look for price in various locations
-                price_patterns = [
-                    r'Current Price.*?₹([\d,\.]+)',
-                    r'LTP.*?₹([\d,\.]+)',
-                    r'Last Traded.*?₹([\d,\.]+)'
-                ]
-                
-                page_text = soup.get_text()
-                
-                for pattern in price_patterns:
-                    match = re.search(pattern, page_text, re.IGNORECASE)
-                    if match:
-                        current_price = float(match.group(1).replace(',', ''))
-                        logger.info(f"✓ Economic Times: {symbol} = ₹{current_price:.2f}")
-                        
-                        return {
-                            'source': 'economictimes',
-                            'symbol': symbol,
-                            'current_price': current_price,
-                            'timestamp': datetime.now().isoformat()
-                        }
+                return self._parse_economictimes(response.content, symbol)
+        
+        except Exception as e:
+            logger.warning(f"Economic Times scrape failed: {str(e)[:100]}")
+        
+        return None
+    
+    def _economictimes_request(self, symbol):
+        return f"{self.base_urls['economictimes']}/markets/stocks/{symbol.lower()}.cms", None
+    
+    def _parse_economictimes(self, content, symbol):
+        """Extract the price from an Economic Times stock page"""
+        try:
+            soup = BeautifulSoup(content, 'html.parser')
+            
+            # Look for price in various locations
+            price_patterns = [
+                r'Current Price.*?₹([\d,\.]+)',
+                r'LTP.*?₹([\d,\.]+)',
+                r'Last Traded.*?₹([\d,\.]+)'
+            ]
+            
+            page_text = soup.get_text()
+            
+            for pattern in price_patterns:
+                match = re.search(pattern, page_text, re.IGNORECASE)
+                if match:
+                    current_price = float(match.group(1).replace(',', ''))
+                    logger.info(f"✓ Economic Times: {symbol} = ₹{current_price:.2f}")
+                    
+                    return {
+                        'source': 'economictimes',
+                        'symbol': symbol,
+                        'current_price': current_price,
+                        'timestamp': datetime.now().isoformat()
+                    }
         
         except Exception as e:
             logger.warning(f"Economic Times scrape failed: {str(e)[:100]}")
@@ -176,32 +239,45 @@ class WebScraper:
         try:
             logger.info(f"Scraping NSE website for {symbol}...")
             
-            url = f"https://www.nseindia.com/cgi-bin/response_master.php?key={symbol}"
+            url, params = self._nseindia_table_request(symbol)
             
-            response = self.session.get(url, headers=self.headers, timeout=10, verify=False)
+            response = self.session.get(url, params=params, headers=self.headers, timeout=10, verify=False)
             response.encoding = 'utf-8'
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Look for price in table data
-                for td in soup.find_all('td'):
-                    text = td.get_text(strip=True)
-                    if 'Last Traded Price' in text or 'LTP' in text:
-                        next_td = td.find_next('td')
-                        if next_td:
-                            price_text = next_td.get_text(strip=True)
-                            price_match = re.search(r'([\d,\.]+)', price_text)
-                            if price_match:
-                                current_price = float(price_match.group(1).replace(',', ''))
-                                logger.info(f"✓ NSE Website: {symbol} = ₹{current_price:.2f}")
-                                
-                                return {
-                                    'source': 'nsewebsite',
-                                    'symbol': symbol,
-                                    'current_price': current_price,
-                                    'timestamp': datetime.now().isoformat()
-                                }
+                return self._parse_nseindia_table(response.content, symbol)
+        
+        except Exception as e:
+            logger.warning(f"NSE website scrape failed: {str(e)[:100]}")
+        
+        return None
+    
+    def _nseindia_table_request(self, symbol):
+        return f"{self.base_urls['nseindia']}/cgi-bin/response_master.php", {'key': symbol}
+    
+    def _parse_nseindia_table(self, content, symbol):
+        """Extract the last traded price from an NSE response table"""
+        try:
+            soup = BeautifulSoup(content, 'html.parser')
+            
+            # Look for price in table data
+            for td in soup.find_all('td'):
+                text = td.get_text(strip=True)
+                if 'Last Traded Price' in text or 'LTP' in text:
+                    next_td = td.find_next('td')
+                    if next_td:
+                        price_text = next_td.get_text(strip=True)
+                        price_match = re.search(r'([\d,\.]+)', price_text)
+                        if price_match:
+                            current_price = float(price_match.group(1).replace(',', ''))
+                            logger.info(f"✓ NSE Website: {symbol} = ₹{current_price:.2f}")
+                            
+                            return {
+                                'source': 'nsewebsite',
+                                'symbol': symbol,
+                                'current_price': current_price,
+                                'timestamp': datetime.now().isoformat()
+                            }
         
         except Exception as e:
             logger.warning(f"NSE website scrape failed: {str(e)[:100]}")
@@ -216,30 +292,42 @@ class WebScraper:
         try:
             logger.info(f"Scraping TradingView for {symbol}...")
             
-            tv_symbol = f"NSE:{symbol}" if not symbol.startswith('NSE:') else symbol
+            url, params = self._trading_view_request(symbol)
             
-            url = f"https://www.tradingview.com/symbols/{tv_symbol}/"
-            
-            response = self.session.get(url, headers=self.headers, timeout=10, verify=False)
+            response = self.session.get(url, params=params, headers=self.headers, timeout=10, verify=False)
             response.encoding = 'utf-8'
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Look for price data in the page
-                page_text = soup.get_text()
+                return self._parse_trading_view(response.content, symbol)
+        
+        except Exception as e:
+            logger.warning(f"TradingView scrape failed: {str(e)[:100]}")
+        
+        return None
+    
+    def _trading_view_request(self, symbol):
+        tv_symbol = f"NSE:{symbol}" if not symbol.startswith('NSE:') else symbol
+        return f"{self.base_urls['tradingview']}/symbols/{tv_symbol}/", None
+    
+    def _parse_trading_view(self, content, symbol):
+        """Extract the last price from a TradingView symbol page"""
+        try:
+            soup = BeautifulSoup(content, 'html.parser')
+            
+            # Look for price data in the page
+            page_text = soup.get_text()
+            
+            price_match = re.search(r'Last.*?([\d,\.]+)', page_text)
+            if price_match:
+                current_price = float(price_match.group(1).replace(',', ''))
+                logger.info(f"✓ TradingView: {symbol} = ₹{current_price:.2f}")
                 
-                price_match = re.search(r'Last.*?([\d,\.]+)', page_text)
-                if price_match:
-                    current_price = float(price_match.group(1).replace(',', ''))
-                    logger.info(f"✓ TradingView: {symbol} = ₹{current_price:.2f}")
-                    
-                    return {
-                        'source': 'tradingview',
-                        'symbol': symbol,
-                        'current_price': current_price,
-                        'timestamp': datetime.now().isoformat()
-                    }
+                return {
+                    'source': 'tradingview',
+                    'symbol': symbol,
+                    'current_price': current_price,
+                    'timestamp': datetime.now().isoformat()
+                }
         
         except Exception as e:
             logger.warning(f"TradingView scrape failed: {str(e)[:100]}")
@@ -255,7 +343,7 @@ class WebScraper:
             logger.info(f"Scraping historical data from Investing.com for {symbol}...")
             
             # Investing.com URL structure
-            url = f"https://in.investing.com/equities/{symbol.lower()}-stock-historical-data"
+            url = f"{self.base_urls['investing']}/equities/{symbol.lower()}-stock-historical-data"
             
             response = self.session.get(url, headers=self.headers, timeout=10, verify=False)
             response.encoding = 'utf-8'
@@ -298,11 +386,30 @@ class WebScraper:
         
         return None
     
+    def price_sources(self, symbol):
+        """
+        Request and parser for each price source, in the order scrape_all_sources tries them
+
+        Returns:
+            list: (url, params, parser) tuples; parser(content, symbol) -> dict or None
+        """
+        return [
+            self._moneycontrol_request(symbol) + (self._parse_moneycontrol,),
+            self._economictimes_request(symbol) + (self._parse_economictimes,),
+            self._nseindia_table_request(symbol) + (self._parse_nseindia_table,),
+            self._bseindia_request(symbol) + (self._parse_bseindia,),
+            self._trading_view_request(symbol) + (self._parse_trading_view,),
+        ]
+    
     def scrape_all_sources(self, symbol):
         """
         Try all sources and return first successful result
         Symbol format: RELIANCE (without .BO)
         """
+        cached = self.cache.get(('price', symbol))
+        if cached is not None:
+            return cached
+
         logger.info(f"Attempting to scrape {symbol} from all sources...")
         
         sources = [
@@ -317,6 +424,8 @@ class WebScraper:
             try:
                 result = scraper(symbol)
                 if result:
+                    # Prices are kept until the next open once the market has closed
+                    self.cache.set(('price', symbol), result, ttl=cache_ttl('1d', live_ttl=self.price_ttl))
                     return result
             except Exception as e:
                 logger.debug(f"Scraper error: {str(e)[:50]}")